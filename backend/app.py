@@ -1,4 +1,4 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Query
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -7,15 +7,28 @@ from typing import List, Dict, Optional, Any
 import os
 import sys
 import json
+import hmac
 from datetime import datetime
 import shutil
 import time
 import threading
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path so we can import the cloud analysis flow
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from flow import create_cloud_readiness_flow
+from utils.memory_usage import PeakMemoryTracker
+from utils.http_session import connection_stats, http_get
+from utils.http_cache import get_response_cache
+from utils.crawl_checkpoint import get_checkpoint_store
+from utils.github_rate_limit import rate_limit_stats
+from utils.repo_revision import resolve_revision
+from utils.analysis_cache import analysis_cache_key
+from utils.github_org import list_org_repositories, default_branch_shas, prioritize_repositories
+from utils.file_findings import get_findings_store
+from utils.incremental_analysis import (INCREMENTAL_MAX_FILES, apply_changes, compare_changes, github_repository,
+                                        push_changes, rebuild_report, webhook_signature)
 import database
 
 app = FastAPI(title="Cloud Readiness Analysis API")
@@ -38,6 +51,17 @@ app.mount("/files", StaticFiles(directory="output"), name="output_files")
 # In-memory job storage
 jobs: Dict[str, Dict[str, Any]] = {}
 
+# In-memory organization scan storage (each scan's repositories run as jobs above)
+org_scans: Dict[str, Dict[str, Any]] = {}
+
+# Repositories of an organization scan analyzed at the same time, unless the request sets it
+ORG_SCAN_CONCURRENCY = int(os.getenv("ORG_SCAN_CONCURRENCY", "2"))
+
+# Secret the GitHub webhook signs deliveries with; unsigned or mis-signed deliveries are rejected
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+# Without a secret the webhook refuses every delivery, unless unsigned ones are explicitly allowed (local testing)
+GITHUB_WEBHOOK_ALLOW_UNSIGNED = os.getenv("GITHUB_WEBHOOK_ALLOW_UNSIGNED", "false").lower() == "true"
+
 class CloudReadinessRequest(BaseModel):
     repo_url: Optional[str] = None
     local_dir: Optional[str] = None
@@ -47,6 +71,18 @@ class CloudReadinessRequest(BaseModel):
     max_file_size: int = 100000
     github_token: Optional[str] = None
     use_llm_cloud_analysis: Optional[bool] = None
+    incremental_crawl: bool = False  # Reuse unchanged files from the previous crawl of local_dir
+    stream_files: bool = False  # Analyze files in batches while the crawl is still running
+    use_git_index: bool = False  # List local_dir files from the git index instead of walking it
+    lazy_files: bool = False  # Read local_dir file contents only while they are being analyzed
+    walk_workers: int = 1  # Directories of local_dir listed concurrently (for network filesystems)
+    download_workers: int = 8  # Files of repo_url downloaded concurrently (reduced while rate limited)
+    filtered_clone: bool = False  # Clone SSH repo_urls shallow and blob-less, fetching only matching files
+    resume_crawl: bool = True  # Continue an interrupted crawl of the same repo_url from its checkpoint
+    retry_crawl: bool = False  # Retry of a failed job: continue its checkpointed crawl even if the ref moved
+    max_requests: Optional[int] = None  # Request budget for crawling repo_url (highest-value files first)
+    time_budget: Optional[float] = None  # Time budget in seconds for crawling repo_url
+    force_refresh: bool = False  # Analyze again even if this commit was analyzed with the same settings
 
 class JobStatus(BaseModel):
     id: str
@@ -56,10 +92,64 @@ class JobStatus(BaseModel):
     project_name: Optional[str] = None
     output_dir: Optional[str] = None
     error: Optional[str] = None
+    peak_memory_mb: Optional[float] = None
+    commit_sha: Optional[str] = None
+    cache_hit: Optional[bool] = None
+    evaluation_id: Optional[str] = None
+    partial: Optional[bool] = None
+    incremental_from: Optional[str] = None  # Evaluation a push analysis updated (only the pushed files were rescanned)
 
 class GitHubTokenRequest(BaseModel):
     token: str
 
+class OrgScanRequest(BaseModel):
+    org: str
+    github_token: Optional[str] = None
+    max_concurrency: int = ORG_SCAN_CONCURRENCY  # Repositories analyzed at the same time
+    max_repos: Optional[int] = None  # Queue at most this many analyses (most recently pushed first)
+    include_forks: bool = False
+    include_archived: bool = False
+    force_refresh: bool = False  # Analyze repositories whose default branch head was already analyzed
+    analysis: Optional[CloudReadinessRequest] = None  # Settings of every analysis (repo_url is set per repository)
+
+class OrgScanStatus(BaseModel):
+    id: str
+    org: str
+    status: str
+    start_time: str
+    end_time: Optional[str] = None
+    error: Optional[str] = None
+    repos_found: int = 0
+    queued: int = 0
+    skipped: int = 0
+    pending: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+    progress: float = 0.0
+    repos: List[Dict[str, Any]] = []
+
+def analysis_cache_args(params: CloudReadinessRequest) -> Dict[str, Any]:
+    """Settings an analysis result depends on (see utils.analysis_cache), with the defaults jobs apply"""
+    return dict(
+        repo_url=params.repo_url,
+        local_dir=params.local_dir,
+        include_patterns=params.include_patterns or ["**/*"],
+        exclude_patterns=params.exclude_patterns or ["**/node_modules/**", "**/.git/**"],
+        max_file_size=params.max_file_size,
+        use_llm=params.use_llm_cloud_analysis if params.use_llm_cloud_analysis is not None else True,
+        use_git_index=params.use_git_index,
+    )
+
+def findings_settings(cache_key_args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Settings stored with per-file findings, which an incremental update of them must reuse
+
+    The request's GitHub token is never stored: updates triggered by the webhook read
+    with the server's own tokens (GITHUB_TOKENS / GITHUB_TOKEN, see pool_tokens).
+    """
+    return {key: cache_key_args[key] for key in ("include_patterns", "exclude_patterns", "max_file_size", "use_llm")}
+
 def run_cloud_analysis(job_id: str, params: CloudReadinessRequest):
     """Run cloud readiness analysis in a background thread"""
     from utils.logging_utils import get_logger
@@ -89,6 +179,35 @@ def run_cloud_analysis(job_id: str, params: CloudReadinessRequest):
         }
         logger.info(f"Job {job_id} parameters: {log_params}")
         
+        # Prepare include/exclude patterns
+        cache_key_args = analysis_cache_args(params)
+        include_patterns = cache_key_args["include_patterns"]
+        exclude_patterns = cache_key_args["exclude_patterns"]
+        use_llm = cache_key_args["use_llm"]
+        
+        # Pin the analysis to a commit; an evaluation of the same commit with the same
+        # patterns, ruleset and LLM settings is returned without crawling again
+        commit_sha = resolve_revision(repo_url, local_dir, params.github_token)
+        cache_key = analysis_cache_key(commit_sha, **cache_key_args)
+        jobs[job_id]["commit_sha"] = commit_sha
+        jobs[job_id]["cache_hit"] = False
+        logger.info(f"Job {job_id} resolved to commit {commit_sha or 'unknown'}{'' if cache_key else ' (not cacheable)'}")
+        
+        cached = None if params.force_refresh else database.find_cached_evaluation(cache_key)
+        if cached:
+            cached_output_dir = os.path.join("output", cached["project_name"])
+            jobs[job_id].update({
+                "status": "completed",
+                "end_time": datetime.now().isoformat(),
+                "project_name": cached["project_name"],
+                "output_dir": cached_output_dir if os.path.isdir(cached_output_dir) else None,
+                "cache_hit": True,
+                "evaluation_id": cached["id"],
+            })
+            logger.info(f"Job {job_id} served from cached evaluation {cached['id']} "
+                        f"(project {cached['project_name']}, commit {commit_sha})")
+            return
+        
         # If project_name is not provided, derive it from repo_url or local_dir
         if not project_name:
             if repo_url:
@@ -131,10 +250,6 @@ def run_cloud_analysis(job_id: str, params: CloudReadinessRequest):
         logger.info(f"Creating cloud readiness analysis flow for job {job_id}")
         flow = create_cloud_readiness_flow()
         
-        # Prepare include/exclude patterns
-        include_patterns = params.include_patterns or ["**/*"]
-        exclude_patterns = params.exclude_patterns or ["**/node_modules/**", "**/.git/**"]
-        
         # Log file patterns
         logger.info(f"Include patterns: {include_patterns[:5]}{'...' if len(include_patterns) > 5 else ''}")
         logger.info(f"Exclude patterns: {exclude_patterns[:5]}{'...' if len(exclude_patterns) > 5 else ''}")
@@ -150,7 +265,20 @@ def run_cloud_analysis(job_id: str, params: CloudReadinessRequest):
             "max_file_size": params.max_file_size,
             "github_token": params.github_token,
             "output_dir": "output",
-            "use_llm_cloud_analysis": params.use_llm_cloud_analysis if params.use_llm_cloud_analysis is not None else True,
+            "use_llm_cloud_analysis": use_llm,
+            "incremental_crawl": params.incremental_crawl,
+            "stream_files": params.stream_files,
+            "use_git_index": params.use_git_index,
+            "lazy_files": params.lazy_files,
+            "walk_workers": params.walk_workers,
+            "download_workers": params.download_workers,
+            "filtered_clone": params.filtered_clone,
+            "resume_crawl": params.resume_crawl,
+            "retry_crawl": params.retry_crawl,
+            "max_requests": params.max_requests,
+            "time_budget": params.time_budget,
+            # Keep per-file findings of whole GitHub repositories, so pushes can be analyzed incrementally
+            "record_file_findings": github_repository(repo_url) is not None,
             "job_id": job_id,  # Add job_id to shared data for status updates
             "jobs": jobs  # Provide access to the jobs dictionary for status updates
         }
@@ -158,11 +286,16 @@ def run_cloud_analysis(job_id: str, params: CloudReadinessRequest):
         # Run the flow
         logger.info(f"Starting flow execution for job {job_id}")
         start_time = datetime.now()
-        flow.run(shared)
+        with PeakMemoryTracker() as memory_tracker:
+            flow.run(shared)
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
         duration_str = f"{int(duration // 60)}m {int(duration % 60)}s"
         logger.info(f"Flow execution for job {job_id} completed in {duration_str}")
+        memory_usage = memory_tracker.summary()
+        jobs[job_id]["peak_memory_mb"] = memory_usage["peak_rss_mb"]
+        logger.info(f"Job {job_id} peak memory: {memory_usage['peak_rss_mb']} MB RSS "
+                    f"(+{memory_usage['peak_growth_mb']} MB during the flow)")
         
         # Get cloud analysis results
         cloud_analysis = shared.get("cloud_analysis", {})
@@ -179,11 +312,29 @@ def run_cloud_analysis(job_id: str, params: CloudReadinessRequest):
         low_priority = sum(1 for r in recommendations if r.get("priority") == "low")
         logger.info(f"Job {job_id} generated {len(recommendations)} recommendations: {high_priority} high, {medium_priority} medium, {low_priority} low priority")
         
+        # The crawl reports the commit it actually read (the ref may have moved since it was resolved)
+        crawled_sha = shared.get("crawl_stats", {}).get("commit_sha")
+        if crawled_sha and crawled_sha != commit_sha:
+            commit_sha = jobs[job_id]["commit_sha"] = crawled_sha
+            cache_key = analysis_cache_key(commit_sha, **cache_key_args)
+        # A report of a budget-limited partial crawl must not be served as the commit's full analysis
+        jobs[job_id]["partial"] = shared.get("crawl_stats", {}).get("partial", False)
+        if jobs[job_id]["partial"]:
+            logger.info(f"Job {job_id} analyzed a partial crawl; not caching it for commit {commit_sha}")
+            cache_key = None
+        
         # Save the result to the database
         logger.info(f"Saving analysis results for job {job_id} to database")
         try:
-            evaluation_id = database.save_evaluation(project_name, cloud_analysis, job_id)
+            evaluation_id = database.save_evaluation(project_name, cloud_analysis, job_id,
+                                                     cache_key=cache_key, commit_sha=commit_sha)
+            jobs[job_id]["evaluation_id"] = evaluation_id
             logger.info(f"Job {job_id} saved to database with evaluation ID: {evaluation_id}")
+            # Findings of a partial crawl or an unpinned commit can't be the base of a push analysis
+            if shared.get("file_findings") and commit_sha and not jobs[job_id]["partial"]:
+                get_findings_store().save(evaluation_id, repo_url, commit_sha, project_name,
+                                          findings_settings(cache_key_args), shared["file_findings"])
+                logger.info(f"Job {job_id} stored findings of {len(shared['file_findings'])} files")
         except Exception as db_error:
             logger.error(f"Failed to save job {job_id} to database: {str(db_error)}")
             logger.exception("Database error stack trace:")
@@ -207,6 +358,227 @@ def run_cloud_analysis(job_id: str, params: CloudReadinessRequest):
         jobs[job_id]["error"] = str(e)
         logger.info(f"Updated job {job_id} status to 'failed'")
 
+def run_incremental_analysis(job_id: str, payload: Dict[str, Any]):
+    """
+    Update the latest analysis of a pushed repository, rescanning only the files the push touched
+
+    GitHub is read with the server's tokens (GITHUB_TOKENS / GITHUB_TOKEN), which need access
+    to private repositories; tokens of the original analysis requests are not kept.
+    """
+    from utils.logging_utils import get_logger
+    
+    logger = get_logger(f"job_{job_id}")
+    repo_url = payload["repository"]["html_url"]
+    before, after = payload.get("before") or "", payload["after"]
+    logger.info(f"Starting incremental analysis job {job_id} of {repo_url} ({before[:7]}..{after[:7]})")
+    
+    try:
+        jobs[job_id]["status"] = "running"
+        jobs[job_id]["commit_sha"] = after
+        
+        # The analysis of the push's before commit, else the repository's latest one (diffed with the compare API)
+        store = get_findings_store()
+        base = store.latest(repo_url, before) or store.latest(repo_url)
+        previous = database.get_evaluation_by_id(base["evaluation_id"]) if base else None
+        if previous and base["commit_sha"] == after:
+            jobs[job_id].update({
+                "status": "completed",
+                "end_time": datetime.now().isoformat(),
+                "project_name": previous["project_name"],
+                "cache_hit": True,
+                "evaluation_id": previous["id"],
+            })
+            logger.info(f"Job {job_id}: commit {after} was already analyzed in evaluation {previous['id']}")
+            return
+        
+        changes = None
+        if previous:
+            changes = push_changes(payload) if base["commit_sha"] == before else None
+            if changes is None:
+                changes = compare_changes(repo_url, base["commit_sha"], after)
+        if changes is None or len(changes["changed"]) + len(changes["removed"]) > INCREMENTAL_MAX_FILES:
+            if not previous:
+                reason = "no stored analysis to update"
+            elif changes is None:
+                reason = f"the changes since {base['commit_sha'][:7]} can't be listed"
+            else:
+                reason = f"the push touched more than {INCREMENTAL_MAX_FILES} files"
+            logger.info(f"Job {job_id}: {reason}; running a full analysis")
+            request = CloudReadinessRequest(repo_url=repo_url)
+            if base:
+                # Analyze with the settings of the repository's previous analysis
+                settings = base["settings"]
+                request = request.copy(update={
+                    "include_patterns": settings["include_patterns"],
+                    "exclude_patterns": settings["exclude_patterns"],
+                    "max_file_size": settings["max_file_size"],
+                    "use_llm_cloud_analysis": settings["use_llm"],
+                })
+            run_cloud_analysis(job_id, request)
+            return
+        
+        settings = base["settings"]
+        base_findings = store.load(base["evaluation_id"])
+        logger.info(f"Job {job_id} updating evaluation {base['evaluation_id']} ({base['commit_sha'][:7]}): "
+                    f"{len(changes['changed'])} changed, {len(changes['removed'])} removed files")
+        findings, crawl_stats = apply_changes(repo_url, after, base_findings, changes, settings)
+        incremental = {
+            "base_evaluation_id": base["evaluation_id"],
+            "before": base["commit_sha"],
+            "after": after,
+            "files_refetched": crawl_stats.get("downloaded_count", 0),
+            "files_removed": len(set(base_findings) - set(findings)),
+        }
+        report = rebuild_report(previous["data"], findings, settings["use_llm"], incremental)
+        logger.info(f"Job {job_id} rescanned {incremental['files_refetched']} files - "
+                    f"Overall score: {report['overall_score']}, Readiness level: {report['readiness_level']}")
+        
+        # The kept LLM analysis describes the base commit, so only rule-based results are cached for this one
+        project_name = previous["project_name"]
+        cache_key = None
+        if not settings["use_llm"]:
+            cache_key = analysis_cache_key(after, repo_url=base["repo_url"], local_dir=None,
+                                           include_patterns=settings["include_patterns"],
+                                           exclude_patterns=settings["exclude_patterns"],
+                                           max_file_size=settings["max_file_size"], use_llm=False)
+        evaluation_id = database.save_evaluation(project_name, report, job_id, cache_key=cache_key, commit_sha=after)
+        store.save(evaluation_id, base["repo_url"], after, project_name, settings, findings)
+        
+        output_dir = os.path.join("output", project_name)
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "cloud_readiness.json"), "w") as f:
+            json.dump(report, f, indent=2)
+        
+        jobs[job_id].update({
+            "status": "completed",
+            "end_time": datetime.now().isoformat(),
+            "project_name": project_name,
+            "output_dir": output_dir,
+            "cache_hit": False,
+            "evaluation_id": evaluation_id,
+            "incremental_from": base["evaluation_id"],
+        })
+        logger.info(f"Incremental analysis job {job_id} saved evaluation {evaluation_id}")
+        
+    except Exception as e:
+        logger.error(f"Error in incremental analysis job {job_id}: {str(e)}")
+        logger.exception("Stack trace:")
+        jobs[job_id]["status"] = "failed"
+        jobs[job_id]["end_time"] = datetime.now().isoformat()
+        jobs[job_id]["error"] = str(e)
+
+def run_org_scan(scan_id: str, params: OrgScanRequest):
+    """List an organization's repositories and analyze the ones not analyzed at their current head"""
+    from utils.logging_utils import get_logger
+    
+    logger = get_logger(f"org_scan_{scan_id}")
+    scan = org_scans[scan_id]
+    logger.info(f"Starting scan {scan_id} of organization {params.org}")
+    
+    try:
+        repos = prioritize_repositories(list_org_repositories(params.org, params.github_token),
+                                        include_forks=params.include_forks,
+                                        include_archived=params.include_archived)
+        scan["repos_found"] = len(repos)
+        logger.info(f"Scan {scan_id} found {len(repos)} repositories in {params.org}")
+        
+        # One cheap request per repository: its default branch head decides whether it needs analyzing
+        shas = default_branch_shas(repos, params.github_token)
+        
+        template = params.analysis or CloudReadinessRequest()
+        queue = []
+        for repo in repos:
+            entry = {
+                "full_name": repo["full_name"],
+                "repo_url": repo["html_url"],
+                "pushed_at": repo.get("pushed_at"),
+                "commit_sha": shas.get(repo["full_name"]),
+                "status": "queued",
+                "job_id": None,
+                "evaluation_id": None,
+                "reason": None,
+            }
+            scan["repos"].append(entry)
+            if not entry["commit_sha"]:
+                entry.update(status="skipped", reason="default branch has no commits or could not be resolved")
+                continue
+            
+            request = template.copy(update={
+                "repo_url": repo["html_url"],
+                "local_dir": None,
+                "project_name": None,
+                "github_token": params.github_token or template.github_token,
+                "force_refresh": params.force_refresh or template.force_refresh,
+            })
+            cache_key = analysis_cache_key(entry["commit_sha"], **analysis_cache_args(request))
+            cached = None if request.force_refresh else database.find_cached_evaluation(cache_key)
+            if cached:
+                entry.update(status="skipped", reason="already analyzed at this commit", evaluation_id=cached["id"])
+                continue
+            if params.max_repos is not None and len(queue) >= params.max_repos:
+                entry.update(status="skipped", reason="max_repos reached")
+                continue
+            
+            # Jobs are queued in priority order; the executor starts them first in, first out
+            job_id = f"{scan_id}_{len(queue) + 1}"
+            jobs[job_id] = {
+                "id": job_id,
+                "status": "pending",
+                "start_time": datetime.now().isoformat(),
+                "params": request.dict(),
+                "scan_id": scan_id
+            }
+            entry["job_id"] = job_id
+            queue.append((job_id, request))
+        
+        skipped = sum(1 for entry in scan["repos"] if entry["status"] == "skipped")
+        logger.info(f"Scan {scan_id} queued {len(queue)} analyses, skipped {skipped} repositories; "
+                    f"running {params.max_concurrency} at a time")
+        scan["status"] = "running"
+        with ThreadPoolExecutor(max_workers=max(params.max_concurrency, 1),
+                                thread_name_prefix=f"org_scan_{scan_id}") as executor:
+            for job_id, request in queue:
+                executor.submit(run_cloud_analysis, job_id, request)
+        
+        scan["status"] = "completed"
+        scan["end_time"] = datetime.now().isoformat()
+        logger.info(f"Scan {scan_id} of {params.org} completed")
+        
+    except Exception as e:
+        logger.error(f"Error in organization scan {scan_id}: {str(e)}")
+        logger.exception("Stack trace:")
+        scan["status"] = "failed"
+        scan["end_time"] = datetime.now().isoformat()
+        scan["error"] = str(e)
+
+def org_scan_status(scan: Dict[str, Any]) -> OrgScanStatus:
+    """Aggregate progress of a scan, from the live status of its jobs"""
+    repos = []
+    for entry in scan["repos"]:
+        job = jobs.get(entry["job_id"]) if entry["job_id"] else None
+        if job:
+            entry = {**entry, "status": job["status"], "evaluation_id": job.get("evaluation_id"),
+                     "project_name": job.get("project_name"), "error": job.get("error")}
+        repos.append(entry)
+    
+    counts = {status: sum(1 for entry in repos if entry["status"] == status)
+              for status in ("skipped", "pending", "running", "completed", "failed")}
+    queued = len(repos) - counts["skipped"]
+    done = counts["completed"] + counts["failed"]
+    return OrgScanStatus(
+        id=scan["id"],
+        org=scan["org"],
+        status=scan["status"],
+        start_time=scan["start_time"],
+        end_time=scan.get("end_time"),
+        error=scan.get("error"),
+        repos_found=scan["repos_found"],
+        queued=queued,
+        progress=round(done / queued, 3) if queued else (1.0 if scan["status"] == "completed" else 0.0),
+        repos=repos,
+        **counts
+    )
+
 @app.post("/analyze-cloud", response_model=JobStatus)
 async def analyze_cloud_readiness(request: CloudReadinessRequest, background_tasks: BackgroundTasks):
     """Start a cloud readiness analysis job"""
@@ -243,7 +615,13 @@ async def get_job_status(job_id: str):
         end_time=job.get("end_time"),
         project_name=job.get("project_name"),
         output_dir=job.get("output_dir"),
-        error=job.get("error")
+        error=job.get("error"),
+        peak_memory_mb=job.get("peak_memory_mb"),
+        commit_sha=job.get("commit_sha"),
+        cache_hit=job.get("cache_hit"),
+        evaluation_id=job.get("evaluation_id"),
+        partial=job.get("partial"),
+        incremental_from=job.get("incremental_from")
     )
 
 @app.get("/jobs", response_model=List[JobStatus])
@@ -257,11 +635,90 @@ async def list_jobs():
             end_time=job.get("end_time"),
             project_name=job.get("project_name"),
             output_dir=job.get("output_dir"),
-            error=job.get("error")
+            error=job.get("error"),
+            peak_memory_mb=job.get("peak_memory_mb"),
+            commit_sha=job.get("commit_sha"),
+            cache_hit=job.get("cache_hit"),
+            evaluation_id=job.get("evaluation_id"),
+            partial=job.get("partial"),
+            incremental_from=job.get("incremental_from")
         )
         for job_id, job in jobs.items()
     ]
 
+@app.post("/webhook/github")
+async def github_webhook(request: Request, background_tasks: BackgroundTasks):
+    """Receive GitHub push events and update the pushed repository's analysis incrementally"""
+    body = await request.body()
+    if GITHUB_WEBHOOK_SECRET:
+        signature = request.headers.get("X-Hub-Signature-256", "")
+        if not hmac.compare_digest(signature, webhook_signature(GITHUB_WEBHOOK_SECRET, body)):
+            raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    elif not GITHUB_WEBHOOK_ALLOW_UNSIGNED:
+        raise HTTPException(status_code=503, detail="Webhook is not configured: set GITHUB_WEBHOOK_SECRET")
+    
+    event = request.headers.get("X-GitHub-Event", "")
+    if event == "ping":
+        return {"status": "pong"}
+    if event != "push":
+        return {"status": "ignored", "reason": f"'{event}' events are not analyzed"}
+    
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Payload is not valid JSON")
+    repository = payload.get("repository") or {}
+    if not github_repository(repository.get("html_url")) or not payload.get("after"):
+        raise HTTPException(status_code=400, detail="Payload has no repository URL or after commit")
+    # Analyses of a repository URL read its default branch; pushes elsewhere don't change them
+    if payload.get("deleted") or payload.get("ref") != f"refs/heads/{repository.get('default_branch')}":
+        return {"status": "ignored", "reason": "not a push to the default branch"}
+    
+    job_id = f"push_{datetime.now().strftime('%Y%m%d%H%M%S')}_{payload['after'][:7]}"
+    jobs[job_id] = {
+        "id": job_id,
+        "status": "pending",
+        "start_time": datetime.now().isoformat(),
+        "params": {"repo_url": repository["html_url"], "before": payload.get("before"), "after": payload["after"]}
+    }
+    
+    background_tasks.add_task(run_incremental_analysis, job_id, payload)
+    
+    return {"status": "accepted", "job_id": job_id}
+
+@app.post("/org-scan", response_model=OrgScanStatus)
+async def start_org_scan(request: OrgScanRequest, background_tasks: BackgroundTasks):
+    """Analyze every repository of a GitHub organization not yet analyzed at its default branch head"""
+    if request.max_concurrency < 1:
+        raise HTTPException(status_code=400, detail="max_concurrency must be at least 1")
+    
+    scan_id = f"org_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    org_scans[scan_id] = {
+        "id": scan_id,
+        "org": request.org,
+        "status": "listing",
+        "start_time": datetime.now().isoformat(),
+        "repos_found": 0,
+        "repos": []
+    }
+    
+    background_tasks.add_task(run_org_scan, scan_id, request)
+    
+    return org_scan_status(org_scans[scan_id])
+
+@app.get("/org-scan/{scan_id}", response_model=OrgScanStatus)
+async def get_org_scan(scan_id: str):
+    """Get the aggregate progress of an organization scan, with the status of each repository"""
+    if scan_id not in org_scans:
+        raise HTTPException(status_code=404, detail="Organization scan not found")
+    
+    return org_scan_status(org_scans[scan_id])
+
+@app.get("/org-scans", response_model=List[OrgScanStatus])
+async def list_org_scans():
+    """List all organization scans"""
+    return [org_scan_status(scan) for scan in org_scans.values()]
+
 @app.get("/cloud-projects")
 async def list_cloud_projects():
     """List all available cloud analysis projects in the output directory"""
@@ -456,15 +913,13 @@ async def set_github_token(request: GitHubTokenRequest):
     """Set the GitHub token for repository access"""
     # Instead of storing the token, we'll just test it and return validity info
     try:
-        import requests
-        
         headers = {
             "Authorization": f"token {request.token}",
             "User-Agent": "CloudView-API/1.0"
         }
         
         # Test the token by getting rate limit info
-        response = requests.get("https://api.github.com/rate_limit", headers=headers)
+        response = http_get("https://api.github.com/rate_limit", headers=headers)
         
         if response.status_code != 200:
             return {
@@ -499,15 +954,13 @@ async def set_github_token(request: GitHubTokenRequest):
 async def test_github_token(request: GitHubTokenRequest):
     """Test a GitHub token for validity and check rate limit information"""
     try:
-        import requests
-        
         headers = {
             "Authorization": f"token {request.token}",
             "User-Agent": "CloudView-API/1.0"
         }
         
         # Test the token by getting rate limit info
-        response = requests.get("https://api.github.com/rate_limit", headers=headers)
+        response = http_get("https://api.github.com/rate_limit", headers=headers)
         
         if response.status_code != 200:
             return {
@@ -538,6 +991,13 @@ async def test_github_token(request: GitHubTokenRequest):
             "message": f"Error verifying token: {str(e)}"
         }
 
+@app.get("/http-stats")
+async def get_http_stats():
+    """Connection reuse of the pooled HTTP session, GitHub response cache counters, token quotas, crawl checkpoints
+    and stored per-file findings"""
+    return {**connection_stats(), "cache": get_response_cache().stats(), "rate_limit": rate_limit_stats(),
+            "checkpoints": get_checkpoint_store().stats(), "findings": get_findings_store().stats()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app:app", host="::1", port=8000, reload=True) 
\ No newline at end of file
@@ -54,7 +54,7 @@ def _save_db(db):
         logger.error(f"Unexpected error saving database: {str(e)}")
         return False
 
-def save_evaluation(project_name, evaluation_data, job_id=None):
+def save_evaluation(project_name, evaluation_data, job_id=None, cache_key=None, commit_sha=None):
     """
     Save a cloud readiness evaluation to the database
     
@@ -62,6 +62,8 @@ def save_evaluation(project_name, evaluation_data, job_id=None):
         project_name: Name of the project
         evaluation_data: Cloud readiness analysis data
         job_id: Optional job ID associated with this evaluation
+        cache_key: Optional analysis cache key (see utils.analysis_cache) for reuse by later jobs
+        commit_sha: Optional commit the analyzed files were read from
         
     Returns:
         The evaluation ID
@@ -78,6 +80,8 @@ def save_evaluation(project_name, evaluation_data, job_id=None):
         "project_name": project_name,
         "timestamp": datetime.now().isoformat(),
         "job_id": job_id,
+        "cache_key": cache_key,
+        "commit_sha": commit_sha,
         "data": evaluation_data
     }
     
@@ -160,6 +164,29 @@ def get_evaluation_by_id(evaluation_id):
     logger.warning(f"Evaluation not found with ID: {evaluation_id}")
     return None
 
+def find_cached_evaluation(cache_key):
+    """
+    Get the most recent evaluation stored under an analysis cache key
+    
+    Args:
+        cache_key: Key from utils.analysis_cache.analysis_cache_key
+        
+    Returns:
+        The evaluation, or None if there is none
+    """
+    if not cache_key:
+        return None
+    
+    db = _load_db()
+    
+    # Evaluations are stored most recent first
+    for evaluation in db["evaluations"]:
+        if evaluation.get("cache_key") == cache_key:
+            logger.info(f"Found cached evaluation {evaluation['id']} for key {cache_key[:12]}")
+            return evaluation
+    
+    return None
+
 def get_latest_evaluations(limit=10):
     """
     Get the latest evaluations across all projects
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark the fetch strategies of crawl_github_files against a local fake GitHub.
+
+Builds a synthetic repository in a temp directory, serves it with
+utils.fake_github_server (with optional per-request latency and injected
+secondary rate limits) and crawls it once per strategy, each time with an
+empty response cache:
+
+    raw_files     tree listing + one raw download per matching file
+    tarball       tree listing + one streamed tarball
+    contents_api  directory-by-directory Contents API walk (tree reported truncated)
+    auto          whatever the strategy selector (utils.fetch_strategy) picks
+
+Reports wall time, HTTP requests received by the server and requests per
+file delivered. Clone-based fetching needs a git remote and is not covered.
+
+Usage:
+    python benchmarks/bench_crawl_github.py --files 400 --latency-ms 20 --workers 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.crawl_github_files as crawl_github
+import utils.fetch_strategy as fetch_strategy
+import utils.github_rate_limit as github_rate_limit
+from utils.crawl_checkpoint import CheckpointStore
+from utils.fake_github_server import FakeGitHubServer
+from utils.http_cache import ResponseCache
+
+STRATEGIES = ["raw_files", "tarball", "contents_api", "auto"]
+
+
+def build_repository(root, files, dirs, seed=0):
+    """Write a repository-like tree: source files spread over dirs, plus docs and build files."""
+    rng = random.Random(seed)
+    for name, content in [("Dockerfile", "FROM python:3.11-slim\nCMD [\"python\", \"app/main.py\"]\n"),
+                          ("requirements.txt", "flask==3.0\nrequests==2.32\n"),
+                          ("README.md", "# Benchmark fixture\n")]:
+        with open(os.path.join(root, name), "w", encoding="utf-8") as f:
+            f.write(content)
+    for i in range(files):
+        directory = os.path.join(root, "app", f"pkg_{i % dirs}", f"sub_{(i // dirs) % 3}")
+        os.makedirs(directory, exist_ok=True)
+        ext = ".py" if i % 4 else ".md"
+        body = "".join(f"value_{j} = {rng.randint(0, 10**6)}\n" for j in range(rng.randint(5, 200)))
+        with open(os.path.join(directory, f"mod_{i}{ext}"), "w", encoding="utf-8") as f:
+            f.write(body)
+    return files + 3
+
+
+def crawl_once(server, strategy, workers, work_dir, run):
+    """Crawl the fake repository with one strategy and an empty cache; returns (seconds, stats, files)."""
+    crawl_github.get_response_cache = lambda cache=ResponseCache(os.path.join(work_dir, f"http_{run}.sqlite")): cache
+    crawl_github.get_checkpoint_store = lambda store=CheckpointStore(os.path.join(work_dir, f"ckpt_{run}.sqlite")): store
+    github_rate_limit._states.clear()
+    server.reset_counts()
+    server.truncate_trees = strategy == "contents_api"
+    use_tarball = {"raw_files": False, "tarball": True}.get(strategy)
+
+    start = time.perf_counter()
+    result = crawl_github.crawl_github_files(
+        server.repo_url,
+        include_patterns={"*.py", "Dockerfile", "requirements.txt"},
+        use_tarball=use_tarball,
+        download_workers=workers,
+    )
+    return time.perf_counter() - start, result["stats"], result["files"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=400, help="Synthetic source files (3/4 match the patterns)")
+    parser.add_argument("--dirs", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--strategies", nargs="+", default=STRATEGIES, choices=STRATEGIES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixture = os.path.join(work_dir, "repo")
+        os.makedirs(fixture)
+        total = build_repository(fixture, args.files, args.dirs)
+        fetch_strategy.FETCH_STRATEGY_LOG = os.path.join(work_dir, "fetch_strategy.jsonl")
+
+        with FakeGitHubServer(fixture, latency=args.latency_ms / 1000.0, error_rate=args.error_rate,
+                              retry_after=0) as server:
+            crawl_github.GITHUB_API_URL = server.api_url
+            crawl_github.GITHUB_RAW_URL = server.raw_url
+            print(f"Fake repository: {total} files, latency={args.latency_ms}ms, "
+                  f"error rate={args.error_rate}, download_workers={args.workers}")
+            print(f"{'strategy':<14}{'seconds':>9}{'files':>7}{'requests':>10}{'req/file':>10}"
+                  f"{'throttled':>11}  chosen")
+            baseline = None
+            for run, strategy in enumerate(args.strategies):
+                # Keep the crawler's per-file progress lines out of the results
+                with contextlib.redirect_stdout(io.StringIO()):
+                    seconds, stats, files = crawl_once(server, strategy, args.workers, work_dir, run)
+                requests_made = server.request_count()
+                if baseline is None:
+                    baseline = sorted(files)
+                same = "" if sorted(files) == baseline else "  DIFFERENT FILES"
+                chosen = stats.get("fetch_strategy", {}).get("strategy", "?")
+                print(f"{strategy:<14}{seconds:>9.3f}{len(files):>7}{requests_made:>10}"
+                      f"{requests_made / max(len(files), 1):>10.2f}{server.counts.get('throttled', 0):>11}"
+                      f"  {chosen}{same}")
+
+
+if __name__ == "__main__":
+    main()
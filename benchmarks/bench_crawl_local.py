@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark sequential vs concurrent directory walking in crawl_local_files.
+
+Builds a synthetic deep tree in a temp directory and crawls it with
+different walk_workers values. A network filesystem is simulated by adding a
+fixed delay to every directory listing (os.scandir), which is what makes the
+sequential walk slow on NFS/SMB mounts.
+
+Usage:
+    python benchmarks/bench_crawl_local.py --depth 4 --fanout 4 --latency-ms 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.crawl_local_files import crawl_local_files
+
+
+def build_tree(root, depth, fanout, files_per_dir):
+    """Create fanout subdirectories per level down to depth, each with files_per_dir small files."""
+    count = 0
+    level = [root]
+    for d in range(depth + 1):
+        next_level = []
+        for dirpath in level:
+            for i in range(files_per_dir):
+                with open(os.path.join(dirpath, f"mod_{i}.py"), "w", encoding="utf-8") as f:
+                    f.write(f"# level {d}\nVALUE = {i}\n")
+                count += 1
+            # An excluded directory per level checks that pruning still applies
+            os.makedirs(os.path.join(dirpath, "node_modules", "dep"), exist_ok=True)
+            if d < depth:
+                for j in range(fanout):
+                    child = os.path.join(dirpath, f"pkg_{j}")
+                    os.makedirs(child)
+                    next_level.append(child)
+        level = next_level
+    return count
+
+
+def with_listing_latency(latency):
+    """Patch os.scandir so every directory listing takes at least latency seconds."""
+    real_scandir = os.scandir
+
+    def slow_scandir(path="."):
+        time.sleep(latency)
+        return real_scandir(path)
+
+    os.scandir = slow_scandir
+    return lambda: setattr(os, "scandir", real_scandir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--files-per-dir", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Simulated per-directory listing latency")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        file_count = build_tree(root, args.depth, args.fanout, args.files_per_dir)
+        print(f"Synthetic tree: depth={args.depth} fanout={args.fanout} files={file_count} "
+              f"listing latency={args.latency_ms}ms")
+
+        restore = with_listing_latency(args.latency_ms / 1000.0)
+        try:
+            baseline = None
+            for workers in args.workers:
+                start = time.perf_counter()
+                result = crawl_local_files(
+                    root,
+                    include_patterns={"**/*.py"},
+                    exclude_patterns={"**/node_modules/**"},
+                    walk_workers=workers,
+                )
+                elapsed = time.perf_counter() - start
+                paths = list(result["files"])
+                if baseline is None:
+                    baseline = (paths, elapsed)
+                same = "same order" if paths == baseline[0] else "DIFFERENT RESULT"
+                print(f"walk_workers={workers:>3}: {elapsed:7.3f}s  {len(paths)} files  "
+                      f"x{baseline[1] / elapsed:5.1f}  ({same})")
+        finally:
+            restore()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,13 @@ import re
 import yaml
 import json
 from pocketflow import Node, BatchNode
-from utils.crawl_github_files import crawl_github_files
+from utils.crawl_github_files import DEFAULT_DOWNLOAD_WORKERS, crawl_github_files, iter_github_files
 from utils.call_llm import call_llm
-from utils.crawl_local_files import crawl_local_files
+from utils.crawl_local_files import crawl_local_files, iter_local_files
+from utils.crawl_manifest import manifest_dir_for
+from utils.crawl_stream import prefetch
+from utils.content_dedup import ContentIndex
+from utils.file_records import FileRecord, file_path, loaded
 from utils.cloud_analyzer import analyze_cloud_readiness
 from utils.status_updater import StatusUpdater
 from utils.logging_utils import get_logger
@@ -50,9 +54,23 @@ class FetchRepo(Node):
             "exclude_patterns": exclude_patterns,
             "max_file_size": max_file_size,
             "use_relative_paths": True,
+            "incremental_crawl": shared.get("incremental_crawl", False),
+            "stream_files": shared.get("stream_files", False),
+            "use_git_index": shared.get("use_git_index", False),
+            "lazy_files": shared.get("lazy_files", False),
+            "walk_workers": shared.get("walk_workers", 1),
+            "download_workers": shared.get("download_workers", DEFAULT_DOWNLOAD_WORKERS),
+            "filtered_clone": shared.get("filtered_clone", False),
+            "resume_crawl": shared.get("resume_crawl", True),
+            "retry_crawl": shared.get("retry_crawl", False),
+            "max_requests": shared.get("max_requests"),
+            "time_budget": shared.get("time_budget"),
         }
 
     def exec(self, prep_res):
+        if prep_res["stream_files"]:
+            return self._start_stream(prep_res)
+
         if prep_res["repo_url"]:
             print(f"Crawling repository: {prep_res['repo_url']}...")
             result = crawl_github_files(
@@ -62,6 +80,16 @@ class FetchRepo(Node):
                 exclude_patterns=prep_res["exclude_patterns"],
                 max_file_size=prep_res["max_file_size"],
                 use_relative_paths=prep_res["use_relative_paths"],
+                # Download files concurrently (backs off when GitHub rate limits)
+                download_workers=prep_res["download_workers"],
+                # Clone-based crawls: fetch only the blobs of matching files
+                filtered_clone=prep_res["filtered_clone"],
+                # Continue an interrupted crawl of the same URL from its checkpoint
+                resume=prep_res["resume_crawl"],
+                retry=prep_res["retry_crawl"],
+                # Optional budget: fetch the highest-value files first and stop when it runs out
+                max_requests=prep_res["max_requests"],
+                time_budget=prep_res["time_budget"],
             )
         else:
             print(f"Crawling directory: {prep_res['local_dir']}...")
@@ -71,10 +99,21 @@ class FetchRepo(Node):
                 exclude_patterns=prep_res["exclude_patterns"],
                 max_file_size=prep_res["max_file_size"],
                 use_relative_paths=prep_res["use_relative_paths"],
+                # Reuse unchanged files from the previous crawl of this directory if requested
+                manifest_dir=manifest_dir_for(prep_res["local_dir"]) if prep_res["incremental_crawl"] else None,
+                # List files from the git index instead of walking the tree if requested
+                use_git_index=prep_res["use_git_index"],
+                # Keep only paths and hashes; contents are read when analyzed
+                lazy=prep_res["lazy_files"],
+                # List directories concurrently (useful on network filesystems)
+                walk_workers=prep_res["walk_workers"],
             )
 
-        # Convert dict to list of tuples: [(path, content), ...]
-        files_list = list(result.get("files", {}).items())
+        # Convert dict to list of tuples: [(path, content), ...] (lazy crawls give FileRecords)
+        files_list = [
+            content if isinstance(content, FileRecord) else (path, content)
+            for path, content in result.get("files", {}).items()
+        ]
         files_count = len(files_list)
         
         # Check if we have a partial clone situation
@@ -90,10 +129,66 @@ class FetchRepo(Node):
             print(f"Error details: {error_message}")
             
         print(f"Fetched {files_count} files.")
-        return files_list
+
+        # Index contents by hash so identical files share one string and are scanned once
+        content_index = ContentIndex(result.get("content_hashes"))
+        files_list = content_index.add_files(files_list)
+        dedup_stats = content_index.stats()
+        if dedup_stats["duplicate_files"]:
+            print(f"Found {dedup_stats['duplicate_files']} duplicate files ({dedup_stats['bytes_saved']} bytes).")
+        return files_list, result.get("stats", {}), content_index
+
+    def _start_stream(self, prep_res):
+        """
+        Start crawling on a background thread and return (stream, stats, content_index) immediately.
+
+        The stream yields (path, content) tuples as files are fetched, so analysis
+        can start before the crawl finishes; stats fills in as the crawl progresses.
+        Files are added to the (initially empty) content index as they are consumed.
+        """
+        stats = {}
+        if prep_res["repo_url"]:
+            print(f"Streaming repository: {prep_res['repo_url']}...")
+            records = iter_github_files(
+                repo_url=prep_res["repo_url"],
+                token=prep_res["token"],
+                include_patterns=prep_res["include_patterns"],
+                exclude_patterns=prep_res["exclude_patterns"],
+                max_file_size=prep_res["max_file_size"],
+                use_relative_paths=prep_res["use_relative_paths"],
+                download_workers=prep_res["download_workers"],
+                filtered_clone=prep_res["filtered_clone"],
+                resume=prep_res["resume_crawl"],
+                retry=prep_res["retry_crawl"],
+                max_requests=prep_res["max_requests"],
+                time_budget=prep_res["time_budget"],
+                stats=stats,
+            )
+        else:
+            print(f"Streaming directory: {prep_res['local_dir']}...")
+            records = iter_local_files(
+                directory=prep_res["local_dir"],
+                include_patterns=prep_res["include_patterns"],
+                exclude_patterns=prep_res["exclude_patterns"],
+                max_file_size=prep_res["max_file_size"],
+                use_relative_paths=prep_res["use_relative_paths"],
+                manifest_dir=manifest_dir_for(prep_res["local_dir"]) if prep_res["incremental_crawl"] else None,
+                use_git_index=prep_res["use_git_index"],
+                lazy=prep_res["lazy_files"],
+                walk_workers=prep_res["walk_workers"],
+                stats=stats,
+            )
+        return prefetch(records), stats, ContentIndex()
 
     def post(self, shared, prep_res, exec_res):
-        shared["files"] = exec_res  # List of (path, content) tuples
+        files_list, crawl_stats, content_index = exec_res
+        if prep_res["stream_files"]:
+            # Consumers drain shared["file_stream"] and append to shared["files"] as they go
+            shared["file_stream"] = files_list
+            files_list = []
+        shared["files"] = files_list  # List of (path, content) tuples
+        shared["crawl_stats"] = crawl_stats
+        shared["content_index"] = content_index
 
 
 class IdentifyAbstractions(Node):
@@ -922,6 +1017,7 @@ class CloudReadinessAnalysis(BatchNode):
         """
         use_llm = shared.get("use_llm_cloud_analysis", True)  # Default to True
         files_data = shared["files"]
+        file_stream = shared.pop("file_stream", None)
         project_name = shared["project_name"]
         github_token = shared.get("github_token")
         job_id = shared.get("job_id")
@@ -929,7 +1025,10 @@ class CloudReadinessAnalysis(BatchNode):
         # Set up logging
         self.logger = get_logger('cloud_analysis')
         self.logger.info(f"Starting cloud readiness analysis for project: {project_name}")
-        self.logger.info(f"Analysis options: use_llm={use_llm}, files_count={len(files_data)}")
+        if file_stream is not None:
+            self.logger.info(f"Analysis options: use_llm={use_llm}, streaming files from crawler")
+        else:
+            self.logger.info(f"Analysis options: use_llm={use_llm}, files_count={len(files_data)}")
         
         # Initialize status updater if job_id is provided
         if job_id and 'jobs' in shared:
@@ -959,10 +1058,22 @@ class CloudReadinessAnalysis(BatchNode):
         self.use_llm = use_llm
         self.project_name = project_name
         self.github_token = github_token
+        # Keep each file's findings so a later commit can be analyzed incrementally
+        self.record_file_findings = shared.get("record_file_findings", False)
+
+        # Content-hash index from FetchRepo; index the files here if they were provided directly
+        self.content_index = shared.get("content_index")
+        if self.content_index is None:
+            self.content_index = ContentIndex()
+            if file_stream is None:
+                files_data = shared["files"] = self.content_index.add_files(files_data)
             
         # Divide files into manageable batches for processing
         # Using a reasonable batch size to provide granular progress updates
         batch_size = 50
+        if file_stream is not None:
+            return self._stream_batches(file_stream, files_data, shared.get("crawl_stats", {}), batch_size)
+
         file_batches = []
         
         for i in range(0, len(files_data), batch_size):
@@ -977,7 +1088,36 @@ class CloudReadinessAnalysis(BatchNode):
             self.status_updater.set_phase_items(batch_count, f"Processing {total_files} files in {batch_count} batches")
             
         return file_batches
-        
+
+    def _stream_batches(self, file_stream, files_data, crawl_stats, batch_size):
+        """
+        Yield batches from a crawl stream as soon as they fill up.
+
+        BatchNode consumes prep's result lazily, so batch N is analyzed while the
+        crawler is still fetching later files. Every record is also appended to
+        files_data (shared["files"]) for post's report and LLM analysis.
+        """
+        batch = []
+        batch_count = 0
+        for path, content in file_stream:
+            record = self.content_index.add_file(content if isinstance(content, FileRecord) else (path, content))
+            files_data.append(record)
+            batch.append(record)
+            if len(batch) >= batch_size:
+                batch_count += 1
+                yield batch
+                batch = []
+        if batch:
+            batch_count += 1
+            yield batch
+
+        if not files_data:
+            error_message = crawl_stats.get("error")
+            raise ValueError(f"Failed to fetch files: {error_message}" if error_message else "Failed to fetch files")
+        if crawl_stats.get("partial_clone"):
+            self.logger.warning(f"Partial repository clone due to git-lfs issues: {crawl_stats.get('error')}")
+        self.logger.info(f"Streamed {len(files_data)} files in {batch_count} batches (batch size: {batch_size})")
+
     def exec(self, file_batch):
         """
         Process a batch of files for cloud readiness analysis
@@ -988,23 +1128,51 @@ class CloudReadinessAnalysis(BatchNode):
         Returns:
             Partial results for this batch of files
         """
+        from utils.cloud_analyzer import dedupe_scans
+
+        # Lazy file records are read once for all analyzers and released after the batch.
+        # Duplicate blobs (across all batches) are scanned once and the result reused per path.
+        with loaded(file_batch), dedupe_scans(self.content_index, file_batch):
+            return self._analyze_batch(file_batch, self.record_file_findings)
+
+    def _run_analyzer(self, key, analyzer, file_batch, file_results):
+        """
+        Run one analyzer on a batch of files
+
+        With file_results (path -> analyzer results, when per-file findings are recorded) the
+        analyzer runs on each file in turn, keeping each file's result, and returns their merge:
+        merge_analyzer_results doesn't depend on how files are grouped, so it equals one run on
+        the whole batch and costs no extra scan.
+        """
+        from utils.cloud_analyzer import merge_analyzer_results
+
+        if file_results is None:
+            return analyzer(file_batch)
+        for item in file_batch:
+            file_results[file_path(item)][key] = analyzer([item])
+        return merge_analyzer_results({key: results[key]} for results in file_results.values())[key]
+
+    def _analyze_batch(self, file_batch, record_findings=False):
+        """Run the rule-based analyzers on a batch of files, keeping each file's findings if record_findings is set"""
         # Import here so it's available in the exec method
-        from utils.cloud_analyzer import detect_language_frameworks, check_hardcoded_secrets, analyze_architecture
+        from utils.cloud_analyzer import detect_language_frameworks, check_hardcoded_secrets, architecture_mentions
         from utils.cloud_analyzer import check_environment_variables, analyze_service_coupling, analyze_logging_practices
         from utils.cloud_analyzer import analyze_state_management, analyze_code_modularity, analyze_dependency_management
         from utils.cloud_analyzer import detect_health_check_endpoints, analyze_testing_coverage, analyze_instrumentation
+        from utils.file_findings import stored_findings
         
         # Process this batch of files
         batch_results = {}
         batch_size = len(file_batch)
-        self.logger.info(f"Processing batch of {batch_size} files")
+        file_results = {file_path(item): {} for item in file_batch} if record_findings else None
+        self.logger.info(f"Processing batch of {batch_size} files" + (", recording per-file findings" if record_findings else ""))
         
         # Language and framework detection
         if self.status_updater:
             self.status_updater.update_phase("language_detection", "Detecting programming languages and frameworks")
         
         self.logger.info("Detecting languages and frameworks")
-        tech_analysis = detect_language_frameworks(file_batch)
+        tech_analysis = self._run_analyzer("tech_analysis", detect_language_frameworks, file_batch, file_results)
         batch_results["tech_analysis"] = tech_analysis
         
         # Log detected languages and frameworks
@@ -1022,7 +1190,7 @@ class CloudReadinessAnalysis(BatchNode):
             self.status_updater.update_phase("secrets_check", "Checking for hardcoded secrets")
         
         self.logger.info("Checking for hardcoded secrets")
-        secrets_analysis = check_hardcoded_secrets(file_batch)
+        secrets_analysis = self._run_analyzer("secrets_analysis", check_hardcoded_secrets, file_batch, file_results)
         batch_results["secrets_analysis"] = secrets_analysis
         
         # Log secrets findings
@@ -1031,7 +1199,7 @@ class CloudReadinessAnalysis(BatchNode):
         
         # Environment variables
         self.logger.info("Analyzing environment variables usage")
-        env_vars_analysis = check_environment_variables(file_batch)
+        env_vars_analysis = self._run_analyzer("env_vars_analysis", check_environment_variables, file_batch, file_results)
         batch_results["env_vars_analysis"] = env_vars_analysis
         
         # Log env vars findings
@@ -1048,44 +1216,44 @@ class CloudReadinessAnalysis(BatchNode):
         
         # Service coupling
         self.logger.info("Analyzing service coupling")
-        coupling_analysis = analyze_service_coupling(file_batch)
+        coupling_analysis = self._run_analyzer("coupling_analysis", analyze_service_coupling, file_batch, file_results)
         batch_results["coupling_analysis"] = coupling_analysis
         if self.status_updater:
             self.status_updater.increment_progress(1, "Analyzed service coupling")
         
         # Logging practices
         self.logger.info("Analyzing logging practices")
-        logging_analysis = analyze_logging_practices(file_batch)
+        logging_analysis = self._run_analyzer("logging_analysis", analyze_logging_practices, file_batch, file_results)
         batch_results["logging_analysis"] = logging_analysis
         if self.status_updater:
             self.status_updater.increment_progress(1, "Analyzed logging practices")
         
         # State management
         self.logger.info("Analyzing state management")
-        state_management = analyze_state_management(file_batch)
+        state_management = self._run_analyzer("state_management", analyze_state_management, file_batch, file_results)
         batch_results["state_management"] = state_management
         if self.status_updater:
             self.status_updater.increment_progress(1, "Analyzed state management")
         
         # Code modularity
         self.logger.info("Analyzing code modularity")
-        modularity_analysis = analyze_code_modularity(file_batch)
+        modularity_analysis = self._run_analyzer("modularity_analysis", analyze_code_modularity, file_batch, file_results)
         batch_results["modularity_analysis"] = modularity_analysis
         if self.status_updater:
             self.status_updater.increment_progress(1, "Analyzed code modularity")
         
         # Dependency management
         self.logger.info("Analyzing dependency management")
-        dependency_analysis = analyze_dependency_management(file_batch)
+        dependency_analysis = self._run_analyzer("dependency_analysis", analyze_dependency_management, file_batch, file_results)
         batch_results["dependency_analysis"] = dependency_analysis
         if self.status_updater:
             self.status_updater.increment_progress(1, "Analyzed dependency management")
         
         # Health checks, testing, and instrumentation
         self.logger.info("Analyzing health checks, testing, and instrumentation")
-        health_check_analysis = detect_health_check_endpoints(file_batch)
-        testing_analysis = analyze_testing_coverage(file_batch)
-        instrumentation_analysis = analyze_instrumentation(file_batch)
+        health_check_analysis = self._run_analyzer("health_check_analysis", detect_health_check_endpoints, file_batch, file_results)
+        testing_analysis = self._run_analyzer("testing_analysis", analyze_testing_coverage, file_batch, file_results)
+        instrumentation_analysis = self._run_analyzer("instrumentation_analysis", analyze_instrumentation, file_batch, file_results)
         
         batch_results["health_check_analysis"] = health_check_analysis
         batch_results["testing_analysis"] = testing_analysis
@@ -1094,6 +1262,18 @@ class CloudReadinessAnalysis(BatchNode):
         if self.status_updater:
             self.status_updater.increment_progress(1, "Completed component analysis")
             
+        # Architecture content patterns are searched while the batch is loaded, not again in post
+        if file_results is None:
+            batch_results["content_mentions"] = architecture_mentions(file_batch)
+        else:
+            batch_results["file_findings"] = {}
+            batch_results["content_mentions"] = set()
+            for item in file_batch:
+                path = file_path(item)
+                mentions = architecture_mentions([item])
+                batch_results["file_findings"][path] = stored_findings(file_results[path], mentions)
+                batch_results["content_mentions"] |= mentions
+        
         self.logger.info("Completed batch analysis")
         
         # Return partial results for this batch
@@ -1105,16 +1285,17 @@ class CloudReadinessAnalysis(BatchNode):
         
         Args:
             shared: Shared data store
-            prep_res: Output from prep (list of file batches)
+            prep_res: Output from prep (file batches; an exhausted generator when streaming)
             exec_res_list: List of batch results from exec
         """
-        from utils.cloud_analyzer import analyze_architecture, analyze_cloud_readiness_with_llm
+        from utils.cloud_analyzer import analyze_architecture, analyze_cloud_readiness_with_llm, sample_files_for_llm
         from utils.cloud_analyzer import calculate_cloud_readiness_scores, generate_recommendations
+        from utils.cloud_analyzer import merge_analyzer_results, blend_scores, readiness_level_for, llm_recommendations
         import os
         import json
         
         batch_count = len(exec_res_list)
-        file_count = sum(len(batch) for batch in prep_res)
+        file_count = len(shared["files"])
         self.logger.info(f"Combining results from {batch_count} batches (total files: {file_count})")
         
         # Start with architecture analysis phase
@@ -1122,98 +1303,20 @@ class CloudReadinessAnalysis(BatchNode):
             self.status_updater.update_phase("architecture_analysis", "Analyzing application architecture")
         
         # Combine results from all batches
-        tech_analysis = {"languages": {}, "frameworks": {}, "databases": {}, "cloud_services": {}, "containerization": {}, "cicd": {}, "monitoring": {}, "iac": {}, "files": shared["files"]}
-        secrets_analysis = {"has_secrets": False, "secrets_count": 0, "files_with_secrets": []}
-        env_vars_analysis = {"count": 0, "variables": set(), "files": []}
-        coupling_analysis = {"count": 0, "services": {}}
-        logging_analysis = {"has_logging": False, "logging_count": 0, "files_with_logging": [], "structured_logging": 0, "basic_logging": 0, "log_levels": 0, "files": []}
-        state_management = {"has_state_mgmt": False, "state_count": 0, "files_with_state": [], "stateless": 0, "persistent_state": 0, "database_state": 0, "files": []}
-        modularity_analysis = {"modularity_score": 0, "component_count": 0, "files_by_component": {}}
-        dependency_analysis = {"has_dependency_mgmt": False, "dependency_files": []}
-        health_check_analysis = {"has_health_endpoints": False, "count": 0, "health_endpoints": [], "files": []}
-        testing_analysis = {"has_tests": False, "test_count": 0, "test_files": [], "unit_tests": 0, "integration_tests": 0, "mocking": 0, "files": []}
-        instrumentation_analysis = {"has_instrumentation": False, "instrumentation_count": 0, "files_with_instrumentation": [], "metrics": 0, "tracing": 0, "profiling": 0, "files": []}
-        
         self.logger.info("Merging batch results")
-        
-        # Process and merge each batch result
-        for i, batch_result in enumerate(exec_res_list):
-            self.logger.info(f"Merging batch {i+1}/{batch_count}")
-            
-            # Merge tech analysis
-            for tech_category in ["languages", "frameworks", "databases", "cloud_services", "containerization", "cicd", "monitoring", "iac"]:
-                if tech_category in batch_result.get("tech_analysis", {}):
-                    self.logger.debug(f"Merging {tech_category} from batch {i+1}")
-                    for item, count in batch_result["tech_analysis"][tech_category].items():
-                        tech_analysis[tech_category][item] = tech_analysis[tech_category].get(item, 0) + count
-            
-            # Merge secrets analysis
-            secrets_result = batch_result.get("secrets_analysis", {})
-            if secrets_result.get("has_secrets", False):
-                secrets_analysis["has_secrets"] = True
-                self.logger.debug(f"Batch {i+1} has secrets")
-            secret_count = secrets_result.get("secrets_count", 0)
-            if secret_count > 0:
-                self.logger.debug(f"Batch {i+1} has {secret_count} potential secrets")
-            secrets_analysis["secrets_count"] += secret_count
-            secrets_analysis["files_with_secrets"].extend(secrets_result.get("files_with_secrets", []))
-            
-            # Merge environment variables analysis
-            env_result = batch_result.get("env_vars_analysis", {})
-            env_vars_count = env_result.get("count", 0)
-            if env_vars_count > 0:
-                self.logger.debug(f"Batch {i+1} has {env_vars_count} environment variables")
-            env_vars_analysis["count"] += env_vars_count
-            env_vars_analysis["variables"].update(env_result.get("variables", set()))
-            env_vars_analysis["files"].extend(env_result.get("files", []))
-            
-            # Merge service coupling analysis
-            coupling_result = batch_result.get("coupling_analysis", {})
-            coupling_count = coupling_result.get("count", 0)
-            if coupling_count > 0:
-                self.logger.debug(f"Batch {i+1} has {coupling_count} service couplings")
-            coupling_analysis["count"] += coupling_count
-            for service, details in coupling_result.get("services", {}).items():
-                if service not in coupling_analysis["services"]:
-                    coupling_analysis["services"][service] = details
-                else:
-                    # Ensure both values are dictionaries before merging
-                    if isinstance(coupling_analysis["services"][service], dict) and isinstance(details, dict):
-                        # Merge details
-                        self._merge_analysis(coupling_analysis["services"][service], details)
-                    elif isinstance(details, dict):
-                        # If target is not a dict but the source is, replace with the source
-                        self.logger.warning(f"Type mismatch in coupling_analysis: service {service} is {type(coupling_analysis['services'][service])}, not dict. Replacing with source.")
-                        coupling_analysis["services"][service] = details
-                    elif isinstance(coupling_analysis["services"][service], dict):
-                        # If source is not a dict but the target is, do nothing or add details as a special key
-                        self.logger.warning(f"Type mismatch in coupling_analysis: details for service {service} is {type(details)}, not dict. Adding as 'raw_data'.")
-                        coupling_analysis["services"][service]["raw_data"] = details
-                    else:
-                        # If neither is a dict, warn and skip
-                        self.logger.warning(f"Both target and source are not dictionaries for service {service}. Target: {type(coupling_analysis['services'][service])}, Source: {type(details)}. Skipping merge.")
-            
-            # Merge logging analysis
-            logging_result = batch_result.get("logging_analysis", {})
-            if logging_result.get("has_logging", False):
-                logging_analysis["has_logging"] = True
-                self.logger.debug(f"Batch {i+1} has logging")
-            logging_count = logging_result.get("logging_count", 0)
-            if logging_count > 0:
-                self.logger.debug(f"Batch {i+1} has {logging_count} logging instances")
-            logging_analysis["logging_count"] += logging_count
-            logging_analysis["files_with_logging"].extend(logging_result.get("files_with_logging", []))
-            
-            # Merge other analyses
-            self._merge_analysis(state_management, batch_result.get("state_management", {}))
-            self._merge_analysis(modularity_analysis, batch_result.get("modularity_analysis", {}))
-            self._merge_analysis(dependency_analysis, batch_result.get("dependency_analysis", {}))
-            self._merge_analysis(health_check_analysis, batch_result.get("health_check_analysis", {}))
-            self._merge_analysis(testing_analysis, batch_result.get("testing_analysis", {}))
-            self._merge_analysis(instrumentation_analysis, batch_result.get("instrumentation_analysis", {}))
-        
-        # Convert sets to lists for JSON serialization
-        env_vars_analysis["variables"] = list(env_vars_analysis["variables"])
+        merged = merge_analyzer_results(exec_res_list)
+        tech_analysis = merged["tech_analysis"]
+        tech_analysis["files"] = shared["files"]
+        secrets_analysis = merged["secrets_analysis"]
+        env_vars_analysis = merged["env_vars_analysis"]
+        coupling_analysis = merged["coupling_analysis"]
+        logging_analysis = merged["logging_analysis"]
+        state_management = merged["state_management"]
+        modularity_analysis = merged["modularity_analysis"]
+        dependency_analysis = merged["dependency_analysis"]
+        health_check_analysis = merged["health_check_analysis"]
+        testing_analysis = merged["testing_analysis"]
+        instrumentation_analysis = merged["instrumentation_analysis"]
         
         # Log the final counts
         self.logger.info(f"Merged {batch_count} batches. Found:")
@@ -1234,7 +1337,10 @@ class CloudReadinessAnalysis(BatchNode):
                 self.logger.warning(f"Key '{key}' missing in tech_analysis, adding empty dictionary")
                 tech_analysis[key] = {}
                 
+        # Content patterns found by the batches (searching shared["files"] would read lazy files again)
+        tech_analysis["content_mentions"] = set().union(*(result["content_mentions"] for result in exec_res_list))
         architecture = analyze_architecture(tech_analysis)
+        del tech_analysis["content_mentions"]
         
         # Log architecture analysis results
         if architecture:
@@ -1250,7 +1356,10 @@ class CloudReadinessAnalysis(BatchNode):
             self.logger.info("Starting LLM-based analysis")
             try:
                 self.logger.info("Calling LLM for cloud readiness analysis")
-                llm_analysis = analyze_cloud_readiness_with_llm(shared["files"], self.project_name)
+                # Only the sampled files are read again (lazy files aren't kept in memory)
+                llm_sample = sample_files_for_llm(shared["files"])
+                with loaded(llm_sample):
+                    llm_analysis = analyze_cloud_readiness_with_llm(llm_sample, self.project_name)
                 
                 # Log LLM results
                 if llm_analysis:
@@ -1268,6 +1377,10 @@ class CloudReadinessAnalysis(BatchNode):
                     self.status_updater.update_detailed_status("llm_error", str(e))
         else:
             self.logger.info("Skipping LLM-based analysis (disabled)")
+
+        # File contents are no longer needed: list paths only in the report and drop cached scans
+        tech_analysis["files"] = [file_path(item) for item in shared["files"]]
+        self.content_index.release()
         
         # Calculate cloud readiness scores
         if self.status_updater:
@@ -1296,59 +1409,13 @@ class CloudReadinessAnalysis(BatchNode):
         scores = rule_based_scores
         if llm_analysis and self.use_llm:
             self.logger.info("Combining rule-based and LLM-based scores")
-            
-            # Import the score map
-            from utils.cloud_analyzer import max_score_map
-            
-            # Convert LLM scores to our scale
-            llm_scores = {}
-            for factor, data in llm_analysis["factors"].items():
-                # Skip factors not in our scoring system
-                if factor not in max_score_map:
-                    continue
-                
-                # Convert from 1-10 to our scale
-                if isinstance(data, dict) and "score" in data:
-                    max_score = max_score_map.get(factor, 10)
-                    normalized_score = (data["score"] / 10) * max_score
-                    llm_scores[factor] = normalized_score
-            
-            # Blend scores (60% rule-based, 40% LLM-based)
-            blended_scores = {}
-            for factor in rule_based_scores:
-                if factor in llm_scores:
-                    raw_blended = 0.6 * rule_based_scores[factor] + 0.4 * llm_scores[factor]
-                    # Cap at maximum score for this factor
-                    max_score = max_score_map.get(factor, 10)
-                    blended_scores[factor] = min(raw_blended, max_score)
-                else:
-                    # Also cap rule-based scores at their maximum
-                    max_score = max_score_map.get(factor, 10)
-                    blended_scores[factor] = min(rule_based_scores[factor], max_score)
-            
-            # Calculate overall score
-            overall_sum = sum([blended_scores[f] for f in blended_scores if f != 'overall'])
-            
-            # Normalize to 0-100 range
-            total_possible_score = sum(max_score_map.values())
-            blended_scores['overall'] = max(0, min(round((overall_sum / total_possible_score) * 100), 100))
-            
-            # Use the blended scores
-            scores = blended_scores
+            scores = blend_scores(rule_based_scores, llm_analysis["factors"])
             
             # Log blended scores
             self.logger.info(f"Blended overall score: {scores.get('overall', 0):.2f}")
         
         # Determine readiness level based on overall score
-        readiness_level = "Unknown"
-        if scores['overall'] >= 80:
-            readiness_level = "Cloud-Native"
-        elif scores['overall'] >= 60:
-            readiness_level = "Cloud-Ready"
-        elif scores['overall'] >= 40:
-            readiness_level = "Cloud-Friendly"
-        else:
-            readiness_level = "Cloud-Challenged"
+        readiness_level = readiness_level_for(scores['overall'])
         
         self.logger.info(f"Determined readiness level: {readiness_level}")
         
@@ -1393,9 +1460,18 @@ class CloudReadinessAnalysis(BatchNode):
             'scores': scores,
             'overall_score': scores['overall'],
             'readiness_level': readiness_level,
-            'recommendations': recommendations
+            'recommendations': recommendations,
+            'deduplication': self.content_index.stats()
         }
         
+        # A budgeted crawl may have fetched only part of the repository
+        coverage = shared.get("crawl_stats", {}).get("coverage")
+        if coverage:
+            report['coverage'] = coverage
+            if coverage.get("partial"):
+                self.logger.warning(f"Report is based on a partial crawl "
+                                    f"({coverage.get('files_fetched')} files, stopped by {coverage.get('stopped_by')} budget)")
+        
         # Add LLM analysis if available
         if llm_analysis and self.use_llm:
             self.logger.info("Adding LLM analysis to report")
@@ -1407,23 +1483,18 @@ class CloudReadinessAnalysis(BatchNode):
                 'factors': llm_analysis.get('factors', {}),
             }
             # Add LLM recommendations to our rule-based ones
-            llm_recs_count = 0
-            for factor, data in llm_analysis.get('factors', {}).items():
-                if isinstance(data, dict) and 'recommendations' in data:
-                    # Create a new recommendation from LLM insight
-                    llm_rec = {
-                        'category': factor,
-                        'priority': 'medium',
-                        'description': data['recommendations'],
-                        'source': 'llm'
-                    }
-                    report['recommendations'].append(llm_rec)
-                    llm_recs_count += 1
+            llm_recs = llm_recommendations(llm_analysis)
+            report['recommendations'].extend(llm_recs)
+            llm_recs_count = len(llm_recs)
             
             self.logger.info(f"Added {llm_recs_count} LLM-based recommendations")
         
         # Store output in shared dictionary
         shared["cloud_analysis"] = report
+        if self.record_file_findings:
+            shared["file_findings"] = {
+                path: findings for batch_result in exec_res_list for path, findings in batch_result["file_findings"].items()
+            }
         
         # Create output directory
         output_dir = os.path.join(shared["output_dir"], self.project_name)
@@ -1447,80 +1518,6 @@ class CloudReadinessAnalysis(BatchNode):
             self.status_updater.complete(True)
             
         return "default"
-    
-    def _merge_analysis(self, target, source):
-        """Helper method to merge analysis dictionaries"""
-        # If source is a list, we can't call items() on it
-        if isinstance(source, list):
-            self.logger.warning(f"Source is a list in _merge_analysis, not a dictionary. This is unexpected behavior.")
-            # If target is also a list, extend it
-            if isinstance(target, list):
-                target.extend(source)
-                self.logger.debug(f"Extended target list with {len(source)} items from source list")
-            # If target is not a list, replace it with source
-            else:
-                self.logger.warning(f"Type mismatch in _merge_analysis: target is {type(target)}, source is list. Replacing target with source.")
-                return source
-            return target
-            
-        # Process dictionary as before
-        for key, value in source.items():
-            if isinstance(value, dict):
-                if key not in target:
-                    target[key] = {}
-                    self.logger.debug(f"Created new dictionary for key {key}")
-                elif not isinstance(target[key], dict):
-                    self.logger.warning(f"Type mismatch in _merge_analysis: target[{key}] is {type(target[key])}, not dict")
-                    target[key] = {}
-                self._merge_analysis(target[key], value)
-            elif isinstance(value, list):
-                if key not in target:
-                    target[key] = []
-                    self.logger.debug(f"Created new list for key {key}")
-                elif not isinstance(target[key], list):
-                    self.logger.warning(f"Type mismatch in _merge_analysis: target[{key}] is {type(target[key])}, not list")
-                    # Convert to list with existing value as first element if not already a list
-                    target[key] = [target[key]]
-                # Only extend lists, don't try to add them
-                target[key].extend(value)
-                self.logger.debug(f"Extended list for key {key} with {len(value)} items")
-            elif isinstance(value, (int, float)):
-                # For numeric values, we'll add them
-                if key not in target:
-                    target[key] = value
-                    self.logger.debug(f"Created new numeric value for key {key}: {value}")
-                elif isinstance(target[key], (int, float)):
-                    # If both are numeric, add them
-                    target[key] = target[key] + value
-                    self.logger.debug(f"Added numeric value to key {key}: {target[key]}")
-                elif isinstance(target[key], list):
-                    # If target is a list, append the numeric value
-                    self.logger.warning(f"Type mismatch in _merge_analysis: trying to add {type(value)} to list for key {key}")
-                    target[key].append(value)
-                    self.logger.debug(f"Appended numeric value to list for key {key}")
-                else:
-                    # Handle other type mismatches
-                    self.logger.warning(f"Type mismatch in _merge_analysis: cannot add {type(value)} to {type(target[key])} for key {key}")
-                    # Convert both to strings and concatenate as a fallback
-                    target[key] = str(target[key]) + " | " + str(value)
-            elif isinstance(value, bool):
-                # For boolean values, use OR operation
-                if key not in target:
-                    target[key] = value
-                    self.logger.debug(f"Created new boolean value for key {key}: {value}")
-                elif isinstance(target[key], bool):
-                    target[key] = target[key] or value
-                    self.logger.debug(f"Applied OR operation for boolean key {key}: {target[key]}")
-                else:
-                    self.logger.warning(f"Type mismatch in _merge_analysis: cannot apply OR to {type(target[key])} for key {key}")
-                    # Just override with the boolean value
-                    target[key] = value
-            else:
-                # For other values, just override
-                if key in target and type(target[key]) != type(value):
-                    self.logger.debug(f"Overriding different type for key {key}: {type(target[key])} -> {type(value)}")
-                target[key] = value
-        return target
 
 # Add a helper max score map for the scores
 max_score_map = {
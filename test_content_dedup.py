@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+from utils.content_dedup import ContentIndex
+from utils.cloud_analyzer import (
+    dedupe_scans, detect_language_frameworks, check_environment_variables, analyze_logging_practices,
+)
+
+STUB = "import os\nprint(os.environ.get('API_URL'))\nlogger.info('x')\n"
+FILES = [
+    ("a/gen/stub_pb2.py", STUB),
+    ("b/gen/stub_pb2.py", "".join(STUB)),  # equal but distinct string object
+    ("vendor/stub_pb2.py", STUB[:]),
+    ("main.py", "print('hello')\n"),
+]
+
+
+def test_duplicates_share_content_and_report_savings():
+    index = ContentIndex()
+    files = index.add_files(FILES)
+
+    assert [path for path, _ in files] == [path for path, _ in FILES]
+    assert files[0][1] is files[1][1] is files[2][1]
+    stats = index.stats()
+    assert stats["unique_blobs"] == 2
+    assert stats["duplicate_files"] == 2
+    assert stats["bytes_saved"] == 2 * len(STUB.encode("utf-8"))
+
+
+def test_deduplicated_scans_fan_out_identical_results():
+    index = ContentIndex()
+    files = index.add_files(FILES)
+    analyzers = (detect_language_frameworks, check_environment_variables, analyze_logging_practices)
+
+    plain = [analyzer(FILES) for analyzer in analyzers]
+    with dedupe_scans(index):
+        deduped = [analyzer(files) for analyzer in analyzers]
+
+    assert deduped == plain
+    assert index.stats()["scan_cache_hits"] > 0
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+import io
+import json
+import hashlib
+import tarfile
+import pytest
+import utils.crawl_github_files as crawl_github
+import utils.fetch_strategy as fetch_strategy
+import utils.github_rate_limit as github_rate_limit
+from utils.crawl_github_files import crawl_github_files, iter_github_files
+import utils.crawl_checkpoint as crawl_checkpoint
+from utils.crawl_checkpoint import CheckpointStore
+from utils.http_cache import ResponseCache
+
+COMMIT = "c" * 40
+TREE = [
+    {"path": "README.md", "mode": "100644", "type": "blob", "size": 10},
+    {"path": "src", "mode": "040000", "type": "tree"},
+    {"path": "src/a.py", "mode": "100644", "type": "blob", "size": 12},
+    {"path": "src/big.py", "mode": "100644", "type": "blob", "size": 10_000_000},
+    {"path": "src/link.py", "mode": "120000", "type": "blob", "size": 8},
+    {"path": "src/notes.md", "mode": "100644", "type": "blob", "size": 5},
+    {"path": "src/sub", "mode": "040000", "type": "tree"},
+    {"path": "src/sub/c.py", "mode": "100644", "type": "blob", "size": 14},
+    {"path": "src/vendor", "mode": "160000", "type": "commit"},
+    {"path": "srcx/d.py", "mode": "100644", "type": "blob", "size": 3},
+]
+
+
+class FakeResponse:
+    def __init__(self, status_code, body="", headers=None):
+        self.status_code = status_code
+        self.raw = io.BytesIO(body if isinstance(body, bytes) else b"")
+        self.text = body if isinstance(body, str) else "" if isinstance(body, bytes) else json.dumps(body)
+        self.content = body if isinstance(body, bytes) else self.text.encode("utf-8")
+        self.encoding = "utf-8"
+        self.url = None
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def make_tarball(files):
+    """Gzipped tar laid out like GitHub's: every member under one top-level directory."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for path, data in files.items():
+            info = tarfile.TarInfo(f"o-r-{COMMIT[:7]}/{path}")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class FakeGitHub:
+    """Serves just enough of the GitHub API and raw content for one repository."""
+
+    def __init__(self, truncated=False):
+        self.truncated = truncated
+        self.tree = list(TREE)
+        self.head = COMMIT  # Commit the main branch points at
+        self.tarball = None
+        self.raw_files = {}  # Raw content served for a path instead of the "# <path>" stub
+        self.throttle = set()  # URLs answered once with a secondary rate limit
+        self.quota = None  # {token: remaining API requests}, enables X-RateLimit-* headers
+        self.tokens_used = []
+        self.urls = []
+
+    def get(self, url, headers=None, params=None, stream=False):
+        self.urls.append(url)
+        if self.quota is not None and url.startswith(crawl_github.GITHUB_API_URL):
+            token = (headers or {}).get("Authorization", "").replace("token ", "")
+            limit_headers = {"X-RateLimit-Limit": "5000", "X-RateLimit-Reset": "4102444800"}
+            if self.quota[token] == 0:
+                return FakeResponse(403, "API rate limit exceeded", {**limit_headers, "X-RateLimit-Remaining": "0"})
+            self.quota[token] -= 1
+            self.tokens_used.append(token)
+            response = self.route(url, params)
+            response.headers.update({**limit_headers, "X-RateLimit-Remaining": str(self.quota[token])})
+            return response
+        response = self.route(url, params)
+        if response.status_code == 200 and not stream:
+            # Strong validator from the body, as GitHub sends for API and raw responses
+            etag = '"%s"' % hashlib.sha1(response.content).hexdigest()
+            if (headers or {}).get("If-None-Match") == etag:
+                return FakeResponse(304)
+            response.headers["ETag"] = etag
+        return response
+
+    def route(self, url, params):
+        api = crawl_github.GITHUB_API_URL + "/repos/o/r"
+        raw = f"{crawl_github.GITHUB_RAW_URL}/o/r/{self.head}/"
+        if url == api + "/branches":
+            return FakeResponse(200, [{"name": "main"}])
+        if url == api + "/commits/main":
+            return FakeResponse(200, self.head)
+        if url == f"{api}/git/trees/{self.head}" and params == {"recursive": "1"}:
+            return FakeResponse(200, {"sha": "t" * 40, "tree": self.tree, "truncated": self.truncated})
+        if url == f"{api}/tarball/{self.head}" and self.tarball is not None:
+            return FakeResponse(200, self.tarball)
+        if url in self.throttle:
+            self.throttle.discard(url)
+            return FakeResponse(429, "secondary rate limit", {"Retry-After": "1"})
+        if url.startswith(raw):
+            return FakeResponse(200, self.raw_files.get(url[len(raw):], f"# {url[len(raw):]}\n"))
+        if url.startswith(api + "/contents/"):
+            path = url[len(api + "/contents/"):]
+            items = [
+                {"path": e["path"], "name": e["path"].rsplit("/", 1)[-1], "size": e.get("size", 0),
+                 "type": "dir" if e["type"] == "tree" else "file",
+                 "download_url": raw + e["path"], "url": ""}
+                for e in self.tree
+                if e["type"] in ("blob", "tree") and e["mode"] != "120000"
+                and e["path"].rsplit("/", 1)[0] == path and "/" in e["path"]
+            ]
+            return FakeResponse(200, items)
+        return FakeResponse(404, "Not Found")
+
+
+@pytest.fixture
+def fake_github(monkeypatch, tmp_path):
+    cache = ResponseCache(str(tmp_path / "github_http.sqlite"))
+    monkeypatch.setattr(crawl_github, "get_response_cache", lambda: cache)
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    monkeypatch.setattr(crawl_github, "get_checkpoint_store", lambda: checkpoints)
+    monkeypatch.setattr(fetch_strategy, "FETCH_STRATEGY_LOG", str(tmp_path / "fetch_strategy.jsonl"))
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("GITHUB_TOKENS", raising=False)
+    monkeypatch.setattr(github_rate_limit, "_states", {})
+    server = FakeGitHub()
+    monkeypatch.setattr(crawl_github, "http_get", server.get)
+    return server
+
+
+def test_tree_listing_filters_before_downloading(fake_github):
+    result = crawl_github_files(
+        "https://github.com/o/r/tree/main/src",
+        include_patterns={"*.py"},
+        max_file_size=1000,
+        use_relative_paths=True,
+    )
+
+    assert result["files"] == {"a.py": "# src/a.py\n", "sub/c.py": "# src/sub/c.py\n"}
+    assert result["stats"]["enumeration"] == "git_tree"
+    assert result["stats"]["skipped_files"] == [("src/big.py", 10_000_000)]
+    # branches + commit + tree + one raw download per kept file
+    assert result["stats"]["api_requests"] == 5
+    assert not any("big.py" in url or "notes.md" in url for url in fake_github.urls)
+
+
+def test_concurrent_downloads_back_off_when_throttled(fake_github, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(crawl_github.time, "sleep", sleeps.append)
+    names = [f"m{i}.py" for i in range(20)]
+    fake_github.tree = [{"path": name, "mode": "100644", "type": "blob", "size": 8} for name in names]
+    fake_github.throttle = {f"{crawl_github.GITHUB_RAW_URL}/o/r/{COMMIT}/m3.py"}
+
+    result = crawl_github_files("https://github.com/o/r/tree/main", download_workers=4, use_tarball=False)
+
+    # Listing order is kept and the throttled file is retried after Retry-After
+    assert list(result["files"]) == names
+    assert sleeps == [1]
+    concurrency = result["stats"]["download_concurrency"]
+    assert concurrency["throttle_events"] == 1
+    assert concurrency["lowest_limit"] == 2
+
+
+def test_second_crawl_is_served_from_the_persistent_cache(fake_github):
+    def crawl():
+        return crawl_github_files("https://github.com/o/r/tree/main/src", include_patterns={"*.py"},
+                                  max_file_size=1000, use_relative_paths=True)
+
+    first = crawl()
+    fake_github.urls.clear()
+    second = crawl()
+
+    assert second["files"] == first["files"]
+    # Branches and commit are revalidated (304); the SHA-pinned tree and raw files need no request
+    assert second["stats"]["http_cache"] == {"hits": 3, "revalidated": 2, "misses": 0}
+    assert second["stats"]["api_requests"] == 2
+    assert all("/git/trees/" not in url and "raw" not in url for url in fake_github.urls)
+
+
+def test_token_pool_moves_to_the_token_with_quota_left(fake_github, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(crawl_github.time, "sleep", sleeps.append)
+    monkeypatch.setenv("GITHUB_TOKENS", "tok-a, tok-b")
+    fake_github.quota = {"tok-a": 0, "tok-b": 4000}
+
+    result = crawl_github_files("https://github.com/o/r/tree/main/src", include_patterns={"*.py"},
+                                max_file_size=1000, use_relative_paths=True)
+
+    assert result["files"] == {"a.py": "# src/a.py\n", "sub/c.py": "# src/sub/c.py\n"}
+    # tok-a's 403 marks it exhausted; every API request then goes to tok-b without waiting
+    assert set(fake_github.tokens_used) == {"tok-b"}
+    assert sleeps == []
+    tokens = {t["token"]: t for t in result["stats"]["rate_limit"]["tokens"]}
+    assert tokens["...ok-a"]["remaining"] == 0
+    assert tokens["...ok-b"]["remaining"] == 4000 - len(fake_github.tokens_used)
+
+
+def test_truncated_tree_falls_back_to_contents_api(fake_github):
+    fake_github.truncated = True
+    result = crawl_github_files(
+        "https://github.com/o/r/tree/main/src",
+        include_patterns={"*.py"},
+        max_file_size=1000,
+        use_relative_paths=True,
+    )
+
+    assert result["stats"]["enumeration"] == "contents_api"
+    assert result["files"] == {"a.py": "# src/a.py\n", "sub/c.py": "# src/sub/c.py\n"}
+
+
+@pytest.mark.parametrize("truncated", [False, True])
+def test_raw_downloads_are_sniffed(fake_github, truncated):
+    fake_github.truncated = truncated
+    fake_github.raw_files = {"src/blob.py": b"\0\1\2", "src/wide.py": "x = 1\r\n".encode("utf-16")}
+    fake_github.tree += [{"path": path, "mode": "100644", "type": "blob", "size": 12} for path in fake_github.raw_files]
+    result = crawl_github_files(
+        "https://github.com/o/r/tree/main/src",
+        include_patterns={"*.py"},
+        max_file_size=1000,
+        use_relative_paths=True,
+        use_tarball=False,
+    )
+
+    assert result["stats"]["enumeration"] == ("contents_api" if truncated else "git_tree")
+    assert result["files"] == {"a.py": "# src/a.py\n", "sub/c.py": "# src/sub/c.py\n", "wide.py": "x = 1\n"}
+    assert result["stats"]["skipped_by_reason"] == {"binary": 1}
+
+
+def test_tarball_streams_only_matching_members(fake_github):
+    # src/sub/c.py is left out of the archive to exercise the single-file fallback
+    fake_github.tarball = make_tarball({
+        "README.md": b"# readme\n",
+        "src/a.py": b"print('a')\r\n",
+        "src/big.py": b"x" * 2000,
+        "src/blob.py": b"\0\1\2",
+        "src/notes.md": b"notes\n",
+    })
+    fake_github.tree.append({"path": "src/blob.py", "mode": "100644", "type": "blob", "size": 3})
+    result = crawl_github_files(
+        "https://github.com/o/r/tree/main/src",
+        include_patterns={"*.py"},
+        max_file_size=1000,
+        use_relative_paths=True,
+        use_tarball=True,
+    )
+
+    stats = result["stats"]
+    assert result["files"] == {"a.py": "print('a')\n", "sub/c.py": "# src/sub/c.py\n"}
+    assert stats["download_mode"] == "tarball"
+    assert stats["skipped_by_reason"] == {"binary": 1}
+    assert stats["tarball_fallback_count"] == 1
+    assert [url for url in fake_github.urls if "raw" in url] == [
+        f"{crawl_github.GITHUB_RAW_URL}/o/r/{COMMIT}/src/sub/c.py"
+    ]
+
+
+def test_interrupted_crawl_resumes_from_its_checkpoint(fake_github, monkeypatch, tmp_path):
+    names = [f"m{i}.py" for i in range(6)]
+    fake_github.tree = [{"path": name, "mode": "100644", "type": "blob", "size": 8} for name in names]
+    url = "https://github.com/o/r/tree/main"
+
+    # The first crawl dies after two files
+    crawl = iter_github_files(url, use_tarball=False, download_workers=1)
+    assert [next(crawl)[0], next(crawl)[0]] == names[:2]
+    crawl.close()
+
+    # The retry runs elsewhere (empty response cache): no enumeration, only the missing files
+    fresh_cache = ResponseCache(str(tmp_path / "other_http.sqlite"))
+    monkeypatch.setattr(crawl_github, "get_response_cache", lambda: fresh_cache)
+    fake_github.urls.clear()
+    result = crawl_github_files(url, use_tarball=False, download_workers=1, retry=True)
+
+    assert sorted(result["files"]) == names
+    assert fake_github.urls == [f"{crawl_github.GITHUB_RAW_URL}/o/r/{COMMIT}/{name}" for name in names[2:]]
+    # branches + commit + tree, and one download per restored file
+    assert result["stats"]["checkpoint"] == {"resumed": True, "restored_files": 2, "requests_saved": 5, "kept": False}
+
+    # A completed crawl leaves no checkpoint behind
+    again = crawl_github_files(url, use_tarball=False, download_workers=1)
+    assert again["stats"]["checkpoint"]["resumed"] is False
+
+
+def test_new_crawl_resumes_only_while_the_ref_points_at_the_checkpointed_commit(fake_github, monkeypatch, tmp_path):
+    names = [f"m{i}.py" for i in range(6)]
+    fake_github.tree = [{"path": name, "mode": "100644", "type": "blob", "size": 8} for name in names]
+    url = "https://github.com/o/r/tree/main"
+
+    def interrupt(run):
+        crawl = iter_github_files(url, use_tarball=False, download_workers=1)
+        assert [next(crawl)[0], next(crawl)[0]] == names[:2]
+        crawl.close()
+        # Later crawls run elsewhere (empty response cache)
+        fresh_cache = ResponseCache(str(tmp_path / f"http_{run}.sqlite"))
+        monkeypatch.setattr(crawl_github, "get_response_cache", lambda: fresh_cache)
+        fake_github.urls.clear()
+
+    # Same commit: the ref is resolved again, then the listing and delivered files are reused
+    interrupt(1)
+    result = crawl_github_files(url, use_tarball=False, download_workers=1)
+    assert sorted(result["files"]) == names
+    assert all("/git/trees/" not in u for u in fake_github.urls)
+    assert result["stats"]["commit_sha"] == COMMIT
+    # The tree listing and the two restored downloads
+    assert result["stats"]["checkpoint"] == {"resumed": True, "restored_files": 2, "requests_saved": 3, "kept": False}
+
+    # The branch moves after the crawl is interrupted: the new commit is crawled in full
+    interrupt(2)
+    moved = "d" * 40
+    fake_github.head = moved
+    result = crawl_github_files(url, use_tarball=False, download_workers=1)
+    assert result["stats"]["commit_sha"] == moved
+    assert result["stats"]["checkpoint"]["resumed"] is False
+    assert [u for u in fake_github.urls if "raw" in u] == [
+        f"{crawl_github.GITHUB_RAW_URL}/o/r/{moved}/{name}" for name in names
+    ]
+    # The stale checkpoint was dropped; the completed crawl left none behind either
+    assert crawl_github.get_checkpoint_store().stats() == {"checkpoints": 0, "files": 0}
+
+
+def test_checkpoint_files_never_outlive_their_checkpoint(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    url = "https://github.com/o/r"
+    first, second = store.open(url), store.open(url)
+    first.begin("main", "", COMMIT, {"tree": []}, 3)
+    first.add("a.py", "a")
+    first.flush()
+
+    # Another job of the same key completes and discards the checkpoint while the first still runs
+    second.discard()
+    first.add("b.py", "b")
+    first.flush()
+    assert store.stats() == {"checkpoints": 0, "files": 0}
+
+    # Nor are files added to a checkpoint another job began at a later commit
+    second.begin("main", "", "d" * 40, {"tree": []}, 3)
+    first.add("c.py", "c")
+    first.flush()
+    assert store.stats() == {"checkpoints": 1, "files": 0}
+
+    # Rows orphaned before this check are removed with expired checkpoints
+    store._connection().execute("INSERT INTO checkpoint_files VALUES ('gone', 'd.py', 'd')")
+    store._connection().commit()
+    store.open(url)
+    assert store.stats() == {"checkpoints": 1, "files": 0}
+
+
+def test_checkpoint_writes_delivered_files_in_batches(monkeypatch, tmp_path):
+    monkeypatch.setattr(crawl_checkpoint, "CHECKPOINT_FLUSH_FILES", 3)
+    monkeypatch.setattr(crawl_checkpoint, "CHECKPOINT_FLUSH_SECONDS", 3600)
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    checkpoint = store.open("https://github.com/o/r")
+    checkpoint.begin("main", "", COMMIT, {"tree": []}, 3)
+
+    checkpoint.add("a.py", "a")
+    checkpoint.add("b.py", "b")
+    assert store.stats() == {"checkpoints": 1, "files": 0}
+    checkpoint.add("c.py", "c")
+    assert store.stats() == {"checkpoints": 1, "files": 3}
+
+    # A completed crawl discards what was never written
+    checkpoint.add("d.py", "d")
+    checkpoint.discard()
+    checkpoint.flush()
+    assert store.stats() == {"checkpoints": 0, "files": 0}
+
+
+def test_request_budget_fetches_high_value_files_first(fake_github):
+    fake_github.tree = [
+        {"path": path, "mode": "100644", "type": "blob", "size": size}
+        for path, size in [("docs/guide.md", 4), ("src/app/models.py", 6), ("Dockerfile", 10),
+                           ("src/main.py", 7), (".github/workflows/ci.yml", 3), ("requirements.txt", 5)]
+    ]
+
+    # branches + commit + tree leave three downloads
+    result = crawl_github_files("https://github.com/o/r/tree/main", max_requests=6, download_workers=1)
+
+    assert list(result["files"]) == ["requirements.txt", "Dockerfile", ".github/workflows/ci.yml"]
+    assert result["stats"]["partial"] is True
+    coverage = result["stats"]["coverage"]
+    assert coverage["stopped_by"] == "requests"
+    assert (coverage["files_fetched"], coverage["files_selected"]) == (3, 6)
+    assert coverage["tiers"][0] == {"selected": 3, "fetched": 3}
+    assert coverage["unfetched"] == ["src/main.py", "src/app/models.py", "docs/guide.md"]
+
+
+def test_fetch_strategy_is_predicted_and_logged(fake_github, tmp_path):
+    result = crawl_github_files("https://github.com/o/r/tree/main/src", include_patterns={"*.py"},
+                                max_file_size=1000, use_relative_paths=True)
+
+    chosen = result["stats"]["fetch_strategy"]
+    # Two small files: raw downloads beat the whole-commit tarball, and no metadata call was needed
+    assert (chosen["strategy"], chosen["reason"]) == ("raw_files", "predicted")
+    assert chosen["predictions"]["raw_files"] < chosen["predictions"]["tarball"]
+    assert not any(url.endswith("/repos/o/r") for url in fake_github.urls)
+    with open(tmp_path / "fetch_strategy.jsonl") as f:
+        logged = [json.loads(line) for line in f]
+    assert [(r["repo"], r["strategy"], r["files"]) for r in logged] == [("o/r", "raw_files", 2)]
+    assert logged[0]["actual_seconds"] >= 0 and logged[0]["predicted_seconds"] == chosen["predicted_seconds"]
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+import os
+import pytest
+from utils.crawl_local_files import crawl_local_files, iter_local_files
+from utils.crawl_stream import prefetch
+from utils.crawl_manifest import blob_sha
+from utils.file_records import FileRecord, loaded
+from utils.cloud_analyzer import sample_files_for_llm
+
+
+def _write(root, relpath, content):
+    path = os.path.join(root, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _make_tree(root):
+    _write(root, "b.py", "print('b')\n")
+    _write(root, "a.py", "print('a')\n")
+    _write(root, "src/z.py", "import os\n")
+    _write(root, "src/m/y.js", "console.log('y')\n")
+    _write(root, "node_modules/dep/index.js", "module.exports = {}\n")
+    _write(root, "README.md", "# readme\n")
+
+
+def test_parallel_read_matches_sequential_and_is_ordered(tmp_path):
+    """Parallel reads return the same files, in the same sorted walk order, as a sequential crawl."""
+    _make_tree(str(tmp_path))
+    kwargs = dict(
+        include_patterns={"**/*.py", "**/*.js"},
+        exclude_patterns={"**/node_modules/**"},
+    )
+
+    sequential = crawl_local_files(str(tmp_path), max_workers=1, **kwargs)["files"]
+    parallel = crawl_local_files(str(tmp_path), max_workers=8, **kwargs)["files"]
+
+    assert list(parallel.items()) == list(sequential.items())
+    assert list(parallel) == ["a.py", "b.py", os.path.join("src", "z.py"), os.path.join("src", "m", "y.js")]
+
+
+
+def test_incremental_manifest_reports_changes(tmp_path):
+    """A second crawl with a manifest reuses unchanged files and reports changed/added/deleted ones."""
+    src = tmp_path / "src"
+    manifest_dir = str(tmp_path / "manifest")
+    _make_tree(str(src))
+
+    first = crawl_local_files(str(src), include_patterns={"**/*.py"}, manifest_dir=manifest_dir)
+    assert first["stats"]["incremental"] == {"reused": 0, "changed": 0, "added": 3, "deleted": 0}
+
+    _write(str(src), "a.py", "print('a changed')\n")
+    _write(str(src), "c.py", "print('c')\n")
+    os.remove(os.path.join(str(src), "b.py"))
+
+    second = crawl_local_files(str(src), include_patterns={"**/*.py"}, manifest_dir=manifest_dir)
+    assert second["stats"]["incremental"] == {"reused": 1, "changed": 1, "added": 1, "deleted": 1}
+    assert second["files"]["a.py"] == "print('a changed')\n"
+    assert second["files"] == crawl_local_files(str(src), include_patterns={"**/*.py"})["files"]
+
+
+@pytest.mark.parametrize("walk_workers", [1, 4])
+def test_excluded_directories_are_pruned_before_listing(tmp_path, monkeypatch, walk_workers):
+    """Directories excluded by .gitignore or exclude patterns are never scanned, by either walker."""
+    _make_tree(str(tmp_path))
+    _write(str(tmp_path), "build/out.py", "x = 1\n")
+    _write(str(tmp_path), ".gitignore", "build/\n")
+    for i in range(5):
+        _write(str(tmp_path), f"pkg{i}/sub/mod.py", f"x = {i}\n")
+
+    scanned = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scanned.append(path) or real_scandir(path))
+
+    files = crawl_local_files(
+        str(tmp_path), include_patterns={"**/*.py", "**/*.js"}, exclude_patterns={"**/node_modules/**"},
+        walk_workers=walk_workers,
+    )["files"]
+
+    assert list(files) == ["a.py", "b.py"] + [os.path.join(f"pkg{i}", "sub", "mod.py") for i in range(5)] + [
+        os.path.join("src", "z.py"), os.path.join("src", "m", "y.js")
+    ]
+    assert not any(os.path.basename(path) in ("build", "node_modules") for path in scanned)
+
+
+def test_binary_and_non_utf8_files_are_sniffed_and_counted(tmp_path):
+    """Files are classified from their first bytes and skips are reported by reason."""
+    root = str(tmp_path)
+    _write(root, "ok.py", "x = 1\r\ny = 2\n")
+    with open(os.path.join(root, "weights.py"), "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n\x00\x00")
+    with open(os.path.join(root, "latin1.py"), "wb") as f:
+        f.write("caf\xe9 = 1\n".encode("latin-1"))
+    with open(os.path.join(root, "utf16.py"), "wb") as f:
+        f.write("z = 'utf16'\n".encode("utf-16"))
+    _write(root, "big.py", "#" * 500)
+
+    result = crawl_local_files(root, include_patterns={"**/*.py"}, max_file_size=400)
+
+    assert result["files"] == {"ok.py": "x = 1\ny = 2\n", "utf16.py": "z = 'utf16'\n"}
+    assert result["stats"]["skipped_by_reason"] == {"binary": 1, "non_utf8": 1, "too_large": 1}
+
+
+def test_streamed_crawl_matches_collected_crawl(tmp_path):
+    """iter_local_files through prefetch yields the same records and stats as crawl_local_files."""
+    _make_tree(str(tmp_path))
+    kwargs = dict(include_patterns={"**/*.py", "**/*.js"}, exclude_patterns={"**/node_modules/**"})
+
+    collected = crawl_local_files(str(tmp_path), **kwargs)
+    stats = {}
+    streamed = list(prefetch(iter_local_files(str(tmp_path), stats=stats, **kwargs), max_items=2))
+
+    assert streamed == list(collected["files"].items())
+    assert stats == collected["stats"]
+
+
+def test_prefetch_reraises_producer_errors():
+    def records():
+        yield "a.py", "a"
+        raise ValueError("crawl failed")
+
+    stream = prefetch(records())
+    assert next(stream) == ("a.py", "a")
+    with pytest.raises(ValueError, match="crawl failed"):
+        next(stream)
+
+
+
+def test_git_index_mode_lists_tracked_and_untracked_files(tmp_path):
+    """Git index mode honours nested .gitignore files and reuses index blob SHAs for unmodified files."""
+    git = pytest.importorskip("git")
+    root = str(tmp_path)
+    _make_tree(root)
+    _write(root, "src/.gitignore", "generated/\n")
+    _write(root, "src/generated/out.py", "x = 1\n")
+    repo = git.Repo.init(root)
+    repo.index.add(["a.py", "b.py", "src/z.py", "src/.gitignore"])
+    repo.index.write()
+    _write(root, "b.py", "print('changed')\n")  # modified after staging
+    kwargs = dict(include_patterns={"**/*.py", "**/*.js"}, exclude_patterns={"**/node_modules/**"})
+
+    walked = crawl_local_files(root, **kwargs)
+    listed = crawl_local_files(root, use_git_index=True, **kwargs)
+
+    assert os.path.join("src", "generated", "out.py") in walked["files"]
+    assert list(listed["files"]) == [p for p in walked["files"] if "generated" not in p]
+    assert listed["files"] == {p: c for p, c in walked["files"].items() if "generated" not in p}
+    assert listed["stats"]["source"] == "git_index"
+    assert listed["stats"]["git_index"]["modified"] == 1
+    assert set(listed["content_hashes"]) == {"a.py", os.path.join("src", "z.py")}
+    assert listed["content_hashes"]["a.py"] == blob_sha(b"print('a')\n")
+
+
+def test_lazy_crawl_returns_unloaded_records(tmp_path):
+    """Lazy crawls hash files up front and read content only on access or while pinned."""
+    _make_tree(str(tmp_path))
+    kwargs = dict(include_patterns={"**/*.py", "**/*.js"}, exclude_patterns={"**/node_modules/**"})
+
+    eager = crawl_local_files(str(tmp_path), **kwargs)
+    lazy = crawl_local_files(str(tmp_path), lazy=True, **kwargs)
+
+    records = list(lazy["files"].values())
+    assert all(isinstance(record, FileRecord) and not record.is_loaded for record in records)
+    assert [tuple(record) for record in records] == list(eager["files"].items())
+    assert lazy["content_hashes"]["a.py"] == blob_sha(b"print('a')\n")
+
+    with loaded(records):
+        assert all(record.is_loaded for record in records)
+    assert not any(record.is_loaded for record in records)
+
+
+def test_llm_sample_is_picked_without_reading_files():
+    reads = []
+
+    def record(path):
+        return FileRecord(path, lambda: reads.append(path) or f"# {path}\n")
+
+    records = [record(f"src/m{i}.py") for i in range(20)] + [record("Dockerfile"), record("k8s/app.yaml")]
+    sample = sample_files_for_llm(records)
+
+    # Infrastructure and configuration files first, then the others in order
+    assert [item[0] for item in sample] == ["Dockerfile", "k8s/app.yaml"] + [f"src/m{i}.py" for i in range(8)]
+    assert reads == []
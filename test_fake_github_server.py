@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+import pytest
+import utils.crawl_github_files as crawl_github
+import utils.fetch_strategy as fetch_strategy
+import utils.github_rate_limit as github_rate_limit
+from utils.crawl_github_files import crawl_github_files
+from utils.crawl_checkpoint import CheckpointStore
+from utils.fake_github_server import FakeGitHubServer
+from utils.http_cache import ResponseCache
+
+FIXTURE = {
+    "README.md": "# fixture\n",
+    "Dockerfile": "FROM python:3.11\n",
+    "app/main.py": "print('hello')\n",
+    "app/util/helpers.py": "def helper():\n    return 1\n",
+}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    fixture_dir = tmp_path / "fixture"
+    for path, content in FIXTURE.items():
+        (fixture_dir / path).parent.mkdir(parents=True, exist_ok=True)
+        (fixture_dir / path).write_text(content)
+    with FakeGitHubServer(str(fixture_dir)) as server:
+        monkeypatch.setattr(crawl_github, "GITHUB_API_URL", server.api_url)
+        monkeypatch.setattr(crawl_github, "GITHUB_RAW_URL", server.raw_url)
+        cache = ResponseCache(str(tmp_path / "github_http.sqlite"))
+        monkeypatch.setattr(crawl_github, "get_response_cache", lambda: cache)
+        checkpoints = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+        monkeypatch.setattr(crawl_github, "get_checkpoint_store", lambda: checkpoints)
+        monkeypatch.setattr(fetch_strategy, "FETCH_STRATEGY_LOG", str(tmp_path / "fetch_strategy.jsonl"))
+        monkeypatch.setattr(github_rate_limit, "_states", {})
+        monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+        monkeypatch.delenv("GITHUB_TOKENS", raising=False)
+        yield server
+
+
+@pytest.mark.parametrize("use_tarball", [False, True])
+def test_crawl_against_the_fake_server(server, use_tarball):
+    result = crawl_github_files(server.repo_url, include_patterns={"*.py", "Dockerfile"}, use_tarball=use_tarball)
+
+    assert result["files"] == {path: FIXTURE[path] for path in ("Dockerfile", "app/main.py", "app/util/helpers.py")}
+    assert result["stats"]["commit_sha"] == server.commit_sha
+    assert result["stats"]["download_mode"] == ("tarball" if use_tarball else "raw_files")
+    assert server.counts.get("raw", 0) == (0 if use_tarball else 3)
+
+
+def test_contents_api_and_injected_throttling(server, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(crawl_github.time, "sleep", sleeps.append)
+    server.truncate_trees = True
+    server.inject_errors(1, status=429, path_prefix="/raw/")
+
+    result = crawl_github_files(f"{server.repo_url}/tree/main/app", include_patterns={"*.py"},
+                                use_relative_paths=True)
+
+    assert result["stats"]["enumeration"] == "contents_api"
+    assert result["files"] == {"main.py": FIXTURE["app/main.py"], "util/helpers.py": FIXTURE["app/util/helpers.py"]}
+    assert server.counts["throttled"] == 1 and sleeps == [1]
+
+
+def test_rate_limit_headers_and_etags(server):
+    first = crawl_github_files(server.repo_url, use_tarball=False)
+    # repo + commit + tree use API quota; raw downloads don't
+    assert first["stats"]["rate_limit"]["tokens"][0]["remaining"] == server.rate_limit - 3
+
+    # Revalidations answered 304 are free, and the SHA-pinned tree and files are cached
+    again = crawl_github_files(server.repo_url, use_tarball=False)
+    assert again["files"] == first["files"]
+    assert server.counts["not_modified"] == 2
+    assert again["stats"]["rate_limit"]["tokens"][0]["remaining"] == server.rate_limit - 3
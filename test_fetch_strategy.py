@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+from utils.fetch_strategy import predict_seconds, select_strategy
+
+
+def profile(**overrides):
+    base = {"size_kb": 200_000, "file_count": 40_000, "tree_bytes": 900_000_000,
+            "selected_files": 12, "selected_bytes": 60_000, "truncated": False, "mirror_exists": False}
+    return {**base, **overrides}
+
+
+def test_selection_follows_the_cost_model():
+    # A handful of files out of a big repository: download them singly
+    assert select_strategy(profile(), download_workers=8)[0] == "raw_files"
+    # Most of a small repository: one tarball
+    assert select_strategy(profile(selected_files=3000, selected_bytes=20_000_000, file_count=3200,
+                                   tree_bytes=24_000_000, size_kb=30_000), download_workers=8)[0] == "tarball"
+    # Most of a big repository already mirrored locally: fetch the new commits
+    assert select_strategy(profile(selected_files=30_000, selected_bytes=700_000_000, mirror_exists=True),
+                           download_workers=8)[0] == "clone"
+
+
+def test_truncated_listing_can_only_be_cloned():
+    strategy, predictions = select_strategy(profile(truncated=True, selected_files=None, tree_bytes=None))
+    assert strategy == "clone"
+    assert set(predictions) == {"clone"}
+    # Without the repository size there is nothing to predict
+    assert select_strategy(profile(truncated=True, size_kb=None))[0] is None
+    assert predict_seconds("clone", profile(size_kb=None)) is None
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import fnmatch
+import itertools
+from utils.file_patterns import compile_patterns
+
+INCLUDE_PATTERNS = [
+    "**/*.py", "**/*.js", "**/*.min.js", "**/Dockerfile", "**/docker-compose.yml",
+    "*.md", "Makefile", "src/*", "**/src/**/*.java", "*.[ch]", "**/config/*.*",
+]
+EXCLUDE_PATTERNS = [
+    "**/node_modules/**", "**/.git/**", "**/*.min.js", "**/.DS_Store", "**/tests/**",
+    "build", "docs/*", "*.log",
+]
+PATHS = [
+    "main.py", "pkg/mod.py", "Dockerfile", "deploy/Dockerfile", "deploy/Dockerfile.prod",
+    "README.md", "docs/guide.md", "Makefile", "tools/Makefile", "src/app.ts", "src/a/b.ts",
+    "lib/src/x/Y.java", "src/Y.java", "c/x.c", "h.h", "web/app.min.js", "web/app.js",
+    "node_modules/dep/index.js", "a/node_modules/dep/index.js", ".DS_Store", "x/.DS_Store",
+    "tests/test_a.py", "pkg/tests/test_b.py", "build", "out/build", "debug.log", "config/app.yml",
+    "docker-compose.yml", "svc/docker-compose.yml", "[literal]/x.py",
+]
+
+
+def legacy_local_include(relpath, filename, patterns):
+    return any(
+        fnmatch.fnmatch(relpath, p) or fnmatch.fnmatch(filename, p) or
+        (p.startswith("**/") and fnmatch.fnmatch(relpath, p[3:])) or
+        (p.startswith("*.") and filename.endswith(p[1:])) or
+        (p.endswith("/*") and relpath.startswith(p[:-1]))
+        for p in patterns
+    )
+
+
+def legacy_local_exclude_file(relpath, patterns):
+    return any(
+        fnmatch.fnmatch(relpath, p) or (p.startswith("**/") and fnmatch.fnmatch(relpath, p[3:]))
+        for p in patterns
+    )
+
+
+def legacy_name_and_path(relpath, name, patterns):
+    # crawl_local_files directory excludes and crawl_github_files include/exclude checks
+    return any(
+        fnmatch.fnmatch(relpath, p) or fnmatch.fnmatch(name, p) or
+        (p.startswith("**/") and fnmatch.fnmatch(relpath, p[3:]))
+        for p in patterns
+    )
+
+
+def test_compiled_matchers_agree_with_fnmatch_loops():
+    include_local = compile_patterns(INCLUDE_PATTERNS, literal_affixes=True)
+    include_github = compile_patterns(INCLUDE_PATTERNS)
+    exclude_files = compile_patterns(EXCLUDE_PATTERNS, match_basename=False)
+    exclude_named = compile_patterns(EXCLUDE_PATTERNS)
+
+    for path in PATHS:
+        name = path.rsplit("/", 1)[-1]
+        assert include_local.matches(path, name) == legacy_local_include(path, name, INCLUDE_PATTERNS), path
+        assert include_github.matches(path, name) == legacy_name_and_path(path, name, INCLUDE_PATTERNS), path
+        assert exclude_files.matches(path, name) == legacy_local_exclude_file(path, EXCLUDE_PATTERNS), path
+        assert exclude_named.matches(path, name) == legacy_name_and_path(path, name, EXCLUDE_PATTERNS), path
+
+
+def test_compiled_matchers_are_cached_by_pattern_set():
+    first = compile_patterns(["**/*.py", "**/*.js"])
+    second = compile_patterns({"**/*.js", "**/*.py"})
+    assert first is second
+    assert compile_patterns(["**/*.py", "**/*.js"], match_basename=False) is not first
+
+
+def test_single_pattern_combinations():
+    # Every pattern on its own, to catch interactions hidden by the union of a full set
+    for pattern, path in itertools.product(INCLUDE_PATTERNS + EXCLUDE_PATTERNS, PATHS):
+        name = path.rsplit("/", 1)[-1]
+        assert compile_patterns([pattern]).matches(path, name) == legacy_name_and_path(path, name, [pattern]), (pattern, path)
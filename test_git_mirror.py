@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import os
+import git
+import pytest
+import utils.crawl_github_files as crawl_github
+import utils.fetch_strategy as fetch_strategy
+from utils.crawl_github_files import crawl_github_files
+from utils.git_mirror import MirrorCache
+
+
+def make_origin(path, files):
+    repo = git.Repo.init(path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    commit_files(repo, files)
+    return repo
+
+
+def commit_files(repo, files):
+    for name, content in files.items():
+        full = os.path.join(repo.working_tree_dir, name)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "wb") as f:
+            f.write(content)
+    repo.index.add(list(files))
+    repo.index.commit("update")
+
+
+@pytest.fixture
+def mirror_root(tmp_path, monkeypatch):
+    root = str(tmp_path / "mirrors")
+    monkeypatch.setattr(crawl_github, "get_mirror_cache", lambda: MirrorCache(root))
+    monkeypatch.setattr(fetch_strategy, "FETCH_STRATEGY_LOG", str(tmp_path / "fetch_strategy.jsonl"))
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("GITHUB_TOKENS", raising=False)
+    return root
+
+
+def test_recrawl_fetches_into_the_existing_mirror(tmp_path, mirror_root):
+    origin = make_origin(str(tmp_path / "origin"), {"app.py": b"print(1)\n", "img.png": b"\x89PNG\0\0", "docs/a.md": b"# a\n"})
+    url = "file://" + str(tmp_path / "origin") + "/.git"
+
+    first = crawl_github_files(url, include_patterns={"*.py", "*.png"})
+    assert first["files"] == {"app.py": "print(1)\n"}
+    assert first["stats"]["mirror"]["action"] == "cloned"
+    assert first["stats"]["skipped_by_reason"] == {"binary": 1}
+
+    commit_files(origin, {"src/new.py": b"x = 2\n"})
+    second = crawl_github_files(url, include_patterns={"*.py"})
+    assert second["stats"]["mirror"]["action"] == "fetched"
+    assert second["files"] == {"app.py": "print(1)\n", "src/new.py": "x = 2\n"}
+    assert second["stats"]["commit_sha"] == origin.head.commit.hexsha
+    # Only the bare mirror is kept: no working tree is checked out
+    mirror_path = second["stats"]["mirror"]["path"]
+    assert [name for name in os.listdir(mirror_root) if not name.endswith(".lock")] == [os.path.basename(mirror_path)]
+    assert git.Repo(mirror_path).bare
+
+
+def test_least_recently_used_mirror_is_evicted(tmp_path):
+    urls = []
+    for name in ("one", "two"):
+        make_origin(str(tmp_path / name), {"f.txt": name.encode() * 1000})
+        urls.append("file://" + str(tmp_path / name) + "/.git")
+    cache = MirrorCache(str(tmp_path / "mirrors"), quota_bytes=0)
+
+    with cache.open(urls[0]) as mirror:
+        first_path = mirror.path
+    with cache.open(urls[1]) as mirror:
+        second_path = mirror.path
+
+    assert not os.path.exists(first_path)
+    assert os.path.exists(second_path)
+    # The evicted mirror's lock file goes with it
+    assert sorted(os.listdir(tmp_path / "mirrors")) == sorted(
+        os.path.basename(path) for path in (second_path, second_path + ".lock"))
+
+
+def test_mirror_copies_branches_and_tags_only(tmp_path):
+    origin = make_origin(str(tmp_path / "origin"), {"a.py": b"a = 1\n"})
+    origin.create_tag("v1")
+    # Refs outside branches and tags, like GitHub's refs/pull/*, stay on the remote
+    origin.git.update_ref("refs/pull/1/head", origin.head.commit.hexsha)
+    url = "file://" + str(tmp_path / "origin") + "/.git"
+    cache = MirrorCache(str(tmp_path / "mirrors"))
+
+    with cache.open(url) as mirror:
+        pass
+    commit_files(origin, {"b.py": b"b = 2\n"})
+    origin.git.update_ref("refs/pull/2/head", origin.head.commit.hexsha)
+    with cache.open(url) as mirror:
+        refs = git.Repo(mirror.path).git.for_each_ref("--format=%(refname)").split()
+        assert mirror.resolve() == origin.head.commit.hexsha
+
+    assert sorted(refs) == sorted([f"refs/heads/{origin.active_branch.name}", "refs/tags/v1"])
+
+
+def test_mirror_stays_locked_from_its_fetch_until_it_is_read(tmp_path, monkeypatch):
+    make_origin(str(tmp_path / "origin"), {"f.txt": b"x" * 1000})
+    url = "file://" + str(tmp_path / "origin") + "/.git"
+    root = str(tmp_path / "mirrors")
+    cache = MirrorCache(root, quota_bytes=0)
+    other_job = MirrorCache(root, quota_bytes=0)
+    evicted = []
+
+    # Another job evicts right after this one's fetch, while this one evicts in turn
+    def evict(keep=None):
+        evicted.extend(other_job.evict())
+        return []
+    monkeypatch.setattr(cache, "evict", evict)
+
+    with cache.open(url) as mirror:
+        assert evicted == []
+        assert mirror.list_files(mirror.resolve())
+    assert other_job.evict() == [mirror.path]
+
+
+def test_filtered_clone_fetches_only_matching_blobs(tmp_path, mirror_root):
+    origin = make_origin(str(tmp_path / "origin"), {
+        "app.py": b"print(1)\n",
+        "lib/util.py": b"x = 1\n",
+        "assets/video.bin": b"\0" * 100_000,
+        "README.md": b"# readme\n",
+    })
+    origin.git.config("uploadpack.allowFilter", "true")
+    origin.git.config("uploadpack.allowAnySHA1InWant", "true")
+    url = "file://" + str(tmp_path / "origin") + "/.git"
+
+    result = crawl_github_files(url, include_patterns={"*.py"}, filtered_clone=True)
+
+    assert result["files"] == {"app.py": "print(1)\n", "lib/util.py": "x = 1\n"}
+    assert result["stats"]["mirror"]["filtered"] is True
+    assert result["stats"]["mirror"]["blobs_fetched"] == 2
+    mirror = git.Repo(result["stats"]["mirror"]["path"])
+    missing = [line for line in mirror.git.rev_list("--objects", "--missing=print", "HEAD").splitlines()
+               if line.startswith("?")]
+    # The asset and README blobs were never downloaded
+    assert len(missing) == 2
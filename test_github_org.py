@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+import pytest
+import utils.crawl_github_files as crawl_github
+import utils.github_org as github_org
+import utils.github_rate_limit as github_rate_limit
+from utils.fake_github_server import FakeGitHubServer
+from utils.github_org import default_branch_shas, list_org_repositories, prioritize_repositories
+from utils.http_cache import ResponseCache
+
+OTHER_REPOS = [
+    {"name": "old-service", "pushed_at": "2023-01-05T10:00:00Z"},
+    {"name": "fork-of-lib", "pushed_at": "2099-01-01T00:00:00Z", "fork": True},
+    {"name": "legacy", "pushed_at": "2024-06-01T08:30:00Z", "archived": True},
+    {"name": "recent-api", "pushed_at": "2025-03-02T12:00:00Z"},
+]
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    (tmp_path / "fixture").mkdir()
+    (tmp_path / "fixture" / "main.py").write_text("print('hello')\n")
+    with FakeGitHubServer(str(tmp_path / "fixture"), other_repos=OTHER_REPOS) as server:
+        monkeypatch.setattr(crawl_github, "GITHUB_API_URL", server.api_url)
+        cache = ResponseCache(str(tmp_path / "github_http.sqlite"))
+        monkeypatch.setattr(github_org, "get_response_cache", lambda: cache)
+        monkeypatch.setattr(github_rate_limit, "_states", {})
+        monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+        monkeypatch.delenv("GITHUB_TOKENS", raising=False)
+        yield server
+
+
+def test_org_listing_is_paged_and_revalidated(server):
+    repos = list(list_org_repositories(server.owner, page_size=2))
+
+    assert [repo["full_name"] for repo in repos] == [
+        "octo/fixture", "octo/old-service", "octo/fork-of-lib", "octo/legacy", "octo/recent-api"
+    ]
+    assert server.counts["org_repos"] == 3
+
+    # A rescan revalidates every page from the cache
+    assert len(list(list_org_repositories(server.owner, page_size=2))) == 5
+    assert server.counts["not_modified"] == 3
+
+
+def test_scan_order_and_default_branch_heads(server):
+    repos = prioritize_repositories(list_org_repositories(server.owner))
+
+    # Forks and archived repositories are left out; the rest go most recently pushed first
+    assert [repo["name"] for repo in repos] == ["fixture", "recent-api", "old-service"]
+    assert [repo["name"] for repo in prioritize_repositories(repos, limit=2)] == ["fixture", "recent-api"]
+
+    shas = default_branch_shas(repos)
+    # Only the served repository has commits; the listing-only ones can't be resolved
+    assert shas == {"octo/fixture": server.commit_sha, "octo/recent-api": None, "octo/old-service": None}
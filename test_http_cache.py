@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+from utils.http_cache import ResponseCache, cache_key
+
+
+class Body:
+    def __init__(self, url, content, etag=None):
+        self.url = url
+        self.content = content
+        self.encoding = "utf-8"
+        self.headers = {"ETag": etag} if etag else {}
+
+
+def test_lru_eviction_by_size_keeps_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=10)
+    keys = [cache_key(f"https://api.github.com/{name}") for name in "abc"]
+    cache.put(keys[0], Body("a", b"aaaa", '"a"'))
+    cache.put(keys[1], Body("b", b"bbbb"))
+    cache.hit(keys[0])  # a is now more recently used than b
+    cache.put(keys[2], Body("c", b"cccc"))
+
+    assert cache.get(keys[1]) == (None, {})
+    response, validators = cache.get(keys[0])
+    assert response.text == "aaaa"
+    assert cache.conditional_headers(validators) == {"If-None-Match": '"a"'}
+    stats = cache.stats()
+    assert (stats["entries"], stats["size_bytes"], stats["evicted"]) == (2, 8, 1)
+
+
+def test_key_depends_on_token():
+    url = "https://api.github.com/repos/o/r"
+    assert cache_key(url, headers={"Authorization": "token a"}) != cache_key(url, headers={"Authorization": "token b"})
+
+
+def test_stores_and_hits_do_not_scan_or_commit_each(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=1_000_000)
+    statements = []
+    cache._connection().set_trace_callback(statements.append)
+    keys = [cache_key(f"https://raw.githubusercontent.com/o/r/sha/f{i}.py") for i in range(300)]
+
+    for key in keys:
+        cache.put(key, Body("f", b"x" * 100))
+    # One sum to start the running total, then one per SIZE_RECHECK_PUTS stores
+    assert sum("SUM(size)" in statement for statement in statements) == 3
+
+    statements.clear()
+    for key in keys[:50]:
+        cache.hit(key)
+    assert not any(statement.startswith("UPDATE") for statement in statements)
+    cache.flush()
+    assert sum(statement.startswith("UPDATE") for statement in statements) == 50
+    assert sum(statement == "COMMIT" for statement in statements) == 1
+
+
+def test_running_total_still_evicts_at_the_quota(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=1000)
+    for i in range(30):
+        cache.put(cache_key(f"https://api.github.com/{i}"), Body(str(i), b"x" * 100))
+    stats = cache.stats()
+    assert (stats["entries"], stats["size_bytes"], stats["evicted"]) == (10, 1000, 20)
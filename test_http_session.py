@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+import http.server
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from utils.http_session import PooledHTTPAdapter, connection_stats, connection_stats_delta, http_get
+
+
+class OkHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_connections_are_reused_across_threads():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+    try:
+        before = connection_stats()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            statuses = list(executor.map(lambda i: http_get(url + str(i)).status_code, range(40)))
+        delta = connection_stats_delta(before)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert statuses == [200] * 40
+    assert delta["requests"] == 40
+    # At most one connection per worker thread was opened
+    assert delta["new_connections"] <= 4
+    assert delta["reused_connections"] == 40 - delta["new_connections"]
+
+
+def test_evicted_pools_keep_their_counts():
+    adapter = PooledHTTPAdapter(pool_connections=1)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    session = requests.Session()
+    session.mount("http://", adapter)
+    try:
+        # Two hosts for the same server: each request evicts the other host's pool
+        for host in ("127.0.0.1", "localhost", "127.0.0.1"):
+            assert session.get(f"http://{host}:{server.server_port}/").status_code == 200
+        session.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    counts = adapter.connection_counts()
+    assert counts["127.0.0.1"]["requests"] == 2
+    assert counts["localhost"]["requests"] == 1
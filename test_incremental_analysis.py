@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+import pytest
+import utils.crawl_github_files as crawl_github
+import utils.fetch_strategy as fetch_strategy
+import utils.github_rate_limit as github_rate_limit
+from utils.crawl_checkpoint import CheckpointStore
+from utils.fake_github_server import FakeGitHubServer
+from utils.file_findings import aggregate_findings, scan_file_findings
+from utils.http_cache import ResponseCache
+from utils.incremental_analysis import apply_changes, push_changes, rebuild_report
+
+SETTINGS = {"include_patterns": ["*.py", "Dockerfile"], "exclude_patterns": ["**/.git/**"],
+            "max_file_size": 100000, "use_llm": False}
+
+BEFORE = {
+    "README.md": "# fixture\n",
+    "Dockerfile": "FROM python:3.11\n",
+    "app/main.py": "print('hello')\n",
+    "app/util/helpers.py": "def helper():\n    return 1\n",
+}
+AFTER = {
+    "README.md": "# fixture, now with health checks\n",
+    "Dockerfile": "FROM python:3.11\n",
+    "app/main.py": "import os\nimport logging\nlogging.info(os.getenv('GREETING'))\n",
+    "app/health.py": "@app.route('/health')\ndef health():\n    return 'ok'\n",
+}
+
+PUSH = {
+    "ref": "refs/heads/main",
+    "forced": False,
+    "commits": [
+        {"added": ["scratch.py"], "modified": ["app/main.py"], "removed": []},
+        {"added": ["app/health.py"], "modified": ["README.md"], "removed": ["app/util/helpers.py", "scratch.py"]},
+    ],
+}
+
+
+def included(files):
+    return {path: content for path, content in files.items() if path.endswith(".py") or path == "Dockerfile"}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    fixture_dir = tmp_path / "fixture"
+    for path, content in AFTER.items():
+        (fixture_dir / path).parent.mkdir(parents=True, exist_ok=True)
+        (fixture_dir / path).write_text(content)
+    with FakeGitHubServer(str(fixture_dir)) as server:
+        monkeypatch.setattr(crawl_github, "GITHUB_API_URL", server.api_url)
+        monkeypatch.setattr(crawl_github, "GITHUB_RAW_URL", server.raw_url)
+        cache = ResponseCache(str(tmp_path / "github_http.sqlite"))
+        monkeypatch.setattr(crawl_github, "get_response_cache", lambda: cache)
+        checkpoints = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+        monkeypatch.setattr(crawl_github, "get_checkpoint_store", lambda: checkpoints)
+        monkeypatch.setattr(fetch_strategy, "FETCH_STRATEGY_LOG", str(tmp_path / "fetch_strategy.jsonl"))
+        monkeypatch.setattr(github_rate_limit, "_states", {})
+        monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+        monkeypatch.delenv("GITHUB_TOKENS", raising=False)
+        yield server
+
+
+def test_push_changes_follow_the_commits_in_order():
+    # scratch.py came and went; the push as a whole only removes it
+    assert push_changes(PUSH) == {"changed": {"app/main.py", "app/health.py", "README.md"},
+                                  "removed": {"app/util/helpers.py", "scratch.py"}}
+    # Forced pushes and truncated commit lists need the compare API
+    assert push_changes({**PUSH, "forced": True}) is None
+    assert push_changes({**PUSH, "commits": PUSH["commits"] * 10}) is None
+
+
+def test_push_updates_findings_to_those_of_a_full_scan(server):
+    base = {path: scan_file_findings(path, content) for path, content in included(BEFORE).items()}
+
+    findings, stats = apply_changes(server.repo_url, server.commit_sha, base, push_changes(PUSH), SETTINGS)
+
+    assert findings == {path: scan_file_findings(path, content) for path, content in included(AFTER).items()}
+    # Only the changed files that pass the patterns were downloaded
+    assert server.counts["raw"] == 2
+    assert stats["commit_sha"] == server.commit_sha
+
+    previous = {"technology_stack": {"files": list(included(BEFORE))}}
+    report = rebuild_report(previous, findings, use_llm=False, incremental={"after": server.commit_sha})
+    assert report["technology_stack"]["files"] == ["Dockerfile", "app/main.py", "app/health.py"]
+    assert report["environment_variables"]["variables"] == aggregate_findings(findings)["env_vars_analysis"]["variables"]
+    assert report["incremental"] == {"after": server.commit_sha}
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import os
+import git
+from utils.repo_revision import resolve_revision
+from utils.analysis_cache import analysis_cache_key
+
+
+def make_repo(path):
+    repo = git.Repo.init(path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "test")
+        config.set_value("user", "email", "test@example.com")
+    with open(os.path.join(path, "app.py"), "w") as f:
+        f.write("print(1)\n")
+    repo.index.add(["app.py"])
+    repo.index.commit("init")
+    return repo
+
+
+def test_local_repo_resolves_to_head_only_when_clean(tmp_path):
+    repo = make_repo(str(tmp_path))
+    assert resolve_revision(local_dir=str(tmp_path)) == repo.head.commit.hexsha
+
+    with open(tmp_path / "new.py", "w") as f:
+        f.write("x = 1\n")
+    assert resolve_revision(local_dir=str(tmp_path)) is None
+
+
+def test_clone_url_resolves_with_ls_remote(tmp_path):
+    repo = make_repo(str(tmp_path / "origin"))
+    url = "file://" + str(tmp_path / "origin") + "/.git"
+    assert resolve_revision(repo_url=url) == repo.head.commit.hexsha
+    assert resolve_revision(repo_url="file://" + str(tmp_path / "missing") + "/.git") is None
+
+
+def test_github_token_is_passed_through_the_environment(monkeypatch):
+    calls = []
+
+    def ls_remote(url, *args, **kwargs):
+        calls.append((url, args, kwargs))
+        return "a" * 40 + "\tHEAD\n"
+    monkeypatch.setattr(git.Git, "ls_remote", lambda self, *args, **kwargs: ls_remote(*args, **kwargs))
+
+    assert resolve_revision(repo_url="https://github.com/o/r", token="tok-secret") == "a" * 40
+    (url, args, kwargs), = calls
+    # Nothing on the command line (process list, GitCommandError messages) carries the token
+    assert url == "https://github.com/o/r.git"
+    assert "tok-secret" not in " ".join(args)
+    assert kwargs["env"]["GIT_CONFIG_KEY_0"] == "http.https://github.com/.extraheader"
+
+
+def test_cache_key_covers_commit_and_patterns():
+    base = dict(repo_url="https://github.com/o/r", include_patterns=["*.py", "*.md"], use_llm=False)
+    key = analysis_cache_key("a" * 40, **base)
+    assert key == analysis_cache_key("a" * 40, **{**base, "include_patterns": ["*.md", "*.py"]})
+    assert key != analysis_cache_key("b" * 40, **base)
+    assert key != analysis_cache_key("a" * 40, **{**base, "include_patterns": ["*.py"]})
+    assert analysis_cache_key(None, **base) is None
+
+
+def test_local_directories_are_keyed_only_when_listed_from_the_git_index(tmp_path):
+    local = dict(local_dir=str(tmp_path), include_patterns=["*.py"], use_llm=False)
+    # A walk also reads ignored files, which the commit doesn't pin
+    assert analysis_cache_key("a" * 40, **local) is None
+    assert analysis_cache_key("a" * 40, **local, use_git_index=True) is not None
+    # Repository URLs don't depend on it
+    remote = dict(repo_url="https://github.com/o/r", use_llm=False)
+    assert analysis_cache_key("a" * 40, **remote) == analysis_cache_key("a" * 40, **remote, use_git_index=True)
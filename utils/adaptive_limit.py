@@ -0,0 +1,71 @@
+import threading
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that backs off when the server pushes back (AIMD).
+
+    Used as a context manager around each request: at most `limit` blocks run
+    at once. throttled() halves the limit (multiplicative decrease) when a
+    request is rate limited; succeeded() raises it by one after a full
+    window of successful requests (additive increase) until max_limit is
+    reached again. Threads already running above a lowered limit finish
+    normally; new ones wait until the number in flight drops below it.
+    """
+
+    def __init__(self, max_limit, min_limit=1):
+        self.max_limit = max(int(max_limit), 1)
+        self.min_limit = max(min(int(min_limit), self.max_limit), 1)
+        self.limit = self.max_limit
+        self.lowest_limit = self.max_limit
+        self.throttle_events = 0
+        self._in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def throttled(self):
+        """Record a rate-limited response: halve the limit."""
+        with self._cond:
+            self.throttle_events += 1
+            self._successes = 0
+            self.limit = max(self.limit // 2, self.min_limit)
+            self.lowest_limit = min(self.lowest_limit, self.limit)
+
+    def succeeded(self):
+        """Record a successful response: grow the limit by one per `limit` successes."""
+        with self._cond:
+            if self.limit >= self.max_limit:
+                return
+            self._successes += 1
+            if self._successes >= self.limit:
+                self._successes = 0
+                self.limit += 1
+                self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_limit": self.max_limit,
+                "limit": self.limit,
+                "lowest_limit": self.lowest_limit,
+                "throttle_events": self.throttle_events,
+            }
@@ -0,0 +1,45 @@
+import os
+import json
+import hashlib
+from utils.cloud_analyzer import RULESET_VERSION
+
+
+def analysis_cache_key(commit_sha, repo_url=None, local_dir=None, include_patterns=None,
+                       exclude_patterns=None, max_file_size=None, use_llm=True, use_git_index=False):
+    """
+    Key identifying the result of analyzing one commit with given settings.
+
+    Two analyses with the same key read the same files and apply the same rules,
+    so the stored report of one can be returned for the other. The key covers the
+    source, the commit, the effective include/exclude patterns and size limit,
+    how a local directory is listed, RULESET_VERSION and, when the LLM is used,
+    its model settings.
+
+    A local directory is only pinned by its commit when it is listed from the git
+    index: walking it also reads ignored files (e.g. through .git/info/exclude or
+    nested .gitignore files the walker doesn't apply) that a clean HEAD says
+    nothing about, so walked directories get no key.
+
+    Returns:
+        str: Hex key, or None without a commit SHA (the content isn't pinned)
+    """
+    if not commit_sha:
+        return None
+    if not repo_url and not use_git_index:
+        return None
+    llm = None
+    if use_llm:
+        # Imported here: the LLM client is only needed when the LLM step runs
+        from utils.call_llm import llm_settings
+        llm = llm_settings()
+    parts = {
+        "source": repo_url.rstrip("/") if repo_url else os.path.abspath(local_dir),
+        "commit": commit_sha,
+        "include": sorted(include_patterns or []),
+        "exclude": sorted(exclude_patterns or []),
+        "max_file_size": max_file_size,
+        "git_index": None if repo_url else bool(use_git_index),
+        "ruleset": RULESET_VERSION,
+        "llm": llm,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
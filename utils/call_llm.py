@@ -25,6 +25,19 @@ logger.addHandler(file_handler)
 # Simple cache configuration
 cache_file = "llm_cache.json"
 
+# Model settings of the active call_llm (part of the analysis result cache key)
+LLM_MODEL = "o1"
+LLM_REASONING_EFFORT = "medium"
+
+
+def llm_settings():
+    """Settings that change the LLM's answers, for keying cached analysis results."""
+    return {
+        "model": LLM_MODEL,
+        "reasoning_effort": LLM_REASONING_EFFORT,
+        "base_url": os.environ.get("OPENAI_URL", "http://localhost:1234/v1"),
+    }
+
 
 # # By default, we Google Gemini 2.5 pro, as it shows great performance for code understanding
 # def call_llm(prompt: str, use_cache: bool = True) -> str:
@@ -130,9 +143,9 @@ def call_llm(prompt, use_cache: bool = True):
     
     client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"), base_url=os.environ.get("OPENAI_URL", "http://localhost:1234/v1"))
     r = client.chat.completions.create(
-        model="o1",
+        model=LLM_MODEL,
         messages=[{"role": "user", "content": prompt}],
-        reasoning_effort="medium",
+        reasoning_effort=LLM_REASONING_EFFORT,
         store=False
     )
     return r.choices[0].message.content
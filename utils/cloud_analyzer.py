@@ -1,6 +1,22 @@
 import os
 import re
 import json
+import threading
+from contextlib import contextmanager
+from utils.content_dedup import ContentIndex
+
+# Version of the detection rules and scoring below. Bump it whenever a change would
+# alter the report for the same files, so cached analyses of a commit are recomputed.
+RULESET_VERSION = 2
+
+# Paths (regexes) of the files that say most about cloud readiness: containers, dependency
+# manifests, entry points, IaC and configuration. The LLM sees these first, and budgeted
+# crawls fetch them first (see utils.file_priority).
+IMPORTANT_FILE_PATTERNS = [
+    r'Dockerfile', r'docker-compose', r'requirements.txt', r'package.json',
+    r'app.py', r'server.js', r'main.py', r'index.js', r'terraform', 
+    r'cloudformation', r'kubernetes', r'k8s', r'helm', r'config'
+]
 
 # Add a helper max score map for the scores
 max_score_map = {
@@ -20,6 +36,47 @@ max_score_map = {
     "infrastructure_as_code": 5
 }
 
+# Content index used by the analyzers on this thread (see dedupe_scans)
+_scan_state = threading.local()
+
+@contextmanager
+def dedupe_scans(content_index, files=None):
+    """
+    Scan each unique blob once within this block.
+
+    Analyzer calls made inside the block look up content regex scans of
+    duplicated files in the given utils.content_dedup.ContentIndex, so every
+    copy of a blob gets the result of a single scan. Per-path results (file
+    lists, counts) are unchanged.
+
+    Args:
+        content_index: ContentIndex the files were added to
+        files: Files about to be scanned; their loaded FileRecords are registered
+               for the duration of the block (see utils.file_records.loaded)
+    """
+    previous = getattr(_scan_state, "index", None)
+    _scan_state.index = content_index
+    tracked = content_index.track(files or [])
+    try:
+        yield content_index
+    finally:
+        content_index.untrack(tracked)
+        _scan_state.index = previous
+
+def _scan_findall(pattern, content, flags=0):
+    """re.findall on file content, memoized per blob inside dedupe_scans"""
+    index = getattr(_scan_state, "index", None)
+    if index is None:
+        return re.findall(pattern, content, flags)
+    return index.memoized(re.findall, pattern, content, flags)
+
+def _scan_search(pattern, content, flags=0):
+    """re.search on file content, memoized per blob inside dedupe_scans"""
+    index = getattr(_scan_state, "index", None)
+    if index is None:
+        return re.search(pattern, content, flags)
+    return index.memoized(re.search, pattern, content, flags)
+
 def detect_language_frameworks(files_data):
     """Detect programming languages and frameworks used in the codebase."""
     languages = {}
@@ -151,7 +208,7 @@ def detect_language_frameworks(files_data):
                     
                     # For content-based patterns (ignoring binary files and very large files)
                     if isinstance(content, str) and len(content) < 1000000:  # Skip content check for large files
-                        if re.search(pattern, content, re.IGNORECASE):
+                        if _scan_search(pattern, content, re.IGNORECASE):
                             results[category_name][tech] = results[category_name].get(tech, 0) + 1
     
     return results
@@ -193,7 +250,7 @@ def check_hardcoded_secrets(files_data):
             continue
             
         for pattern in secret_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = _scan_findall(pattern, content, re.IGNORECASE)
             if matches:
                 results['secrets_count'] += len(matches)
                 results['files_with_secrets'].append(filepath)
@@ -201,19 +258,48 @@ def check_hardcoded_secrets(files_data):
     
     return results
 
+# Content patterns of the message queues analyze_architecture looks for
+ARCHITECTURE_CONTENT_PATTERNS = {
+    'kafka': r'KafkaConsumer',
+    'rabbitmq': r'amqp',
+    'sqs': r'SQS',
+}
+
+def architecture_mentions(files_data):
+    """Names of the ARCHITECTURE_CONTENT_PATTERNS found in any file's content."""
+    return {
+        name for name, pattern in ARCHITECTURE_CONTENT_PATTERNS.items()
+        # One file at a time instead of searching str() of every file's content at once
+        if any(isinstance(content, str) and re.search(pattern, content) for content in (item[1] for item in files_data))
+    }
+
 def analyze_architecture(file_analysis):
-    """Analyze the architecture based on file analysis results."""
+    """
+    Analyze the architecture based on file analysis results.
+
+    Content patterns are searched in file_analysis['files'] unless
+    file_analysis['content_mentions'] already lists the ones found (see
+    architecture_mentions), so the architecture can be recomputed from
+    stored per-file findings without the file contents.
+    """
     languages = file_analysis['languages']
     frameworks = file_analysis['frameworks']
     cloud_services = file_analysis['cloud_services']
     containerization = file_analysis['containerization']
     databases = file_analysis['databases']
     
+    # Paths come from item[0] so lazy FileRecords are not loaded for path checks
+    files = file_analysis.get('files', [])
+    file_paths = str([item[0] for item in files])
+    mentions = file_analysis.get('content_mentions')
+    if mentions is None:
+        mentions = architecture_mentions(files)
+
     # Determine if it's likely a microservices architecture
     microservices_indicators = [
         containerization.get('kubernetes', 0) > 0,
         containerization.get('docker', 0) > 2,  # Multiple Dockerfiles
-        'docker-compose.yml' in [f for f, _ in file_analysis.get('files', [])],
+        'docker-compose.yml' in [item[0] for item in files],
         any(frameworks.get(fw, 0) > 0 for fw in ['fastapi', 'express', 'flask'])
     ]
     
@@ -226,24 +312,24 @@ def analyze_architecture(file_analysis):
             frameworks.get('django', 0)
         ]),
         'grpc': sum([
-            re.search(r'grpc', str([f for f, _ in file_analysis.get('files', [])])) is not None,
-            re.search(r'\.proto$', str([f for f, _ in file_analysis.get('files', [])])) is not None
+            re.search(r'grpc', file_paths) is not None,
+            re.search(r'\.proto$', file_paths) is not None
         ])
     }
     
     # Check for message queue usage
     mq_indicators = {
         'kafka': sum([
-            re.search(r'kafka', str([f for f, _ in file_analysis.get('files', [])])) is not None,
-            re.search(r'KafkaConsumer', str([c for _, c in file_analysis.get('files', [])])) is not None
+            re.search(r'kafka', file_paths) is not None,
+            'kafka' in mentions
         ]),
         'rabbitmq': sum([
-            re.search(r'rabbitmq', str([f for f, _ in file_analysis.get('files', [])])) is not None,
-            re.search(r'amqp', str([c for _, c in file_analysis.get('files', [])])) is not None
+            re.search(r'rabbitmq', file_paths) is not None,
+            'rabbitmq' in mentions
         ]),
         'sqs': cloud_services.get('aws', 0) > 0 and sum([
-            re.search(r'sqs', str([f for f, _ in file_analysis.get('files', [])])) is not None,
-            re.search(r'SQS', str([c for _, c in file_analysis.get('files', [])])) is not None
+            re.search(r'sqs', file_paths) is not None,
+            'sqs' in mentions
         ])
     }
     
@@ -476,6 +562,31 @@ def repair_json_at_error(json_str, json_err):
     # If no specific fix worked, return the original
     return json_str
 
+def sample_files_for_llm(files_data, limit=10):
+    """Pick the files the LLM analysis shows the model, by path only.
+
+    Files matching IMPORTANT_FILE_PATTERNS come first, then the others in order,
+    up to limit. No content is read, so lazy FileRecords can be loaded for just
+    the sample (see utils.file_records.loaded).
+
+    Args:
+        files_data: List of (path, content) tuples or FileRecords
+        limit: Maximum number of files
+
+    Returns:
+        List of the sampled items of files_data
+    """
+    important, others = [], []
+    for item in files_data:
+        if any(re.search(pattern, item[0], re.IGNORECASE) for pattern in IMPORTANT_FILE_PATTERNS):
+            important.append(item)
+            if len(important) >= limit:
+                break
+        elif len(others) < limit:
+            others.append(item)
+    return (important + others)[:limit]
+
+
 def analyze_cloud_readiness_with_llm(files_data, project_name=None):
     """Use LLM to analyze cloud readiness of the codebase.
     
@@ -491,38 +602,14 @@ def analyze_cloud_readiness_with_llm(files_data, project_name=None):
     # Select a representative sample of files to analyze
     # We'll pick up to 10 key files for LLM analysis to avoid token limits
     sampled_files = []
-    
-    # Try to find important files first
-    important_patterns = [
-        r'Dockerfile', r'docker-compose', r'requirements.txt', r'package.json',
-        r'app.py', r'server.js', r'main.py', r'index.js', r'terraform', 
-        r'cloudformation', r'kubernetes', r'k8s', r'helm', r'config'
-    ]
-    
-    # First pass: look for infrastructure and config files
-    for filepath, content in files_data:
-        if len(sampled_files) >= 10:
-            break
-            
-        for pattern in important_patterns:
-            if re.search(pattern, filepath, re.IGNORECASE):
-                # Limit file content size
-                if len(content) > 4000:
-                    content = content[:2000] + "\n\n[...content truncated...]\n\n" + content[-2000:]
-                sampled_files.append((filepath, content))
-                break
-    
-    # Second pass: include other files up to our limit
-    if len(sampled_files) < 10:
-        for filepath, content in files_data:
-            if filepath not in [f for f, _ in sampled_files]:
-                # Skip very large files
-                if len(content) > 4000:
-                    content = content[:2000] + "\n\n[...content truncated...]\n\n" + content[-2000:]
-                sampled_files.append((filepath, content))
-                
-                if len(sampled_files) >= 10:
-                    break
+    for item in sample_files_for_llm(files_data):
+        content = item[1]
+        if not isinstance(content, str):
+            continue
+        # Limit file content size
+        if len(content) > 4000:
+            content = content[:2000] + "\n\n[...content truncated...]\n\n" + content[-2000:]
+        sampled_files.append((item[0], content))
     
     # Prepare content for LLM
     file_content_str = ""
@@ -847,22 +934,29 @@ def analyze_cloud_readiness(files_data, project_name=None, github_token=None, us
     Returns:
         Dict containing cloud readiness analysis results
     """
+    # Index contents by hash so each unique blob is scanned once
+    content_index = ContentIndex()
+    files_data = content_index.add_files(files_data)
+
     # Perform rule-based analysis
-    tech_analysis = detect_language_frameworks(files_data)
-    secrets_analysis = check_hardcoded_secrets(files_data)
-    env_vars_analysis = check_environment_variables(files_data)
-    coupling_analysis = analyze_service_coupling(files_data)
-    logging_analysis = analyze_logging_practices(files_data)
-    state_management = analyze_state_management(files_data)
-    modularity_analysis = analyze_code_modularity(files_data)
-    dependency_analysis = analyze_dependency_management(files_data)
-    health_check_analysis = detect_health_check_endpoints(files_data)
-    testing_analysis = analyze_testing_coverage(files_data)
-    instrumentation_analysis = analyze_instrumentation(files_data)
+    with dedupe_scans(content_index):
+        tech_analysis = detect_language_frameworks(files_data)
+        secrets_analysis = check_hardcoded_secrets(files_data)
+        env_vars_analysis = check_environment_variables(files_data)
+        coupling_analysis = analyze_service_coupling(files_data)
+        logging_analysis = analyze_logging_practices(files_data)
+        state_management = analyze_state_management(files_data)
+        modularity_analysis = analyze_code_modularity(files_data)
+        dependency_analysis = analyze_dependency_management(files_data)
+        health_check_analysis = detect_health_check_endpoints(files_data)
+        testing_analysis = analyze_testing_coverage(files_data)
+        instrumentation_analysis = analyze_instrumentation(files_data)
     
     # Add files to tech_analysis for architecture analysis
     tech_analysis['files'] = files_data
     architecture = analyze_architecture(tech_analysis)
+    # The report lists paths only; embedding every file's content would duplicate the codebase
+    tech_analysis['files'] = [item[0] for item in files_data]
     
     # Calculate cloud readiness scores from rule-based analysis
     rule_based_scores = calculate_cloud_readiness_scores(
@@ -964,7 +1058,8 @@ def analyze_cloud_readiness(files_data, project_name=None, github_token=None, us
         'scores': scores,
         'overall_score': scores['overall'],
         'readiness_level': readiness_level,
-        'recommendations': recommendations
+        'recommendations': recommendations,
+        'deduplication': content_index.stats()
     }
     
     # Add LLM analysis if available
@@ -1014,7 +1109,7 @@ def check_environment_variables(files_data):
             
         file_has_env_vars = False
         for pattern in env_var_patterns:
-            matches = re.findall(pattern, content)
+            matches = _scan_findall(pattern, content)
             if matches:
                 results['count'] += len(matches)
                 results['variables'].update(matches)
@@ -1050,7 +1145,7 @@ def analyze_service_coupling(files_data):
                 results['services'][service_type] = []
                 
             for pattern in patterns:
-                matches = re.findall(pattern, content)
+                matches = _scan_findall(pattern, content)
                 if matches:
                     # Filter out common false positives
                     filtered_matches = [m for m in matches if 
@@ -1108,7 +1203,7 @@ def analyze_logging_practices(files_data):
         file_has_logging = False
         for log_type, patterns in logging_patterns.items():
             for pattern in patterns:
-                matches = re.findall(pattern, content)
+                matches = _scan_findall(pattern, content)
                 if matches:
                     results[log_type] += len(matches)
                     file_has_logging = True
@@ -1158,7 +1253,7 @@ def analyze_state_management(files_data):
         file_has_state = False
         for state_type, patterns in state_patterns.items():
             for pattern in patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
+                matches = _scan_findall(pattern, content, re.IGNORECASE)
                 if matches:
                     results[state_type] += len(matches)
                     file_has_state = True
@@ -1206,7 +1301,7 @@ def analyze_code_modularity(files_data):
         
         for mod_type, patterns in modularity_patterns.items():
             for pattern in patterns:
-                matches = re.findall(pattern, content)
+                matches = _scan_findall(pattern, content)
                 if matches:
                     results[mod_type] += len(matches)
     
@@ -1274,7 +1369,7 @@ def detect_health_check_endpoints(files_data):
             continue
             
         for pattern in health_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+            matches = _scan_findall(pattern, content, re.IGNORECASE)
             if matches:
                 results['has_health_endpoints'] = True
                 results['count'] += len(matches)
@@ -1332,7 +1427,7 @@ def analyze_testing_coverage(files_data):
             
         for test_type, patterns in test_patterns.items():
             for pattern in patterns:
-                matches = re.findall(pattern, content)
+                matches = _scan_findall(pattern, content)
                 if matches:
                     results[test_type] += len(matches)
                     results['has_tests'] = True
@@ -1383,7 +1478,7 @@ def analyze_instrumentation(files_data):
         file_has_instrumentation = False
         for instr_type, patterns in instrumentation_patterns.items():
             for pattern in patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
+                matches = _scan_findall(pattern, content, re.IGNORECASE)
                 if matches:
                     results[instr_type] += len(matches)
                     file_has_instrumentation = True
@@ -1394,6 +1489,186 @@ def analyze_instrumentation(files_data):
     
     return results
 
+# Technology categories counted by detect_language_frameworks
+TECH_CATEGORIES = ["languages", "frameworks", "databases", "cloud_services", "containerization", "cicd", "monitoring", "iac"]
+
+def merge_counts(target, source):
+    """
+    Merge one analyzer result into another: numbers are added, lists extended,
+    booleans OR-ed and dicts merged recursively; other values are overwritten.
+    """
+    for key, value in source.items():
+        if isinstance(value, dict):
+            if not isinstance(target.get(key), dict):
+                target[key] = {}
+            merge_counts(target[key], value)
+        elif isinstance(value, list):
+            if key not in target:
+                target[key] = []
+            elif not isinstance(target[key], list):
+                target[key] = [target[key]]
+            target[key].extend(value)
+        elif isinstance(value, bool):
+            # Checked before numbers: bool is a subclass of int
+            target[key] = bool(target.get(key)) or value
+        elif isinstance(value, (int, float)) and isinstance(target.get(key, 0), (int, float)):
+            target[key] = target.get(key, 0) + value
+        else:
+            target[key] = value
+    return target
+
+def merge_analyzer_results(results):
+    """
+    Combine the rule-based analyzer results of disjoint sets of files.
+
+    Each result holds the outputs of the analyzers for one set of files (a
+    batch of the analysis, or a single file's findings, see
+    utils.file_findings) under the keys tech_analysis, secrets_analysis,
+    env_vars_analysis, coupling_analysis, logging_analysis, state_management,
+    modularity_analysis, dependency_analysis, health_check_analysis,
+    testing_analysis and instrumentation_analysis. The merge doesn't depend on
+    how the files were split, so aggregates kept per file can be updated for
+    a few changed files and still equal those of a full analysis.
+
+    Args:
+        results (iterable): Analyzer results
+
+    Returns:
+        dict: The merged analyses, under the same keys (tech_analysis without 'files')
+    """
+    tech_analysis = {category: {} for category in TECH_CATEGORIES}
+    secrets_analysis = {"has_secrets": False, "secrets_count": 0, "files_with_secrets": []}
+    env_vars_analysis = {"count": 0, "variables": set(), "files": []}
+    coupling_analysis = {"count": 0, "services": {}}
+    logging_analysis = {"has_logging": False, "logging_count": 0, "files_with_logging": [], "structured_logging": 0, "basic_logging": 0, "log_levels": 0, "files": []}
+    state_management = {"has_state_mgmt": False, "state_count": 0, "files_with_state": [], "stateless": 0, "persistent_state": 0, "database_state": 0, "files": []}
+    modularity_analysis = {"modularity_score": 0, "component_count": 0, "files_by_component": {}}
+    dependency_analysis = {"has_dependency_mgmt": False, "dependency_files": []}
+    health_check_analysis = {"has_health_endpoints": False, "count": 0, "health_endpoints": [], "files": []}
+    testing_analysis = {"has_tests": False, "test_count": 0, "test_files": 0, "unit_tests": 0, "integration_tests": 0, "mocking": 0, "files": []}
+    instrumentation_analysis = {"has_instrumentation": False, "instrumentation_count": 0, "files_with_instrumentation": [], "metrics": 0, "tracing": 0, "profiling": 0, "files": []}
+    total_file_size = 0
+    # Start from the analyzers' results for no files, so every key is present even when the
+    # merged results leave empty values out (as stored per-file findings do)
+    for analysis, analyzer in (
+        (secrets_analysis, check_hardcoded_secrets), (coupling_analysis, analyze_service_coupling), (logging_analysis, analyze_logging_practices),
+        (state_management, analyze_state_management), (modularity_analysis, analyze_code_modularity),
+        (dependency_analysis, analyze_dependency_management), (health_check_analysis, detect_health_check_endpoints),
+        (testing_analysis, analyze_testing_coverage), (instrumentation_analysis, analyze_instrumentation),
+    ):
+        merge_counts(analysis, analyzer([]))
+
+    for result in results:
+        for category in TECH_CATEGORIES:
+            for item, count in result.get("tech_analysis", {}).get(category, {}).items():
+                tech_analysis[category][item] = tech_analysis[category].get(item, 0) + count
+
+        secrets_result = result.get("secrets_analysis", {})
+        secrets_analysis["has_secrets"] = secrets_analysis["has_secrets"] or secrets_result.get("has_secrets", False)
+        secrets_analysis["secrets_count"] += secrets_result.get("secrets_count", 0)
+        secrets_analysis["files_with_secrets"].extend(secrets_result.get("files_with_secrets", []))
+
+        env_result = result.get("env_vars_analysis", {})
+        env_vars_analysis["count"] += env_result.get("count", 0)
+        env_vars_analysis["variables"].update(env_result.get("variables", []))
+        env_vars_analysis["files"].extend(env_result.get("files", []))
+
+        # Services are sets of distinct endpoints per kind
+        coupling_result = result.get("coupling_analysis", {})
+        coupling_analysis["count"] += coupling_result.get("count", 0)
+        for service, endpoints in coupling_result.get("services", {}).items():
+            coupling_analysis["services"].setdefault(service, set()).update(endpoints)
+
+        logging_result = result.get("logging_analysis", {})
+        logging_analysis["has_logging"] = logging_analysis["has_logging"] or logging_result.get("has_logging", False)
+        logging_analysis["logging_count"] += logging_result.get("logging_count", 0)
+        logging_analysis["files_with_logging"].extend(logging_result.get("files_with_logging", []))
+
+        # The average file size is recomputed from the total below
+        modularity_result = result.get("modularity_analysis", {})
+        total_file_size += modularity_result.get("avg_file_size", 0) * modularity_result.get("file_count", 0)
+
+        merge_counts(state_management, result.get("state_management", {}))
+        merge_counts(modularity_analysis, modularity_result)
+        merge_counts(dependency_analysis, result.get("dependency_analysis", {}))
+        merge_counts(health_check_analysis, result.get("health_check_analysis", {}))
+        merge_counts(testing_analysis, result.get("testing_analysis", {}))
+        merge_counts(instrumentation_analysis, result.get("instrumentation_analysis", {}))
+
+    # Sorted lists for JSON serialization (and the same order however files were split)
+    env_vars_analysis["variables"] = sorted(env_vars_analysis["variables"])
+    coupling_analysis["services"] = {service: sorted(endpoints) for service, endpoints in coupling_analysis["services"].items()}
+    if modularity_analysis.get("file_count"):
+        modularity_analysis["avg_file_size"] = total_file_size / modularity_analysis["file_count"]
+
+    return {
+        "tech_analysis": tech_analysis,
+        "secrets_analysis": secrets_analysis,
+        "env_vars_analysis": env_vars_analysis,
+        "coupling_analysis": coupling_analysis,
+        "logging_analysis": logging_analysis,
+        "state_management": state_management,
+        "modularity_analysis": modularity_analysis,
+        "dependency_analysis": dependency_analysis,
+        "health_check_analysis": health_check_analysis,
+        "testing_analysis": testing_analysis,
+        "instrumentation_analysis": instrumentation_analysis,
+    }
+
+def blend_scores(rule_based_scores, llm_factors):
+    """
+    Blend rule-based scores with the LLM's factor scores (60% rule-based, 40% LLM).
+
+    Args:
+        rule_based_scores: Scores from calculate_cloud_readiness_scores
+        llm_factors: The LLM analysis' "factors" (factor -> {"score": 1-10, ...})
+
+    Returns:
+        Blended scores, each capped at its maximum, with a recomputed 'overall' (0-100)
+    """
+    # Convert LLM scores from 1-10 to our scale, skipping factors not in our scoring system
+    llm_scores = {}
+    for factor, data in llm_factors.items():
+        if factor in max_score_map and isinstance(data, dict) and "score" in data:
+            llm_scores[factor] = (data["score"] / 10) * max_score_map[factor]
+
+    blended_scores = {}
+    for factor in rule_based_scores:
+        max_score = max_score_map.get(factor, 10)
+        if factor in llm_scores:
+            blended_scores[factor] = min(0.6 * rule_based_scores[factor] + 0.4 * llm_scores[factor], max_score)
+        else:
+            blended_scores[factor] = min(rule_based_scores[factor], max_score)
+
+    # Normalize the sum to a 0-100 range
+    overall_sum = sum(blended_scores[f] for f in blended_scores if f != 'overall')
+    total_possible_score = sum(max_score_map.values())
+    blended_scores['overall'] = max(0, min(round((overall_sum / total_possible_score) * 100), 100))
+    return blended_scores
+
+def readiness_level_for(overall_score):
+    """Readiness level of an overall score (0-100)."""
+    if overall_score >= 80:
+        return "Cloud-Native"
+    if overall_score >= 60:
+        return "Cloud-Ready"
+    if overall_score >= 40:
+        return "Cloud-Friendly"
+    return "Cloud-Challenged"
+
+def llm_recommendations(llm_analysis):
+    """Recommendations from the LLM analysis' per-factor advice."""
+    return [
+        {
+            'category': factor,
+            'priority': 'medium',
+            'description': data['recommendations'],
+            'source': 'llm'
+        }
+        for factor, data in llm_analysis.get('factors', {}).items()
+        if isinstance(data, dict) and 'recommendations' in data
+    ]
+
 def calculate_cloud_readiness_scores(tech_analysis, secrets_analysis, architecture, 
                                     env_vars_analysis=None, coupling_analysis=None,
                                     logging_analysis=None, state_management=None,
@@ -0,0 +1,146 @@
+from utils.crawl_manifest import blob_sha
+from utils.file_records import FileRecord
+
+
+class ContentIndex:
+    """
+    Content-hash index of crawled files.
+
+    Identical files (vendored copies, generated stubs, copy-pasted configs) are
+    mapped to one blob. For (path, content) tuples the duplicates share one
+    canonical content string; lazy FileRecords keep their own loader. Analyzers
+    can then scan each unique blob once and reuse the result for the other
+    paths (see cloud_analyzer.dedupe_scans).
+
+    Hashes are git blob SHAs: the crawler's content_hashes or FileRecord.sha
+    when available, otherwise computed from the UTF-8 text.
+    """
+
+    def __init__(self, content_hashes=None):
+        self.content_hashes = content_hashes or {}
+        self.paths_by_hash = {}
+        self._canonical = {}
+        # Blob SHA of each content string currently known to belong to a duplicated blob.
+        # Entries must only exist while the string is alive (ids are reused after GC).
+        self._sha_by_id = {}
+        self._scan_memo = {}
+        self.bytes_total = 0
+        self.bytes_saved = 0
+        self.scan_cache_hits = 0
+
+    def _add_hash(self, path, sha, size):
+        """Record a path under a blob SHA; returns True if the blob was seen before."""
+        self.bytes_total += size
+        paths = self.paths_by_hash.setdefault(sha, [])
+        paths.append(path)
+        if len(paths) == 1:
+            return False
+        self.bytes_saved += size
+        return True
+
+    def add(self, path, content):
+        """
+        Record a crawled file.
+
+        Args:
+            path (str): File path
+            content (str): File content
+
+        Returns:
+            str: The canonical content for this blob (the first copy seen)
+        """
+        if not isinstance(content, str):
+            return content
+        data = content.encode("utf-8")
+        sha = self.content_hashes.get(path) or blob_sha(data)
+        if not self._add_hash(path, sha, len(data)):
+            self._canonical[sha] = content
+            return content
+
+        # The index keeps canonical strings alive, so their ids stay valid
+        canonical = self._canonical[sha]
+        self._sha_by_id[id(canonical)] = sha
+        return canonical
+
+    def add_record(self, record):
+        """Record a lazy FileRecord (its content is only read if no hash is known)."""
+        sha = record.sha or self.content_hashes.get(record.path)
+        size = record.size
+        if not sha or size is None:
+            content = record.content
+            if not isinstance(content, str):
+                return record
+            data = content.encode("utf-8")
+            sha = sha or blob_sha(data)
+            size = len(data) if size is None else size
+        record.sha = sha
+        self._add_hash(record.path, sha, size)
+        return record
+
+    def add_file(self, item):
+        """Index a FileRecord or (path, content) tuple, returning it with canonicalized content."""
+        if isinstance(item, FileRecord):
+            return self.add_record(item)
+        path, content = item
+        return path, self.add(path, content)
+
+    def add_files(self, files_data):
+        """Index a list of FileRecords / (path, content) tuples (see add_file)."""
+        return [self.add_file(item) for item in files_data]
+
+    def is_duplicated_sha(self, sha):
+        return len(self.paths_by_hash.get(sha, ())) > 1
+
+    def track(self, records):
+        """
+        Register the loaded content of duplicated FileRecords for scan memoization.
+
+        Returns the registered ids, to be passed to untrack() before the records
+        are released.
+        """
+        tracked = []
+        for record in records:
+            if isinstance(record, FileRecord) and record.is_loaded and self.is_duplicated_sha(record.sha):
+                content = record.content
+                self._sha_by_id[id(content)] = record.sha
+                tracked.append(id(content))
+        return tracked
+
+    def untrack(self, tracked):
+        for content_id in tracked:
+            self._sha_by_id.pop(content_id, None)
+
+    def release(self):
+        """Drop canonical contents and memoized scan results once scanning is finished."""
+        self._canonical.clear()
+        self._sha_by_id.clear()
+        self._scan_memo.clear()
+
+    def duplicates(self):
+        """Get {sha: [paths]} for blobs found under more than one path."""
+        return {sha: paths for sha, paths in self.paths_by_hash.items() if len(paths) > 1}
+
+    def memoized(self, func, pattern, content, flags):
+        """Run a regex function on content, reusing the result for duplicated blobs."""
+        sha = self._sha_by_id.get(id(content))
+        if sha is None:
+            return func(pattern, content, flags)
+        key = (sha, func, pattern, flags)
+        if key in self._scan_memo:
+            self.scan_cache_hits += 1
+            return self._scan_memo[key]
+        result = self._scan_memo[key] = func(pattern, content, flags)
+        return result
+
+    def stats(self):
+        """Summary for the analysis report."""
+        duplicates = self.duplicates()
+        return {
+            "total_files": sum(len(paths) for paths in self.paths_by_hash.values()),
+            "unique_blobs": len(self.paths_by_hash),
+            "duplicated_blobs": len(duplicates),
+            "duplicate_files": sum(len(paths) - 1 for paths in duplicates.values()),
+            "bytes_total": self.bytes_total,
+            "bytes_saved": self.bytes_saved,
+            "scan_cache_hits": self.scan_cache_hits,
+        }
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Checkpoints of unfinished GitHub crawls, shared by every process using the same path
+DEFAULT_CHECKPOINT_PATH = os.getenv("GITHUB_CHECKPOINT_PATH", os.path.join("cache", "crawl_checkpoints.sqlite"))
+# Older checkpoints are not resumed (the crawl starts over from the current ref) and are removed
+CHECKPOINT_MAX_AGE_SECONDS = float(os.getenv("GITHUB_CHECKPOINT_MAX_AGE_HOURS", "24")) * 3600
+# Delivered files are written in one transaction per this many files or seconds, whichever comes first;
+# a crawl killed outright loses at most these to its retry
+CHECKPOINT_FLUSH_FILES = int(os.getenv("GITHUB_CHECKPOINT_FLUSH_FILES", "100"))
+CHECKPOINT_FLUSH_SECONDS = float(os.getenv("GITHUB_CHECKPOINT_FLUSH_SECONDS", "5"))
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def checkpoint_key(repo_url, token=None):
+    """
+    Key a crawl by its URL (repository, ref and path) and the token it reads with.
+
+    Like cache_key, the token is part of the key so files of a private repository
+    are never resumed into another caller's crawl.
+    """
+    parts = {
+        "url": repo_url.rstrip("/"),
+        "auth": hashlib.sha256(token.encode("utf-8")).hexdigest()[:16] if token else None,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CrawlCheckpoint:
+    """
+    Progress of one crawl: the commit and tree listing it enumerated, and the
+    files delivered so far.
+
+    resumed is True when an earlier, unfinished crawl of the same URL left this
+    state behind; commit_sha, ref, specific_path and tree are then set and the
+    crawl can continue at that commit (see iter_github_files' resume and retry).
+    """
+
+    def __init__(self, store, key, row=None):
+        self.store = store
+        self.key = key
+        # Delivered files not written yet (see add), and when the last write happened
+        self._pending = []
+        self._flushed = time.time()
+        self.resumed = row is not None
+        self.ref, self.specific_path, self.commit_sha, tree, self.enumeration_requests = row or (None, None, None, None, 0)
+        self.tree = json.loads(tree) if tree else None
+
+    def begin(self, ref, specific_path, commit_sha, tree, enumeration_requests):
+        """Record the enumerated listing, before any file is fetched."""
+        now = time.time()
+        with self.store._connection() as db:
+            db.execute("DELETE FROM checkpoint_files WHERE key = ?", (self.key,))
+            db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key, ref, specific_path, commit_sha, json.dumps(tree), enumeration_requests, now, now),
+            )
+        self.ref, self.specific_path, self.commit_sha, self.tree = ref, specific_path, commit_sha, tree
+        self.enumeration_requests = enumeration_requests
+
+    def add(self, path, content):
+        """
+        Record a delivered file.
+
+        Files are written in batches (see CHECKPOINT_FLUSH_FILES and
+        CHECKPOINT_FLUSH_SECONDS), so a crawl that completes costs one commit
+        per batch rather than per file; call flush() when the crawl stops early.
+        """
+        self._pending.append((path, content))
+        if len(self._pending) >= CHECKPOINT_FLUSH_FILES or time.time() - self._flushed >= CHECKPOINT_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the files added since the last flush, in one transaction.
+
+        Nothing is recorded once another crawl of the same key has discarded the
+        checkpoint or begun one at another commit.
+        """
+        pending, self._pending, self._flushed = self._pending, [], time.time()
+        if not pending:
+            return
+        with self.store._connection() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO checkpoint_files SELECT ?, ?, ?"
+                " WHERE EXISTS (SELECT 1 FROM checkpoints WHERE key = ? AND commit_sha = ?)",
+                [(self.key, path, content, self.key, self.commit_sha) for path, content in pending],
+            )
+            db.execute("UPDATE checkpoints SET updated = ? WHERE key = ?", (time.time(), self.key))
+
+    def restore(self, paths):
+        """Yield (path, content) for the stored files among paths."""
+        cursor = self.store._connection().execute(
+            "SELECT path, content FROM checkpoint_files WHERE key = ?", (self.key,)
+        )
+        for path, content in cursor:
+            if path in paths:
+                yield path, content
+
+    def discard(self):
+        """Remove the checkpoint once the crawl has completed, or when it is no longer resumable."""
+        self._pending = []
+        with self.store._connection() as db:
+            db.execute("DELETE FROM checkpoint_files WHERE key = ?", (self.key,))
+            db.execute("DELETE FROM checkpoints WHERE key = ?", (self.key,))
+        self.resumed = False
+        self.ref, self.specific_path, self.commit_sha, self.tree, self.enumeration_requests = None, None, None, None, 0
+
+
+class CheckpointStore:
+    """
+    Crawl checkpoints in SQLite, so a crawl killed halfway (pod restart, rate
+    limit exhaustion, failed job) can be resumed by a retry of the same URL.
+
+    Safe to use from several threads (one connection per thread) and several
+    processes (WAL journal), like ResponseCache.
+    """
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH, max_age_seconds=CHECKPOINT_MAX_AGE_SECONDS):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                " key TEXT PRIMARY KEY, ref TEXT, specific_path TEXT, commit_sha TEXT, tree TEXT,"
+                " enumeration_requests INTEGER, created REAL, updated REAL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint_files ("
+                " key TEXT, path TEXT, content TEXT, PRIMARY KEY (key, path))"
+            )
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _expire(self):
+        cutoff = time.time() - self.max_age_seconds
+        with self._connection() as db:
+            expired = [key for (key,) in db.execute("SELECT key FROM checkpoints WHERE updated < ?", (cutoff,))]
+            for key in expired:
+                db.execute("DELETE FROM checkpoint_files WHERE key = ?", (key,))
+                db.execute("DELETE FROM checkpoints WHERE key = ?", (key,))
+            # Files left behind by crawls that raced on a key another crawl discarded
+            db.execute("DELETE FROM checkpoint_files WHERE key NOT IN (SELECT key FROM checkpoints)")
+
+    def open(self, repo_url, token=None):
+        """Get the checkpoint of a crawl, resumed if an unfinished one is recent enough."""
+        self._expire()
+        key = checkpoint_key(repo_url, token)
+        row = self._connection().execute(
+            "SELECT ref, specific_path, commit_sha, tree, enumeration_requests FROM checkpoints WHERE key = ?",
+            (key,),
+        ).fetchone()
+        return CrawlCheckpoint(self, key, row)
+
+    def stats(self):
+        checkpoints, files = self._connection().execute(
+            "SELECT (SELECT COUNT(*) FROM checkpoints), (SELECT COUNT(*) FROM checkpoint_files)"
+        ).fetchone()
+        return {"checkpoints": checkpoints, "files": files}
+
+
+def get_checkpoint_store(path=DEFAULT_CHECKPOINT_PATH):
+    """Get the process-wide CheckpointStore for a path."""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = CheckpointStore(path)
+        return _stores[path]
@@ -1,17 +1,39 @@
 import requests
 import base64
 import os
-import tempfile
 import git
 import time
-import fnmatch
 import random
+import tarfile
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union, Set, List, Dict, Tuple, Any
-from urllib.parse import urlparse
+from urllib.parse import urlparse, quote
+from utils.adaptive_limit import AdaptiveLimiter
+from utils.crawl_checkpoint import get_checkpoint_store
+from utils.file_patterns import compile_patterns
+from utils.file_priority import PRIORITY_TIERS, file_tier, priority_key
+from utils.fetch_strategy import CLONE_SETUP_SECONDS, STRATEGIES, log_fetch, select_strategy
+from utils.git_mirror import get_mirror_cache, git_auth_env, mirror_dir_for
+from utils.github_rate_limit import TokenPool, pool_tokens
+from utils.http_cache import cache_key, get_response_cache
+from utils.http_session import connection_stats, connection_stats_delta, http_get
+from utils.file_sniffing import (
+    SKIP_DECODE_ERROR, SKIP_TOO_LARGE, SNIFF_BYTES, decode_text, sniff_encoding
+)
 
-# Add a simple cache to avoid fetching the same URLs repeatedly
-_request_cache = {}
-MAX_CACHE_SIZE = 100
+# API and raw content endpoints; override for GitHub Enterprise or a local stand-in
+# (utils.fake_github_server)
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITHUB_RAW_URL = os.getenv("GITHUB_RAW_URL", "https://raw.githubusercontent.com").rstrip("/")
+
+# Git tree entry modes that are not regular file content
+_SYMLINK_MODE = "120000"
+
+# Concurrent raw file downloads (reduced automatically while GitHub is rate limiting)
+DEFAULT_DOWNLOAD_WORKERS = 8
 
 def crawl_github_files(
     repo_url, 
@@ -19,11 +41,65 @@ def crawl_github_files(
     max_file_size: int = 1 * 1024 * 1024,  # 1 MB
     use_relative_paths: bool = False,
     include_patterns: Union[str, Set[str]] = None,
-    exclude_patterns: Union[str, Set[str]] = None
+    exclude_patterns: Union[str, Set[str]] = None,
+    use_tarball: bool = None,
+    download_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    filtered_clone: bool = False,
+    resume: bool = True,
+    retry: bool = False,
+    max_requests: int = None,
+    time_budget: float = None,
+    only_paths: Set[str] = None
 ):
     """
     Crawl files from a specific path in a GitHub repository at a specific commit.
 
+    Collects iter_github_files into a dict; see it for the arguments.
+
+    Returns:
+        dict: Dictionary with files and statistics
+    """
+    stats = {}
+    files = dict(iter_github_files(
+        repo_url,
+        token=token,
+        max_file_size=max_file_size,
+        use_relative_paths=use_relative_paths,
+        include_patterns=include_patterns,
+        exclude_patterns=exclude_patterns,
+        stats=stats,
+        use_tarball=use_tarball,
+        download_workers=download_workers,
+        filtered_clone=filtered_clone,
+        resume=resume,
+        retry=retry,
+        max_requests=max_requests,
+        time_budget=time_budget,
+        only_paths=only_paths,
+    ))
+    return {"files": files, "stats": stats}
+
+
+def iter_github_files(
+    repo_url,
+    token=None,
+    max_file_size: int = 1 * 1024 * 1024,  # 1 MB
+    use_relative_paths: bool = False,
+    include_patterns: Union[str, Set[str]] = None,
+    exclude_patterns: Union[str, Set[str]] = None,
+    stats: Dict[str, Any] = None,
+    use_tarball: bool = None,
+    download_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    filtered_clone: bool = False,
+    resume: bool = True,
+    retry: bool = False,
+    max_requests: int = None,
+    time_budget: float = None,
+    only_paths: Set[str] = None
+):
+    """
+    Crawl files from a specific path in a GitHub repository, yielding (path, content) as each file is downloaded.
+
     Args:
         repo_url (str): URL of the GitHub repository with specific path and commit
                         (e.g., 'https://github.com/microsoft/autogen/tree/e45a15766746d95f8cfaaa705b0371267bec812e/python/packages/autogen-core/src/autogen_core')
@@ -31,27 +107,70 @@ def crawl_github_files(
             - **Required for private repositories.**
             - **Recommended for public repos to avoid rate limits.**
             - Can be passed explicitly or set via the `GITHUB_TOKEN` environment variable.
+            - A list of tokens (or a comma-separated `GITHUB_TOKENS` variable) forms a pool: each
+              API request uses the token with the most rate limit quota left (see TokenPool).
         max_file_size (int, optional): Maximum file size in bytes to download (default: 1 MB)
         use_relative_paths (bool, optional): If True, file paths will be relative to the specified subdirectory
         include_patterns (str or set of str, optional): Pattern or set of patterns specifying which files to include (e.g., "*.py", {"*.md", "*.txt"}).
                                                        If None, all files are included.
         exclude_patterns (str or set of str, optional): Pattern or set of patterns specifying which files to exclude.
                                                        If None, no files are excluded.
+        stats (dict, optional): Filled with crawl statistics as the crawl progresses. On failure
+                                stats["error"] is set and the generator stops early.
+        use_tarball (bool, optional): Stream the repository tarball (True) or download files one by
+                                      one (False). None (default) lets utils.fetch_strategy pick the
+                                      fastest of raw files, tarball and a cached git clone from the
+                                      repository's size and the files selected; the choice and its
+                                      predicted vs actual time are logged (see log_fetch).
+        download_workers (int, optional): Maximum number of files downloaded at once (1 downloads
+                                          sequentially). Halved each time GitHub answers 403/429
+                                          for rate limiting, and grown back while requests succeed.
+        filtered_clone (bool, optional): For clone-based (SSH) crawls, keep a shallow clone of the default
+                                         branch without blobs and fetch only the blobs of files that
+                                         pass the include/exclude patterns and size limit.
+        resume (bool, optional): Checkpoint the crawl (the enumerated tree and each delivered file) so
+                                 that a later crawl of the same URL after a crash or an incomplete crawl
+                                 continues at the same commit, fetching only what is still missing.
+                                 The checkpoint is only used while the ref still points at its commit
+                                 (and discarded once it doesn't), unless retry is set. It is removed
+                                 once a crawl completes. Clone-based crawls resume from their
+                                 persistent mirror instead.
+        retry (bool, optional): The crawl retries an earlier, unfinished crawl of the same URL: continue
+                                at its checkpointed commit without resolving the ref again, even if
+                                the ref has moved since.
+        max_requests (int, optional): Stop starting downloads once this many HTTP requests have been
+                                      made (cache hits are free; each download in flight counts as one).
+        time_budget (float, optional): Stop starting downloads this many seconds after the crawl began.
+                                       With either budget, files are fetched one by one (no tarball) in
+                                       order of value (see utils.file_priority): containers, CI, IaC and
+                                       dependency manifests first. stats["partial"] tells whether the
+                                       budget cut the crawl short and stats["coverage"] how much of the
+                                       selection was fetched. Clone-based crawls read locally and ignore
+                                       budgets.
+        only_paths (set of str, optional): Fetch only these files (paths as yielded, so relative to the
+                                           URL's path with use_relative_paths), if they still pass the
+                                           patterns and size limit. Used to re-fetch the files a push
+                                           touched (see utils.incremental_analysis); other files are
+                                           skipped without a request.
 
-    Returns:
-        dict: Dictionary with files and statistics
+    Yields:
+        tuple: (path, content)
     """
-    # If no token is provided, check environment and show recommendation
+    if stats is None:
+        stats = {}
+
+    # Tokens to spread API requests over (token, else GITHUB_TOKENS, else GITHUB_TOKEN);
+    # the first one identifies the caller for cached responses
+    token_pool = TokenPool(pool_tokens(token))
+    token = token_pool.primary.token
     if not token:
-        token = os.environ.get("GITHUB_TOKEN")
-        if not token:
-            # In future versions, we might check a configuration file for tokens
-            print("\n⚠️ WARNING: No GitHub token provided. You may encounter rate limit issues.")
-            print("To avoid GitHub API rate limits, please configure a token:")
-            print("  1. Go to Settings page in the CloudView UI and configure your GitHub token")
-            print("  2. Or set GITHUB_TOKEN environment variable")
-            print("  3. Or pass token parameter in function call")
-            print("Create a token at: https://github.com/settings/tokens\n")
+        # In future versions, we might check a configuration file for tokens
+        print("\n⚠️ WARNING: No GitHub token provided. You may encounter rate limit issues.")
+        print("To avoid GitHub API rate limits, please configure a token:")
+        print("  1. Go to Settings page in the CloudView UI and configure your GitHub token")
+        print("  2. Or set GITHUB_TOKEN (or a comma-separated GITHUB_TOKENS pool) environment variable")
+        print("  3. Or pass token parameter in function call")
+        print("Create a token at: https://github.com/settings/tokens\n")
 
     # Convert single pattern to set
     if include_patterns and isinstance(include_patterns, str):
@@ -59,120 +178,148 @@ def crawl_github_files(
     if exclude_patterns and isinstance(exclude_patterns, str):
         exclude_patterns = {exclude_patterns}
 
-    def should_include_file(file_path: str, file_name: str) -> bool:
-        """Determine if a file should be included based on patterns"""
-        # Debug output to help understand matching issues
-        # print(f"Checking file: {file_path} (filename: {file_name})")
-        # if include_patterns:
-        #     print(f"Include patterns: {include_patterns}")
-        # if exclude_patterns:
-        #     print(f"Exclude patterns: {exclude_patterns}")
-            
-        # If no include patterns are specified, include all files
-        if not include_patterns:
-            include_file = True
+    skipped_files = []
+    skipped_by_reason = {}
+    stats.update({
+        "downloaded_count": 0,
+        "skipped_count": 0,
+        "skipped_files": skipped_files,
+        "skipped_by_reason": skipped_by_reason,
+        "base_path": None,
+        "include_patterns": include_patterns,
+        "exclude_patterns": exclude_patterns,
+        "source": "github_api",
+        "partial_clone": False,  # API fetching doesn't have partial clone concept
+        "error": None,
+        "api_requests": 0,
+        "partial": False
+    })
+
+    # Budget (max_requests / time_budget), checked before each download is started
+    crawl_start = time.time()
+    budgeted = max_requests is not None or time_budget is not None
+    budget_stop = []  # What cut the crawl short: "time" or "requests"
+
+    def over_budget(in_flight=0):
+        if budget_stop:
+            return True
+        if time_budget is not None and time.time() - crawl_start >= time_budget:
+            budget_stop.append("time")
+        elif max_requests is not None and stats["api_requests"] + in_flight >= max_requests:
+            budget_stop.append("requests")
         else:
-            # Check if file matches any include pattern - try both the full path and just the filename
-            include_file = any(
-                fnmatch.fnmatch(file_path, pattern) or 
-                fnmatch.fnmatch(file_name, pattern) or
-                # Special handling for directory-based patterns like **/src/**/*.java
-                (pattern.startswith("**/") and fnmatch.fnmatch(file_path, pattern[3:])) or
-                # Try with just the extension
-                (pattern.startswith("**/") and pattern.endswith("/*.*") and 
-                 file_name.endswith(pattern.split(".")[-1]))
-                for pattern in include_patterns
-            )
-
-        # If exclude patterns are specified, check if file should be excluded
-        if exclude_patterns and include_file:
-            # Exclude if file matches any exclude pattern - check both path and filename
-            exclude_file = any(
-                fnmatch.fnmatch(file_path, pattern) or 
-                fnmatch.fnmatch(file_name, pattern) or
-                (pattern.startswith("**/") and fnmatch.fnmatch(file_path, pattern[3:]))
-                for pattern in exclude_patterns
-            )
-            return not exclude_file
-
-        return include_file
+            return False
+        print(f"Crawl budget reached ({budget_stop[0]}), not starting further downloads")
+        return True
 
-    # Detect SSH URL (git@ or .git suffix)
-    is_ssh_url = repo_url.startswith("git@") or repo_url.endswith(".git")
+    # Compile include/exclude patterns once (cached across crawls with the same pattern lists)
+    include_matcher = compile_patterns(include_patterns) if include_patterns else None
+    exclude_matcher = compile_patterns(exclude_patterns) if exclude_patterns else None
 
-    if is_ssh_url:
-        # Clone repo via SSH to temp dir
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            print(f"Cloning SSH repo {repo_url} to temp dir {tmpdirname} ...")
-            try:
-                repo = git.Repo.clone_from(repo_url, tmpdirname)
-                print(f"Successfully cloned repository")
-            except Exception as e:
-                print(f"Error cloning repo: {e}")
-                error_message = str(e)
-                
-                # Check if this is a git-lfs related error but the clone partially succeeded
-                if "git-lfs: command not found" in error_message and os.path.exists(os.path.join(tmpdirname, ".git")):
-                    print("Git LFS error detected, but clone partially succeeded. Continuing with available files...")
-                    # Continue with the partially cloned repository
-                else:
-                    # For other errors, return empty results
-                    return {"files": {}, "stats": {"error": error_message}}
+    # Directories holding only_paths, so a Contents API walk only descends into those
+    only_dirs = {path.rsplit("/", 1)[0] for path in only_paths or () if "/" in path}
+    for directory in list(only_dirs):
+        while "/" in directory:
+            directory = directory.rsplit("/", 1)[0]
+            only_dirs.add(directory)
 
-            # Attempt to checkout specific commit/branch if in URL
-            # Parse ref and subdir from SSH URL? SSH URLs don't have branch info embedded
-            # So rely on default branch, or user can checkout manually later
-            # Optionally, user can pass ref explicitly in future API
+    def should_include_file(file_path: str, file_name: str) -> bool:
+        """Determine if a file should be included based on patterns"""
+        # If no include patterns are specified, include all files.
+        # Otherwise match against the full path, the file name and the **/ stripped path.
+        if include_matcher and not include_matcher.matches(file_path, file_name):
+            return False
 
-            # Walk directory, even if clone was partial (git-lfs errors)
-            files = {}
-            skipped_files = []
+        # Exclude if file matches any exclude pattern - check both path and filename
+        if exclude_matcher and exclude_matcher.matches(file_path, file_name):
+            return False
 
-            for root, dirs, filenames in os.walk(tmpdirname):
-                for filename in filenames:
-                    abs_path = os.path.join(root, filename)
-                    rel_path = os.path.relpath(abs_path, tmpdirname)
+        return True
 
-                    # Check file size
-                    try:
-                        file_size = os.path.getsize(abs_path)
-                    except OSError:
-                        continue
+    def read_mirror(clone_url, commit="HEAD", prefix="", to_rel_path=None, paths=None, env=None, filtered=False):
+        """
+        Read a commit's files from a cached git mirror, yielding (item_path, rel_path, content)
 
-                    if file_size > max_file_size:
-                        skipped_files.append((rel_path, file_size))
-                        print(f"Skipping {rel_path}: size {file_size} exceeds limit {max_file_size}")
-                        continue
+        Clones (first crawl) or fetches a bare mirror kept between crawls, and reads files
+        straight from its object database instead of checking out a working tree. Files
+        under prefix are filtered by the include/exclude patterns and size limit, unless
+        paths already names the files to read. With filtered the mirror is shallow and
+        blob-less (default branch only), and only the blobs of the files read are fetched.
 
-                    # Check include/exclude patterns
-                    if not should_include_file(rel_path, filename):
-                        print(f"Skipping {rel_path}: does not match include/exclude patterns")
-                        continue
+        Raises:
+            git.GitCommandError: If the clone/fetch fails or the commit is not in the mirror
+        """
+        stats["mirror"] = {}
+        with get_mirror_cache().open(clone_url, stats=stats["mirror"], filtered=filtered, env=env) as mirror:
+            commit_sha = mirror.resolve(commit)
+            stats["commit_sha"] = commit_sha
+            candidates = []
+            for item_path, blob_sha, file_size in mirror.list_files(commit_sha):
+                if paths is not None:
+                    if item_path in paths:
+                        candidates.append((item_path, blob_sha, file_size))
+                    continue
+                if prefix and item_path != prefix and not item_path.startswith(prefix + "/"):
+                    continue
+                rel_path = to_rel_path(item_path) if to_rel_path else item_path
+                if only_paths is not None and rel_path not in only_paths:
+                    continue
+                # Check include/exclude patterns
+                if not should_include_file(rel_path, item_path.rsplit("/", 1)[-1]):
+                    print(f"Skipping {rel_path}: does not match include/exclude patterns")
+                    continue
+                candidates.append((item_path, blob_sha, file_size))
 
-                    # Read content
+            # A filtered mirror has no blobs yet: fetch only those of the matching files
+            stats["mirror"]["blobs_fetched"] = mirror.fetch_blobs(commit_sha, [c[1] for c in candidates])
+
+            for item_path, blob_sha, file_size in candidates:
+                rel_path = to_rel_path(item_path) if to_rel_path else item_path
+                # Check file size
+                if file_size is None:
+                    file_size = mirror.blob_size(blob_sha)
+                if file_size > max_file_size:
+                    skipped_files.append((item_path, file_size))
+                    skipped_by_reason[SKIP_TOO_LARGE] = skipped_by_reason.get(SKIP_TOO_LARGE, 0) + 1
+                    stats["skipped_count"] += 1
+                    print(f"Skipping {rel_path}: size {file_size} exceeds limit {max_file_size}")
+                    continue
+
+                # Read content (binary/non-UTF-8 files are rejected from their first bytes)
+                data = mirror.read_blob(blob_sha)
+                encoding, skip_reason = sniff_encoding(data[:SNIFF_BYTES])
+                if not skip_reason:
                     try:
-                        with open(abs_path, "r", encoding="utf-8") as f:
-                            content = f.read()
-                        files[rel_path] = content
-                        print(f"Added {rel_path} ({file_size} bytes)")
-                    except Exception as e:
-                        print(f"Failed to read {rel_path}: {e}")
-
-            return {
-                "files": files,
-                "stats": {
-                    "downloaded_count": len(files),
-                    "skipped_count": len(skipped_files),
-                    "skipped_files": skipped_files,
-                    "base_path": None,
-                    "include_patterns": include_patterns,
-                    "exclude_patterns": exclude_patterns,
-                    "source": "ssh_clone",
-                    "partial_clone": "git-lfs: command not found" in locals().get('error_message', '') 
-                                     if 'error_message' in locals() else False,
-                    "error": locals().get('error_message', None)
-                }
-            }
+                        content = decode_text(data, encoding)
+                    except UnicodeDecodeError:
+                        skip_reason = SKIP_DECODE_ERROR
+                if skip_reason:
+                    print(f"Skipping {rel_path}: {skip_reason}")
+                    skipped_by_reason[skip_reason] = skipped_by_reason.get(skip_reason, 0) + 1
+                    continue
+                print(f"Added {rel_path} ({file_size} bytes)")
+                stats["downloaded_count"] += 1
+                yield item_path, rel_path, content
+
+    # Detect SSH URL (git@ or .git suffix)
+    is_ssh_url = repo_url.startswith("git@") or repo_url.endswith(".git")
+
+    if is_ssh_url:
+        stats["source"] = "ssh_clone"
+        # SSH URLs carry no branch, so the remote's default branch (HEAD) is crawled.
+        # With filtered_clone only the blobs of files matching the patterns are fetched.
+        fetch_start = time.time()
+        try:
+            for _, rel_path, content in read_mirror(repo_url, filtered=filtered_clone):
+                yield rel_path, content
+        except (git.GitCommandError, OSError, ValueError) as e:
+            print(f"Error cloning repo: {e}")
+            stats["error"] = str(e)
+        stats["fetch_strategy"] = {"strategy": "clone", "reason": "ssh_url",
+                                   "actual_seconds": round(time.time() - fetch_start, 3)}
+        log_fetch({"repo": repo_url, "commit_sha": stats.get("commit_sha"), **stats["fetch_strategy"],
+                   "files": stats["downloaded_count"]})
+        return
 
     # Parse GitHub URL to extract owner, repo, commit/branch, and path
     parsed_url = urlparse(repo_url)
@@ -193,36 +340,109 @@ def crawl_github_files(
     if token:
         headers["Authorization"] = f"token {token}"
 
-    def make_request(url, params=None, max_retries=5):
-        """Make a GitHub API request with caching and exponential backoff for rate limits"""
-        cache_key = f"{url}:{str(params)}"
-        
+    # Connections opened vs reused by this crawl (other concurrent crawls share the pool)
+    connections_before = connection_stats()
+
+    # Requests in flight across download threads; halved whenever GitHub throttles us
+    limiter = AdaptiveLimiter(download_workers)
+    stats_lock = threading.Lock()
+
+    def is_throttled(response):
+        """Secondary rate limiting (403/429, Retry-After); primary exhaustion is handled by the token pool"""
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and (
+            "rate limit" in response.text.lower() or "Retry-After" in response.headers
+        )
+
+    # Responses persisted across crawls, processes and restarts (see ResponseCache)
+    response_cache = get_response_cache()
+    stats["http_cache"] = {"hits": 0, "revalidated": 0, "misses": 0}
+
+    def count_cache(outcome, key):
+        if outcome == "misses":
+            response_cache.miss()
+        else:
+            response_cache.hit(key, revalidated=outcome == "revalidated")
+        with stats_lock:
+            stats["http_cache"][outcome] += 1
+
+    def send_request(url, request_headers, params=None, stream=False):
+        """
+        Send one request, on the pool token with the most quota left for API URLs
+
+        Raw file URLs don't count against the API rate limit and use the primary token.
+        """
+        if not url.startswith(GITHUB_API_URL):
+            with limiter:
+                response = http_get(url, headers=request_headers, params=params, stream=stream)
+        else:
+            # Waits here (not holding a download slot) while pacing or out of quota
+            with token_pool.lease() as lease:
+                if lease.token != token:
+                    request_headers = {**request_headers, "Authorization": f"token {lease.token}"}
+                with limiter:
+                    response = http_get(url, headers=request_headers, params=params, stream=stream)
+                lease.headers = response.headers
+        with stats_lock:
+            stats["api_requests"] += 1
+        return response
+
+    def make_request(url, params=None, max_retries=5, extra_headers=None, immutable=False):
+        """
+        Make a GitHub API request with caching and exponential backoff for rate limits
+
+        Cached responses are revalidated with If-None-Match/If-Modified-Since (a 304
+        returns the cached body without using rate limit quota). Responses for immutable
+        URLs (pinned to a commit or tree SHA) are served from the cache without a request.
+        """
+        request_headers = {**headers, **extra_headers} if extra_headers else headers
+        key = cache_key(url, params, request_headers)
+
         # Check cache first
-        if cache_key in _request_cache:
-            print(f"Cache hit for {url}")
-            return _request_cache[cache_key]
+        cached, validators = response_cache.get(key)
+        if cached is not None:
+            if immutable:
+                print(f"Cache hit for {url}")
+                count_cache("hits", key)
+                return cached
+            request_headers = {**request_headers, **response_cache.conditional_headers(validators)}
             
         # Implement exponential backoff for retries
         for retry in range(max_retries):
-            response = requests.get(url, headers=headers, params=params)
+            response = send_request(url, request_headers, params)
+
+            # Unchanged since cached: reuse the stored body
+            if response.status_code == 304 and cached is not None:
+                limiter.succeeded()
+                print(f"Not modified: {url}")
+                count_cache("revalidated", key)
+                return cached
             
             # If successful, cache the response and return
             if response.status_code == 200:
-                # Add to cache (with simple cache size management)
-                if len(_request_cache) >= MAX_CACHE_SIZE:
-                    # Remove a random key to keep cache size in check
-                    del _request_cache[random.choice(list(_request_cache.keys()))]
-                _request_cache[cache_key] = response
+                limiter.succeeded()
+                count_cache("misses", key)
+                response_cache.put(key, response)
                 return response
                 
-            # Handle rate limiting with exponential backoff
-            if response.status_code == 403 and 'rate limit exceeded' in response.text.lower():
-                # Get reset time from headers
-                reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
-                current_time = time.time()
-                
-                # Calculate wait time with exponential backoff
-                wait_time = max(reset_time - current_time, 0)
+            # Quota of this token used up: the pool now knows, and the retry goes to another
+            # token or waits for the reset in send_request
+            if response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0":
+                print(f"GitHub API quota exhausted for one token, retrying (retry {retry+1}/{max_retries})...")
+                continue
+
+            # Secondary rate limit: fewer concurrent requests, then wait and retry
+            if is_throttled(response):
+                limiter.throttled()
+
+                # Secondary limits say how long to wait; primary ones when the quota resets
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    wait_time = int(retry_after)
+                else:
+                    reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
+                    wait_time = max(reset_time - time.time(), 0)
                 if wait_time == 0:
                     # If no reset time available, use exponential backoff
                     wait_time = (2 ** retry) + random.uniform(0, 1)
@@ -231,7 +451,8 @@ def crawl_github_files(
                 remaining = response.headers.get('X-RateLimit-Remaining', 'unknown')
                 limit = response.headers.get('X-RateLimit-Limit', 'unknown')
                 
-                print(f"\n⚠️ GitHub API rate limit exceeded ({remaining}/{limit} remaining requests)")
+                print(f"\n⚠️ GitHub API rate limit exceeded ({remaining}/{limit} remaining requests, "
+                      f"{limiter.limit} concurrent requests allowed)")
                 print(f"Waiting for {wait_time:.1f} seconds (retry {retry+1}/{max_retries})...")
                 print(f"Consider configuring a GitHub token on the Settings page to increase your rate limit.")
                 
@@ -246,7 +467,7 @@ def crawl_github_files(
 
     def fetch_branches(owner: str, repo: str):
         """Get branches of the repository"""
-        url = f"https://api.github.com/repos/{owner}/{repo}/branches"
+        url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/branches"
         response = make_request(url)
 
         if response.status_code == 404:
@@ -266,12 +487,22 @@ def crawl_github_files(
 
     def check_tree(owner: str, repo: str, tree: str):
         """Check the repository has the given tree"""
-        url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{tree}"
+        url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/trees/{tree}"
         response = make_request(url)
         return True if response.status_code == 200 else False 
 
+    # An unfinished earlier crawl of this URL (see CrawlCheckpoint) already resolved the ref and path;
+    # a retry continues it as is, other crawls only while the ref still points at its commit
+    checkpoint = get_checkpoint_store().open(repo_url, token) if resume else None
+    if checkpoint is not None:
+        stats["checkpoint"] = {"resumed": False, "restored_files": 0, "requests_saved": 0, "kept": False}
+    retrying = retry and checkpoint is not None and checkpoint.resumed
+
     # Check if URL contains a specific branch/commit
-    if len(path_parts) > 2 and 'tree' == path_parts[2]:
+    if retrying:
+        ref, specific_path = checkpoint.ref, checkpoint.specific_path
+        print(f"Resuming the crawl of {owner}/{repo} at commit {checkpoint.commit_sha} from its checkpoint")
+    elif len(path_parts) > 2 and 'tree' == path_parts[2]:
         join_parts = lambda i: '/'.join(path_parts[i:])
 
         branches = fetch_branches(owner, repo)
@@ -279,7 +510,8 @@ def crawl_github_files(
 
         # Fetching branches is not successfully
         if len(branches) == 0:
-            return {"files": {}, "stats": {"error": "Failed to fetch repository branches. Check if the repository is valid and accessible."}}
+            stats["error"] = "Failed to fetch repository branches. Check if the repository is valid and accessible."
+            return
 
         # To check branch name
         relevant_path = join_parts(3)
@@ -297,7 +529,8 @@ def crawl_github_files(
         if ref == None:
             print(f"The given path does not match with any branch and any tree in the repository.\n"
                   f"Please verify the path is exists.")
-            return {"files": {}, "stats": {"error": "Repository path not found. Please check the URL."}}
+            stats["error"] = "Repository path not found. Please check the URL."
+            return
 
         # Combine all parts after the ref as the path
         part_index = 5 if '/' in ref else 4
@@ -308,13 +541,280 @@ def crawl_github_files(
         ref = None
         specific_path = ""
     
-    # Dictionary to store path -> content mapping
-    files = {}
-    skipped_files = []
-    
+    if use_relative_paths:
+        stats["base_path"] = specific_path
+
+    def relative_path(item_path):
+        """Path of a repository file as returned to the caller"""
+        if use_relative_paths and specific_path and item_path.startswith(specific_path):
+            # Make sure the path is relative to the specified subdirectory
+            return item_path[len(specific_path):].lstrip('/')
+        return item_path
+
+    repo_metadata_response = []
+
+    def repo_metadata():
+        """The repository's metadata (default branch, size in KB, ...), fetched at most once, or None"""
+        if not repo_metadata_response:
+            repo_metadata_response.append(make_request(f"{GITHUB_API_URL}/repos/{owner}/{repo}"))
+        response = repo_metadata_response[0]
+        return response.json() if response.status_code == 200 else None
+
+    def resolve_commit(ref):
+        """Resolve a branch, tag or commit (None for the default branch) to a commit SHA"""
+        if ref is None:
+            metadata = repo_metadata()
+            ref = metadata.get("default_branch") if metadata else None
+            if not ref:
+                return None
+        # The sha media type returns just the 40-character commit SHA
+        response = make_request(
+            f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{quote(ref, safe='')}",
+            extra_headers={"Accept": "application/vnd.github.sha"},
+        )
+        if response.status_code != 200:
+            return None
+        return response.text.strip()
+
+    def fetch_tree(commit_sha):
+        """Fetch the full recursive file listing of a commit in one request, or None"""
+        response = make_request(
+            f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/trees/{commit_sha}", params={"recursive": "1"},
+            immutable=True,
+        )
+        if response.status_code != 200:
+            print(f"Error fetching tree of {commit_sha}: {response.status_code} - {response.text}")
+            return None
+        return response.json()
+
+    def select_tree_blobs(tree):
+        """
+        Filter a recursive tree listing locally, returning the kept blobs as (item_path, rel_path, size)
+
+        Include/exclude and size checks use the listing's paths and sizes, so skipped
+        files cost no request.
+        """
+        prefix = specific_path.strip('/')
+        kept = []
+        for item in tree.get("tree", []):
+            item_path = item["path"]
+            # Blobs only: subtrees are implied by paths, "commit" entries are submodules
+            if item.get("type") != "blob" or item.get("mode") == _SYMLINK_MODE:
+                continue
+            if prefix and item_path != prefix and not item_path.startswith(prefix + "/"):
+                continue
+
+            rel_path = relative_path(item_path)
+            if only_paths is not None and rel_path not in only_paths:
+                continue
+            if not should_include_file(rel_path, item_path.rsplit("/", 1)[-1]):
+                print(f"Skipping {rel_path}: Does not match include/exclude patterns")
+                continue
+
+            file_size = item.get("size", 0)
+            if file_size > max_file_size:
+                skipped_files.append((item_path, file_size))
+                stats["skipped_count"] += 1
+                print(f"Skipping {rel_path}: File size ({file_size} bytes) exceeds limit ({max_file_size} bytes)")
+                continue
+
+            kept.append((item_path, rel_path, file_size))
+        return kept
+
+    # Files whose download failed; the checkpoint is kept so a retry fetches just these
+    failed_downloads = []
+    # Selected files whose content was read (delivered, restored or skipped after sniffing)
+    fetched_paths = set()
+
+    def delivered(item_path, rel_path, content):
+        """Checkpoint a file before handing it to the caller"""
+        fetched_paths.add(item_path)
+        if checkpoint is not None and checkpoint.commit_sha:
+            checkpoint.add(item_path, content)
+        return rel_path, content
+
+    def downloaded_text(rel_path, data):
+        """Decode a downloaded file with the codec its prefix calls for; None (and counted) if it is not text"""
+        encoding, skip_reason = sniff_encoding(data[:SNIFF_BYTES])
+        if not skip_reason:
+            try:
+                return decode_text(data, encoding)
+            except UnicodeDecodeError:
+                skip_reason = SKIP_DECODE_ERROR
+        print(f"Skipping {rel_path}: {skip_reason}")
+        skipped_by_reason[skip_reason] = skipped_by_reason.get(skip_reason, 0) + 1
+        return None
+
+    def download_blob(item_path, commit_sha):
+        """Fetch one blob from its raw URL pinned to the commit (runs on a download thread)"""
+        return make_request(f"{GITHUB_RAW_URL}/{owner}/{repo}/{commit_sha}/{quote(item_path)}", immutable=True)
+
+    def download_blobs(blobs, commit_sha):
+        """
+        Download kept blobs from raw URLs pinned to the commit, yielding (path, content) in listing order
+
+        Up to download_workers requests run at once (fewer while GitHub is throttling,
+        see AdaptiveLimiter), with at most 2 * download_workers responses held ahead of
+        the consumer. No download is started once the crawl budget is used up.
+        """
+        def results():
+            if download_workers <= 1:
+                for blob in blobs:
+                    if over_budget():
+                        return
+                    yield blob, download_blob(blob[0], commit_sha)
+                return
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=download_workers, thread_name_prefix="github-download") as executor:
+                for blob in blobs:
+                    if over_budget(sum(not future.done() for _, future in pending)):
+                        break
+                    pending.append((blob, executor.submit(download_blob, blob[0], commit_sha)))
+                    if len(pending) >= 2 * download_workers:
+                        blob, future = pending.popleft()
+                        yield blob, future.result()
+                while pending:
+                    blob, future = pending.popleft()
+                    yield blob, future.result()
+
+        for (item_path, rel_path, file_size), file_response in results():
+            if file_response.status_code == 200:
+                content = downloaded_text(rel_path, file_response.content)
+                if content is None:
+                    fetched_paths.add(item_path)
+                    continue
+                print(f"Downloaded: {rel_path} ({file_size} bytes)")
+                stats["downloaded_count"] += 1
+                yield delivered(item_path, rel_path, content)
+            else:
+                print(f"Failed to download {rel_path}: {file_response.status_code}")
+                failed_downloads.append(item_path)
+
+    def stream_tarball(blobs, commit_sha):
+        """
+        Stream the commit's tarball and yield (path, content) for the kept blobs, in archive order
+
+        Members are decompressed as they arrive and never written to disk; members not in
+        blobs are skipped without being read, and kept ones are sniffed before being read
+        in full. Returns the item paths that were not delivered (missing from the archive,
+        or not reached because the download failed) so the caller can fetch them singly.
+        """
+        wanted = {item_path: rel_path for item_path, rel_path, _ in blobs}
+        url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/tarball/{commit_sha}"
+        try:
+            # Redirects to codeload.github.com, which serves the gzipped tar
+            with send_request(url, headers, stream=True) as response:
+                if response.status_code != 200:
+                    print(f"Error fetching tarball of {commit_sha}: {response.status_code}")
+                    return set(wanted)
+                # Undo any transport Content-Encoding; the tar's own gzip layer is read by tarfile
+                response.raw.decode_content = True
+                with tarfile.open(fileobj=response.raw, mode="r|gz") as archive:
+                    for member in archive:
+                        if not member.isfile():
+                            continue
+                        # Members live under a "<owner>-<repo>-<short sha>/" top-level directory
+                        item_path = member.name.split("/", 1)[-1]
+                        rel_path = wanted.get(item_path)
+                        if rel_path is None:
+                            continue
+                        if member.size > max_file_size:
+                            del wanted[item_path]
+                            skipped_files.append((item_path, member.size))
+                            stats["skipped_count"] += 1
+                            print(f"Skipping {rel_path}: File size ({member.size} bytes) exceeds limit ({max_file_size} bytes)")
+                            continue
+
+                        fileobj = archive.extractfile(member)
+                        prefix = fileobj.read(SNIFF_BYTES)
+                        encoding, skip_reason = sniff_encoding(prefix)
+                        if not skip_reason:
+                            try:
+                                content = decode_text(prefix + fileobj.read(), encoding)
+                            except UnicodeDecodeError:
+                                skip_reason = SKIP_DECODE_ERROR
+                        # Only settled once fully read: a failed read leaves it for the single-file fallback
+                        del wanted[item_path]
+                        if skip_reason:
+                            fetched_paths.add(item_path)
+                            print(f"Skipping {rel_path}: {skip_reason}")
+                            skipped_by_reason[skip_reason] = skipped_by_reason.get(skip_reason, 0) + 1
+                            continue
+                        print(f"Extracted: {rel_path} ({member.size} bytes)")
+                        stats["downloaded_count"] += 1
+                        yield delivered(item_path, rel_path, content)
+        except (requests.RequestException, tarfile.TarError, EOFError, OSError, zlib.error) as e:
+            print(f"Error streaming tarball of {commit_sha}: {e}")
+        return set(wanted)
+
+    def fetch_tree_files(blobs, commit_sha, strategy):
+        """
+        Download the blobs kept from a recursive tree listing, yielding (path, content)
+
+        With the "raw_files" strategy files are fetched one by one; with "tarball" the
+        commit's tarball is streamed instead, and any kept file it did not deliver is then
+        fetched singly.
+        """
+        if budgeted:
+            # Highest-value files first, so whatever the budget allows is the most useful part
+            blobs.sort(key=lambda blob: priority_key(blob[0], blob[2]))
+        selected = list(blobs)
+        if checkpoint is not None and checkpoint.resumed:
+            # Files delivered before the earlier crawl stopped come from the checkpoint
+            rel_paths = {item_path: rel_path for item_path, rel_path, _ in blobs}
+            restored = set()
+            for item_path, content in checkpoint.restore(rel_paths):
+                restored.add(item_path)
+                fetched_paths.add(item_path)
+                stats["downloaded_count"] += 1
+                yield rel_paths[item_path], content
+            blobs = [blob for blob in blobs if blob[0] not in restored]
+            # Each restored file would otherwise have been one download
+            stats["checkpoint"]["restored_files"] = len(restored)
+            stats["checkpoint"]["requests_saved"] += len(restored)
+            print(f"Restored {len(restored)} files from the checkpoint, {len(blobs)} left to fetch")
+        if strategy == "raw_files" or not blobs:
+            stats["download_mode"] = "raw_files"
+            yield from download_blobs(blobs, commit_sha)
+        else:
+            stats["download_mode"] = "tarball"
+            missing = yield from stream_tarball(blobs, commit_sha)
+            if missing:
+                print(f"{len(missing)} files were not delivered by the tarball, downloading them individually")
+                stats["tarball_fallback_count"] = len(missing)
+                yield from download_blobs([blob for blob in blobs if blob[0] in missing], commit_sha)
+        record_coverage(selected)
+
+    def record_coverage(selected):
+        """Fill stats["coverage"]: how much of the selected files (overall and per priority tier) was read"""
+        fetched = [blob for blob in selected if blob[0] in fetched_paths]
+        tiers = [{"selected": 0, "fetched": 0} for _ in range(len(PRIORITY_TIERS) + 1)]
+        for item_path, _, _ in selected:
+            tier = tiers[file_tier(item_path)]
+            tier["selected"] += 1
+            tier["fetched"] += item_path in fetched_paths
+        bytes_selected = sum(size for _, _, size in selected)
+        bytes_fetched = sum(size for _, _, size in fetched)
+        stats["partial"] = bool(budget_stop)
+        stats["coverage"] = {
+            "partial": bool(budget_stop),
+            "stopped_by": budget_stop[0] if budget_stop else None,
+            "files_selected": len(selected),
+            "files_fetched": len(fetched),
+            "file_fraction": round(len(fetched) / len(selected), 3) if selected else 1.0,
+            "bytes_selected": bytes_selected,
+            "bytes_fetched": bytes_fetched,
+            "byte_fraction": round(bytes_fetched / bytes_selected, 3) if bytes_selected else 1.0,
+            "tiers": tiers,  # Index 0 holds the highest-value files (see PRIORITY_TIERS)
+            "unfetched": [rel_path for item_path, rel_path, _ in selected if item_path not in fetched_paths][:20],
+        }
+        if budget_stop:
+            print(f"Partial crawl: fetched {len(fetched)} of {len(selected)} selected files "
+                  f"({stats['coverage']['file_fraction']:.0%})")
+
     def fetch_contents(path):
-        """Fetch contents of the repository at a specific path and commit"""
-        url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
+        """Fetch contents of the repository at a specific path and commit, yielding (path, content)"""
+        url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{path}"
         params = {"ref": ref} if ref != None else {}
         
         response = make_request(url, params=params)
@@ -344,19 +844,17 @@ def crawl_github_files(
             contents = [contents]
         
         for item in contents:
+            # Listing order is all there is here; stop where the budget runs out
+            if over_budget():
+                return
             item_path = item["path"]
             
             # Calculate relative path if requested
-            if use_relative_paths and specific_path:
-                # Make sure the path is relative to the specified subdirectory
-                if item_path.startswith(specific_path):
-                    rel_path = item_path[len(specific_path):].lstrip('/')
-                else:
-                    rel_path = item_path
-            else:
-                rel_path = item_path
+            rel_path = relative_path(item_path)
             
             if item["type"] == "file":
+                if only_paths is not None and rel_path not in only_paths:
+                    continue
                 # Check if file should be included based on patterns
                 if not should_include_file(rel_path, item["name"]):
                     print(f"Skipping {rel_path}: Does not match include/exclude patterns")
@@ -366,6 +864,7 @@ def crawl_github_files(
                 file_size = item.get("size", 0)
                 if file_size > max_file_size:
                     skipped_files.append((item_path, file_size))
+                    stats["skipped_count"] += 1
                     print(f"Skipping {rel_path}: File size ({file_size} bytes) exceeds limit ({max_file_size} bytes)")
                     continue
                 
@@ -378,12 +877,17 @@ def crawl_github_files(
                     content_length = int(file_response.headers.get('content-length', 0))
                     if content_length > max_file_size:
                         skipped_files.append((item_path, content_length))
+                        stats["skipped_count"] += 1
                         print(f"Skipping {rel_path}: Content length ({content_length} bytes) exceeds limit ({max_file_size} bytes)")
                         continue
                         
                     if file_response.status_code == 200:
-                        files[rel_path] = file_response.text
+                        content = downloaded_text(rel_path, file_response.content)
+                        if content is None:
+                            continue
                         print(f"Downloaded: {rel_path} ({file_size} bytes) ")
+                        stats["downloaded_count"] += 1
+                        yield rel_path, content
                     else:
                         print(f"Failed to download {rel_path}: {file_response.status_code}")
                 else:
@@ -396,56 +900,186 @@ def crawl_github_files(
                             if len(content_data["content"]) * 0.75 > max_file_size:  # Approximate size calculation
                                 estimated_size = int(len(content_data["content"]) * 0.75)
                                 skipped_files.append((item_path, estimated_size))
+                                stats["skipped_count"] += 1
                                 print(f"Skipping {rel_path}: Encoded content exceeds size limit")
                                 continue
                                 
-                            file_content = base64.b64decode(content_data["content"]).decode('utf-8')
-                            files[rel_path] = file_content
+                            file_content = downloaded_text(rel_path, base64.b64decode(content_data["content"]))
+                            if file_content is None:
+                                continue
                             print(f"Downloaded: {rel_path} ({file_size} bytes)")
+                            stats["downloaded_count"] += 1
+                            yield rel_path, file_content
                         else:
                             print(f"Unexpected content format for {rel_path}")
                     else:
                         print(f"Failed to get content for {rel_path}: {content_response.status_code}")
             
             elif item["type"] == "dir":
+                if only_paths is not None and rel_path not in only_dirs:
+                    continue
                 # Recursively process subdirectories
-                fetch_contents(item_path)
-    
-    # Start crawling from the specified path
-    fetch_contents(specific_path)
-    
-    # Show rate limit stats at the end if a token was used
-    if token:
-        try:
-            rate_limit_url = "https://api.github.com/rate_limit"
-            rate_response = requests.get(rate_limit_url, headers=headers)
-            if rate_response.status_code == 200:
-                rate_data = rate_response.json()
-                core_rate = rate_data.get('resources', {}).get('core', {})
-                remaining = core_rate.get('remaining', 'unknown')
-                limit = core_rate.get('limit', 'unknown')
-                reset_time = core_rate.get('reset', 0)
-                reset_time_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(reset_time))
-                
-                print(f"\nGitHub API Rate Limit: {remaining}/{limit} requests remaining")
-                print(f"Rate limit resets at: {reset_time_str}")
-        except Exception as e:
-            print(f"Failed to fetch rate limit information: {e}")
+                yield from fetch_contents(item_path)
     
-    return {
-        "files": files,
-        "stats": {
-            "downloaded_count": len(files),
-            "skipped_count": len(skipped_files),
-            "skipped_files": skipped_files,
-            "base_path": specific_path if use_relative_paths else None,
-            "include_patterns": include_patterns,
-            "exclude_patterns": exclude_patterns,
-            "source": "github_api",
-            "partial_clone": False,  # API fetching doesn't have partial clone concept
-            "error": None  # No error occurred if we reached this point
-        }
+    clone_url = f"{parsed_url.scheme}://{parsed_url.netloc}/{owner}/{repo}.git"
+    # A filtered (shallow, blob-less) mirror only holds the default branch tip
+    clone_filtered = filtered_clone and ref is None
+
+    def clone_files(commit_sha, blobs):
+        """Read the kept files (or, without a complete listing, every matching file) from a cached clone"""
+        env = git_auth_env(token, parsed_url.netloc)
+        paths = {item_path for item_path, _, _ in blobs} if blobs is not None else None
+        for item_path, rel_path, content in read_mirror(clone_url, commit_sha, specific_path.strip('/'),
+                                                        relative_path, paths, env, clone_filtered):
+            fetched_paths.add(item_path)
+            yield rel_path, content
+
+    def choose_strategy(tree, blobs, commit_sha):
+        """
+        Pick how to fetch the kept files, returning (strategy, reason, predictions, profile)
+
+        Predictions come from utils.fetch_strategy's cost model. The repository metadata
+        (its size, needed to predict a clone) is only requested when a clone could beat the
+        best API strategy, so small crawls make no extra request.
+        """
+        if tree is None:
+            return "contents_api", "no_tree", {}, {}
+        truncated = bool(tree.get("truncated"))
+        profile = {"truncated": truncated, "mirror_exists": os.path.isdir(
+            mirror_dir_for(clone_url, get_mirror_cache().root, clone_filtered))}
+        if blobs is not None:
+            files = [item for item in tree.get("tree", []) if item.get("type") == "blob"]
+            profile.update({
+                "file_count": len(files),
+                "tree_bytes": sum(item.get("size", 0) for item in files),
+                "selected_files": len(blobs),
+                "selected_bytes": sum(size for _, _, size in blobs),
+            })
+        allowed = [strategy for strategy in STRATEGIES if strategy != "clone" or commit_sha]
+        _, predictions = select_strategy(profile, download_workers, [s for s in allowed if s != "clone"])
+        best_api = min((v for v in predictions.values() if v is not None), default=None)
+        if "clone" in allowed and not profile["mirror_exists"] and (best_api is None or best_api > CLONE_SETUP_SECONDS):
+            metadata = repo_metadata() or {}
+            profile.update({"size_kb": metadata.get("size"), "default_branch": metadata.get("default_branch")})
+        strategy, predictions = select_strategy(profile, download_workers, allowed)
+
+        # Explicit choices win over predictions
+        if blobs is not None and budgeted:
+            # A tarball or clone can't be cut short in priority order
+            return "raw_files", "budget", predictions, profile
+        if blobs is not None and use_tarball is not None:
+            return ("tarball" if use_tarball else "raw_files"), "use_tarball", predictions, profile
+        if strategy is None:
+            return "contents_api", "no_prediction", predictions, profile
+        return strategy, "predicted", predictions, profile
+
+    # List the whole tree of the resolved commit in one request, then pick how to fetch the kept
+    # blobs (see choose_strategy). Truncated listings (very large repositories) are read from a
+    # clone, or walked through the Contents API when no clone is possible.
+    if retrying:
+        commit_sha, tree = checkpoint.commit_sha, checkpoint.tree
+        stats["checkpoint"]["requests_saved"] = checkpoint.enumeration_requests
+    else:
+        commit_sha = resolve_commit(ref)
+        if checkpoint is not None and checkpoint.resumed and commit_sha != checkpoint.commit_sha:
+            # Files of the older commit must not end up in a crawl of the current one
+            print(f"The checkpointed crawl of {owner}/{repo} is at commit {checkpoint.commit_sha}, "
+                  f"not {commit_sha}; discarding its checkpoint")
+            checkpoint.discard()
+        if checkpoint is not None and checkpoint.resumed:
+            print(f"Resuming the crawl of {owner}/{repo} at commit {commit_sha} from its checkpoint")
+            tree = checkpoint.tree
+            # Resolving the ref again was spent; only the rest of the enumeration is saved
+            stats["checkpoint"]["requests_saved"] = max(checkpoint.enumeration_requests - stats["api_requests"], 0)
+        else:
+            tree = fetch_tree(commit_sha) if commit_sha else None
+            if checkpoint is not None and tree is not None and not tree.get("truncated"):
+                # The requests spent so far are what a resumed crawl saves on enumeration
+                checkpoint.begin(ref, specific_path, commit_sha, tree, stats["api_requests"])
+    if checkpoint is not None:
+        stats["checkpoint"]["resumed"] = checkpoint.resumed
+    truncated = tree is not None and bool(tree.get("truncated"))
+    blobs = select_tree_blobs(tree) if tree is not None and not truncated else None
+    strategy, reason, predictions, profile = choose_strategy(tree, blobs, commit_sha)
+    print(f"Fetch strategy: {strategy} ({reason}; predicted "
+          f"{', '.join(f'{k} {v:.1f}s' for k, v in predictions.items() if v is not None) or 'n/a'})")
+    fetch_start = time.time()
+
+    try:
+        if strategy == "clone":
+            delivered_before = stats["downloaded_count"]
+            try:
+                yield from clone_files(commit_sha, blobs)
+                stats["enumeration"] = "clone"
+                stats["download_mode"] = "clone"
+            except (git.GitCommandError, OSError, ValueError) as e:
+                if stats["downloaded_count"] > delivered_before:
+                    print(f"Error reading the clone of {owner}/{repo}: {e}")
+                    stats["error"] = str(e)
+                else:
+                    # Nothing delivered yet: the API can still serve the crawl
+                    print(f"Could not clone {owner}/{repo} ({e}), fetching through the API instead")
+                    reason = "clone_failed"
+                    strategy = "contents_api"
+                    if blobs is not None:
+                        strategy = select_strategy(profile, download_workers, ("raw_files", "tarball"))[0]
+
+        if strategy in ("raw_files", "tarball"):
+            stats["enumeration"] = "git_tree"
+            stats["commit_sha"] = commit_sha
+            yield from fetch_tree_files(blobs, commit_sha, strategy)
+        elif strategy == "contents_api":
+            if truncated:
+                print("Recursive tree listing was truncated, falling back to the Contents API")
+            stats["enumeration"] = "contents_api"
+            # Start crawling from the specified path
+            yield from fetch_contents(specific_path)
+            stats["partial"] = bool(budget_stop)
+            stats["coverage"] = {"partial": bool(budget_stop), "stopped_by": budget_stop[0] if budget_stop else None,
+                                 "files_fetched": stats["downloaded_count"]}
+        elif blobs is not None:
+            record_coverage(blobs)
+    except BaseException:
+        # The caller stopped reading, or the crawl failed: keep what was delivered for a retry
+        if checkpoint is not None and checkpoint.commit_sha:
+            checkpoint.flush()
+        raise
+
+    if checkpoint is not None and checkpoint.commit_sha:
+        if failed_downloads or budget_stop or stats["error"]:
+            print("The crawl is incomplete; keeping the checkpoint for a retry")
+            stats["checkpoint"]["kept"] = True
+            checkpoint.flush()
+        else:
+            checkpoint.discard()
+
+    # LRU positions of the cache hits of this crawl, in one transaction
+    response_cache.flush()
+
+    # Predicted vs actual time of the chosen strategy (includes time the caller spent between files)
+    stats["fetch_strategy"] = {
+        "strategy": strategy,
+        "reason": reason,
+        "predicted_seconds": predictions.get(strategy),
+        "actual_seconds": round(time.time() - fetch_start, 3),
+        "predictions": predictions,
+        "profile": profile,
     }
+    log_fetch({"repo": f"{owner}/{repo}", "commit_sha": commit_sha, **stats["fetch_strategy"],
+               "files": stats["downloaded_count"], "api_requests": stats["api_requests"],
+               "partial": stats["partial"]})
+    stats["http_connections"] = connection_stats_delta(connections_before)
+    stats["download_concurrency"] = limiter.stats()
+    
+    # Show the quota left per token, as tracked from the responses' rate limit headers
+    stats["rate_limit"] = token_pool.stats()
+    for token_stats in stats["rate_limit"]["tokens"]:
+        if token_stats["limit"] is None:
+            continue
+        print(f"\nGitHub API Rate Limit ({token_stats['token']}): "
+              f"{token_stats['remaining']}/{token_stats['limit']} requests remaining")
+        if token_stats["reset"]:
+            print(f"Rate limit resets at: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(token_stats['reset']))}")
 
 # Example usage
 if __name__ == "__main__":
@@ -1,36 +1,324 @@
 import os
-import fnmatch
 import pathspec
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from utils.file_patterns import compile_patterns, compile_subtree_patterns
+from utils.crawl_manifest import CrawlManifest, blob_sha, blob_sha_of_file
+from utils.file_records import FileRecord, text_file_loader
+from utils.git_index import is_git_work_tree, list_git_files
+from utils.file_sniffing import (
+    SNIFF_BYTES,
+    SKIP_DECODE_ERROR,
+    SKIP_READ_ERROR,
+    SKIP_TOO_LARGE,
+    decode_text,
+    read_sniffed,
+    sniff_encoding,
+)
 
+# Number of threads used to read file contents in parallel. Reads are I/O bound
+# (especially on network filesystems), so a small pool hides most of the latency.
+DEFAULT_READ_WORKERS = 8
 
-def crawl_local_files(
+# Number of threads listing directories. 1 walks sequentially; more help on
+# network filesystems where each directory listing is a round-trip.
+DEFAULT_WALK_WORKERS = 1
+
+
+def _list_dir(dirpath, prefix, prune_dir):
+    """
+    List one directory for the tree walkers.
+
+    Returns:
+        tuple: (files, subdirs) - files as sorted [(relpath, DirEntry)], subdirs as
+               sorted [(absolute path, relative prefix ending in os.sep)] with pruned
+               and symlinked directories left out
+    """
+    try:
+        with os.scandir(dirpath) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError as e:
+        print(f"Warning: Could not list directory {dirpath}: {e}")
+        return [], []
+
+    files = []
+    subdirs = []
+    for entry in entries:
+        relpath = prefix + entry.name
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if not entry.is_symlink() and not prune_dir(relpath, entry.name):
+                subdirs.append((entry.path, relpath + os.sep))
+        else:
+            files.append((relpath, entry))
+    return files, subdirs
+
+
+def _scan_tree(directory, prune_dir):
+    """
+    Walk a directory tree with os.scandir, yielding (relpath, DirEntry) for every file.
+
+    Visits entries in the same order as a sorted, top-down os.walk (a directory's
+    files before its subdirectories) and, like os.walk, does not follow symlinked
+    directories. Relative paths are built from a per-directory prefix instead of
+    os.path.relpath, and subdirectories for which prune_dir(relpath, name) returns
+    True are never opened.
+    """
+    # Stack of (absolute dir path, relative prefix ending in os.sep or "")
+    stack = [(directory, "")]
+    while stack:
+        files, subdirs = _list_dir(*stack.pop(), prune_dir)
+        yield from files
+        # Push in reverse so subdirectories are visited in sorted order
+        stack.extend(reversed(subdirs))
+
+
+def _scan_tree_parallel(directory, prune_dir, max_workers):
+    """
+    Walk a directory tree like _scan_tree, listing up to max_workers directories at once.
+
+    Each listing task submits the listings of its (non-pruned) subdirectories
+    as soon as it finishes, so the pool works ahead of the consumer. Results
+    are merged by consuming the listings depth-first in sorted order, which
+    gives exactly the same sequence as _scan_tree.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crawl-walk")
+    closed = False
+
+    def list_and_expand(dirpath, prefix):
+        files, subdirs = _list_dir(dirpath, prefix, prune_dir)
+        if closed:
+            return files, []
+        return files, [executor.submit(list_and_expand, path, rel) for path, rel in subdirs]
+
+    try:
+        stack = [executor.submit(list_and_expand, directory, "")]
+        while stack:
+            files, children = stack.pop().result()
+            yield from files
+            stack.extend(reversed(children))
+    finally:
+        # Stop expanding and drop queued listings if the consumer stops early
+        closed = True
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _prune_listed(entries, prune_dir):
+    """
+    Drop listed (relpath, entry) files that lie below a directory rejected by prune_dir.
+
+    Applies the same directory exclusions as _scan_tree to a flat file listing
+    (e.g. from the git index), checking each directory once.
+    """
+    pruned = {"": False}
+
+    def is_pruned(dirpath_rel):
+        if dirpath_rel not in pruned:
+            parent, _, name = dirpath_rel.rpartition(os.sep)
+            pruned[dirpath_rel] = is_pruned(parent) or prune_dir(dirpath_rel, name)
+        return pruned[dirpath_rel]
+
+    for relpath, entry in entries:
+        if not is_pruned(os.path.dirname(relpath)):
+            yield relpath, entry
+
+
+def _read_candidate(relpath, entry, manifest=None):
+    """
+    Read one matched file as text.
+
+    The file's first bytes are sniffed before the full read, so binary and
+    non-UTF-8 files are skipped without being loaded. With a manifest, unchanged
+    files are served from its blob store and new content is added to it.
+
+    Args:
+        relpath (str): Key of the file in the crawl result / manifest
+        entry (os.DirEntry or GitFileEntry): Directory entry of the file (its cached stat
+            is reused). A GitFileEntry's index blob SHA, when set, is used as the cache key.
+        manifest (CrawlManifest, optional): Manifest of the previous crawl
+
+    Returns:
+        tuple: (content, skip_reason, manifest_record). content is None when the file
+               was skipped; manifest_record is (size, mtime_ns, sha, reused) or None.
+    """
+    data = None
+    # Blob SHA from the git index for files unchanged in the working tree
+    sha = getattr(entry, "sha", None)
+    if manifest:
+        try:
+            st = entry.stat()
+        except OSError as e:
+            print(f"Warning: Could not stat file {entry.path}: {e}")
+            return None, SKIP_READ_ERROR, None
+        sha = sha or manifest.lookup(relpath, st.st_size, st.st_mtime_ns)
+        data = manifest.read_blob(sha) if sha else None
+
+    reused = data is not None
+    if reused:
+        encoding, skip_reason = sniff_encoding(data[:SNIFF_BYTES])
+    else:
+        data, encoding, skip_reason = read_sniffed(entry.path)
+    if skip_reason:
+        return None, skip_reason, None
+
+    try:
+        content = decode_text(data, encoding)
+    except UnicodeDecodeError as e:
+        print(f"Warning: Could not decode file {entry.path}: {e}")
+        return None, SKIP_DECODE_ERROR, None
+
+    record = None
+    if manifest:
+        if not reused:
+            sha = sha or blob_sha(data)
+            try:
+                manifest.write_blob(sha, data)
+            except OSError as e:
+                print(f"Warning: Could not cache content of {entry.path}: {e}")
+        record = (st.st_size, st.st_mtime_ns, sha, reused)
+    return content, None, record
+
+
+def _ordered_reads(candidates, read_file, max_workers):
+    """
+    Read candidates on a bounded thread pool, yielding (candidate, result) in input order.
+
+    At most 2 * max_workers reads are in flight, so candidates can be produced
+    lazily (walking continues while earlier files are being read) and memory
+    stays bounded when the consumer is slower than the readers.
+    """
+    if not max_workers or max_workers <= 1:
+        for candidate in candidates:
+            yield candidate, read_file(candidate)
+        return
+
+    window = 2 * max_workers
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for candidate in candidates:
+            pending.append((candidate, executor.submit(read_file, candidate)))
+            if len(pending) >= window:
+                candidate, future = pending.popleft()
+                yield candidate, future.result()
+        while pending:
+            candidate, future = pending.popleft()
+            yield candidate, future.result()
+
+
+def _sniff_candidate(relpath, entry):
+    """
+    Check one matched file from its first bytes and hash it, without keeping its content.
+
+    Used for lazy crawls: the returned FileRecord reads and decodes the file
+    only when its content is asked for.
+
+    Returns:
+        tuple: (record, skip_reason, None), the same shape as _read_candidate
+    """
+    try:
+        st = entry.stat()
+        with open(entry.path, "rb") as f:
+            prefix = f.read(SNIFF_BYTES)
+            encoding, skip_reason = sniff_encoding(prefix)
+            if skip_reason:
+                return None, skip_reason, None
+            # The git index already has the blob SHA of unmodified tracked files
+            sha = getattr(entry, "sha", None) or blob_sha_of_file(f, st.st_size, prefix)
+    except OSError as e:
+        print(f"Warning: Could not read file {entry.path}: {e}")
+        return None, SKIP_READ_ERROR, None
+    return FileRecord(relpath, text_file_loader(entry.path, encoding), size=st.st_size, sha=sha), None, None
+
+
+def _manifest_blob_loader(manifest, sha):
+    """Loader for a lazy record whose content is in the manifest's blob store."""
+    def load():
+        data = manifest.read_blob(sha)
+        if data is None:
+            return None
+        encoding, skip_reason = sniff_encoding(data[:SNIFF_BYTES])
+        try:
+            return None if skip_reason else decode_text(data, encoding)
+        except UnicodeDecodeError:
+            return None
+    return load
+
+
+def iter_local_files(
     directory,
     include_patterns=None,
     exclude_patterns=None,
     max_file_size=None,
     use_relative_paths=True,
+    max_workers=DEFAULT_READ_WORKERS,
+    manifest_dir=None,
+    stats=None,
+    content_hashes=None,
+    use_git_index=False,
+    lazy=False,
+    walk_workers=DEFAULT_WALK_WORKERS,
 ):
     """
-    Crawl files in a local directory with similar interface as crawl_github_files.
+    Crawl a local directory, yielding (filepath, content) as soon as each file is read.
+
+    Directory walking and pattern filtering happen on the consuming thread; the
+    matched files are read by a bounded thread pool while the walk continues.
+    Directories and files are visited in sorted order and records are yielded in
+    that order, so the output is deterministic.
+
     Args:
         directory (str): Path to local directory
         include_patterns (set): File patterns to include (e.g. {"*.py", "*.js"})
         exclude_patterns (set): File patterns to exclude (e.g. {"tests/*"})
         max_file_size (int): Maximum file size in bytes
         use_relative_paths (bool): Whether to use paths relative to directory
+        max_workers (int): Maximum number of threads reading files (1 reads sequentially)
+        manifest_dir (str, optional): Directory holding an incremental crawl manifest
+            (see utils.crawl_manifest). Files whose size and mtime are unchanged since
+            the previous crawl are served from the manifest's content cache.
+        stats (dict, optional): Filled with crawl statistics as the crawl progresses
+            (see crawl_local_files)
+        content_hashes (dict, optional): Filled with {filepath: git blob SHA} for files
+            whose hash is known (all files with a manifest, unmodified tracked files
+            with use_git_index)
+        use_git_index (bool): If directory is in a git working tree, list tracked and
+            untracked-but-not-ignored files from the git index (see utils.git_index)
+            instead of walking the filesystem
+        lazy (bool): Yield utils.file_records.FileRecord objects instead of content. Files
+            are only sniffed and hashed during the crawl and are read again when their
+            content is asked for (from the manifest's blob store if a manifest is used).
+        walk_workers (int): Number of directories listed concurrently (1 walks sequentially).
+            The walk order, and therefore the output, does not depend on it.
 
-    Returns:
-        dict: {"files": {filepath: content}}
+    Yields:
+        tuple: (filepath, content), or (filepath, FileRecord) when lazy
     """
     if not os.path.isdir(directory):
         raise ValueError(f"Directory does not exist: {directory}")
 
-    files_dict = {}
+    if stats is None:
+        stats = {}
+    # Number of matched files skipped, by reason (see utils.file_sniffing)
+    skipped_by_reason = {}
+    stats.update({
+        "downloaded_count": 0,
+        "skipped_count": 0,
+        "skipped_by_reason": skipped_by_reason,
+        "source": "local_dir",
+    })
+
+    if use_git_index and not is_git_work_tree(directory):
+        print(f"Warning: {directory} is not a git working tree, walking the filesystem instead")
+        use_git_index = False
 
     # --- Load .gitignore ---
+    # (the git index listing already applies every .gitignore)
     gitignore_path = os.path.join(directory, ".gitignore")
     gitignore_spec = None
-    if os.path.exists(gitignore_path):
+    if not use_git_index and os.path.exists(gitignore_path):
         try:
             with open(gitignore_path, "r", encoding="utf-8") as f:
                 gitignore_patterns = f.readlines()
@@ -48,47 +336,48 @@ def crawl_local_files(
     # print(f"Include patterns: {include_patterns}")
     # print(f"Exclude patterns: {exclude_patterns}")
 
-    for root, dirs, files in os.walk(directory):
-        # Filter directories using .gitignore and exclude_patterns early to avoid descending
-        # Need to process dirs list *in place* for os.walk to respect it
-        excluded_dirs = set()
-        for d in dirs:
-            dirpath_rel = os.path.relpath(os.path.join(root, d), directory)
-
-            # Check against .gitignore (important for directories)
-            if gitignore_spec and gitignore_spec.match_file(dirpath_rel):
-                excluded_dirs.add(d)
-                continue  # Skip further checks if gitignored
-
-            # Check against standard exclude_patterns
-            if exclude_patterns:
-                for pattern in exclude_patterns:
-                    # Match pattern against full relative path or directory name itself
-                    pattern_matches = (
-                        fnmatch.fnmatch(dirpath_rel, pattern) or 
-                        fnmatch.fnmatch(d, pattern) or
-                        # Handle double-star patterns
-                        (pattern.startswith("**/") and fnmatch.fnmatch(dirpath_rel, pattern[3:]))
-                    )
-                    if pattern_matches:
-                        excluded_dirs.add(d)
-                        break
-
-        # Modify dirs in-place: remove excluded ones
-        # Iterate over a copy (.copy()) because we are modifying the list during iteration
-        for d in dirs.copy():
-            if d in excluded_dirs:
-                dirs.remove(d)
-
-        # Now process files in the non-excluded directories
-        for filename in files:
-            filepath = os.path.join(root, filename)
+    # Compile patterns once (cached across crawls with the same pattern lists).
+    # Directories are also matched by name; files are matched by path only.
+    include_matcher = compile_patterns(include_patterns, literal_affixes=True) if include_patterns else None
+    exclude_dir_matcher = compile_patterns(exclude_patterns) if exclude_patterns else None
+    exclude_file_matcher = compile_patterns(exclude_patterns, match_basename=False) if exclude_patterns else None
+    # "<dir>/**" patterns exclude everything below a directory, so such directories are pruned too
+    exclude_subtree_matcher = compile_subtree_patterns(exclude_patterns) if exclude_patterns else None
+
+    def prune_dir(dirpath_rel, name):
+        """Decide whether to skip a directory before descending into it"""
+        # Check against .gitignore (important for directories). The trailing-slash form
+        # also catches directory-only patterns such as "build/".
+        if gitignore_spec and (
+            gitignore_spec.match_file(dirpath_rel) or gitignore_spec.match_file(dirpath_rel + "/")
+        ):
+            return True
+        # Check against standard exclude_patterns (full relative path, dir name or **/ stripped)
+        if exclude_dir_matcher and exclude_dir_matcher.matches(dirpath_rel, name):
+            return True
+        return bool(exclude_subtree_matcher and exclude_subtree_matcher.matches(dirpath_rel, name))
+
+    def candidates():
+        """Yield (relpath, DirEntry) for files passing the .gitignore, pattern and size filters"""
+        if use_git_index:
+            listed, git_counts = list_git_files(directory)
+            print(
+                "Listed {tracked} tracked and {untracked} untracked files "
+                "({modified} modified) from the git index".format(**git_counts)
+            )
+            stats.update({"source": "git_index", "git_index": git_counts})
+            entries = _prune_listed(listed, prune_dir)
+        elif walk_workers and walk_workers > 1:
+            entries = _scan_tree_parallel(directory, prune_dir, walk_workers)
+        else:
+            entries = _scan_tree(directory, prune_dir)
+
+        for rel_to_root, entry in entries:
+            filename = entry.name
+            filepath = entry.path
 
             # Get path relative to directory if requested
-            if use_relative_paths:
-                relpath = os.path.relpath(filepath, directory)
-            else:
-                relpath = filepath
+            relpath = rel_to_root if use_relative_paths else filepath
 
             # --- Exclusion check ---
             excluded = False
@@ -98,30 +387,13 @@ def crawl_local_files(
                 # print(f"Excluded by gitignore: {relpath}")
 
             # 2. Check standard exclude_patterns if not already excluded by .gitignore
-            if not excluded and exclude_patterns:
-                for pattern in exclude_patterns:
-                    if (fnmatch.fnmatch(relpath, pattern) or
-                        (pattern.startswith("**/") and fnmatch.fnmatch(relpath, pattern[3:]))):
-                        excluded = True
-                        # print(f"Excluded by pattern {pattern}: {relpath}")
-                        break
+            if not excluded and exclude_file_matcher:
+                excluded = exclude_file_matcher.matches(relpath, filename)
 
             # --- Inclusion check ---
-            included = False
-            if include_patterns:
-                for pattern in include_patterns:
-                    # Multiple ways to match the pattern
-                    if (fnmatch.fnmatch(relpath, pattern) or  # Full path match
-                        fnmatch.fnmatch(filename, pattern) or  # Just filename match
-                        # Special handling for directory-based patterns like **/src/**/*.java
-                        (pattern.startswith("**/") and fnmatch.fnmatch(relpath, pattern[3:])) or
-                        # Try with just the extension for *.ext type patterns
-                        (pattern.startswith("*.") and filename.endswith(pattern[1:])) or
-                        # Handle patterns like **/src/**/*
-                        (pattern.endswith("/*") and relpath.startswith(pattern[:-1]))):
-                        included = True
-                        # print(f"Included by pattern {pattern}: {relpath}")
-                        break
+            # Full path, file name, **/ stripped, *.ext and dir/* matches (see utils.file_patterns)
+            if include_matcher:
+                included = include_matcher.matches(relpath, filename)
             else:
                 # If no include patterns, include everything *not excluded*
                 included = True
@@ -131,20 +403,125 @@ def crawl_local_files(
                 # print(f"Skipping {relpath}: included={included}, excluded={excluded}")
                 continue
 
-            # Check file size
-            if max_file_size and os.path.getsize(filepath) > max_file_size:
-                # print(f"Skipping {relpath}: size {os.path.getsize(filepath)} exceeds limit {max_file_size}")
-                continue
+            # Check file size (DirEntry caches the stat result for the reader)
+            if max_file_size:
+                try:
+                    if entry.stat().st_size > max_file_size:
+                        # print(f"Skipping {relpath}: size {entry.stat().st_size} exceeds limit {max_file_size}")
+                        skipped_by_reason[SKIP_TOO_LARGE] = skipped_by_reason.get(SKIP_TOO_LARGE, 0) + 1
+                        stats["skipped_count"] += 1
+                        continue
+                except OSError as e:
+                    print(f"Warning: Could not stat file {filepath}: {e}")
+                    skipped_by_reason[SKIP_READ_ERROR] = skipped_by_reason.get(SKIP_READ_ERROR, 0) + 1
+                    stats["skipped_count"] += 1
+                    continue
 
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    content = f.read()
-                files_dict[relpath] = content
-                # print(f"Added {relpath}")
-            except Exception as e:
-                print(f"Warning: Could not read file {filepath}: {e}")
-
-    return {"files": files_dict}
+            yield relpath, entry
+
+    # --- Read matched files in parallel while walking ---
+    manifest = CrawlManifest(manifest_dir) if manifest_dir else None
+    if lazy and not manifest:
+        read_file = lambda candidate: _sniff_candidate(*candidate)
+    else:
+        read_file = lambda candidate: _read_candidate(*candidate, manifest=manifest)
+
+    for (relpath, entry), (content, skip_reason, record) in _ordered_reads(candidates(), read_file, max_workers):
+        if skip_reason:
+            skipped_by_reason[skip_reason] = skipped_by_reason.get(skip_reason, 0) + 1
+            stats["skipped_count"] += 1
+            continue
+        if record:
+            manifest.record(relpath, *record)
+            if lazy:
+                # The manifest crawl had to read the file; drop the text and serve it from the blob store
+                size, _, sha, _ = record
+                content = FileRecord(relpath, _manifest_blob_loader(manifest, sha), size=size, sha=sha)
+        elif isinstance(content, FileRecord):
+            if content_hashes is not None:
+                content_hashes[relpath] = content.sha
+        elif content_hashes is not None and getattr(entry, "sha", None):
+            content_hashes[relpath] = entry.sha
+        stats["downloaded_count"] += 1
+        yield relpath, content
+
+    if skipped_by_reason:
+        print("Skipped files: " + ", ".join(f"{count} {reason}" for reason, count in sorted(skipped_by_reason.items())))
+
+    # Only a complete crawl updates the manifest (an abandoned stream would look like deletions)
+    if manifest:
+        incremental = manifest.save()
+        print(
+            "Incremental crawl: {reused} reused, {changed} changed, "
+            "{added} added, {deleted} deleted".format(**incremental)
+        )
+        stats["incremental"] = incremental
+        if content_hashes is not None:
+            content_hashes.update((relpath, entry["sha"]) for relpath, entry in manifest.current.items())
+
+
+def crawl_local_files(
+    directory,
+    include_patterns=None,
+    exclude_patterns=None,
+    max_file_size=None,
+    use_relative_paths=True,
+    max_workers=DEFAULT_READ_WORKERS,
+    manifest_dir=None,
+    use_git_index=False,
+    lazy=False,
+    walk_workers=DEFAULT_WALK_WORKERS,
+):
+    """
+    Crawl files in a local directory with similar interface as crawl_github_files.
+
+    Collects iter_local_files into a dict; see it for how walking and reading overlap.
+
+    Args:
+        directory (str): Path to local directory
+        include_patterns (set): File patterns to include (e.g. {"*.py", "*.js"})
+        exclude_patterns (set): File patterns to exclude (e.g. {"tests/*"})
+        max_file_size (int): Maximum file size in bytes
+        use_relative_paths (bool): Whether to use paths relative to directory
+        max_workers (int): Maximum number of threads reading files (1 reads sequentially)
+        manifest_dir (str, optional): Directory holding an incremental crawl manifest
+            (see utils.crawl_manifest). Files whose size and mtime are unchanged since
+            the previous crawl are served from the manifest's content cache.
+        use_git_index (bool): List files from the git index instead of walking the
+            filesystem when directory is in a git working tree
+        lazy (bool): Map paths to lazy FileRecords instead of content (see iter_local_files)
+        walk_workers (int): Number of directories listed concurrently (1 walks sequentially)
+
+    Returns:
+        dict: {"files": {filepath: content}, "stats": {...}}. stats["skipped_by_reason"]
+              counts matched files that were not returned (too_large, binary, non_utf8,
+              decode_error, read_error). When a manifest is used,
+              stats["incremental"] has reused/changed/added/deleted counts and
+              "content_hashes" maps each file to its git blob SHA (with use_git_index,
+              unmodified tracked files). stats["git_index"] has tracked/untracked/
+              modified counts when the git index was used.
+    """
+    stats = {}
+    content_hashes = {} if manifest_dir or use_git_index or lazy else None
+    files_dict = dict(iter_local_files(
+        directory,
+        include_patterns=include_patterns,
+        exclude_patterns=exclude_patterns,
+        max_file_size=max_file_size,
+        use_relative_paths=use_relative_paths,
+        max_workers=max_workers,
+        manifest_dir=manifest_dir,
+        stats=stats,
+        content_hashes=content_hashes,
+        use_git_index=use_git_index,
+        lazy=lazy,
+        walk_workers=walk_workers,
+    ))
+
+    result = {"files": files_dict, "stats": stats}
+    if content_hashes is not None:
+        result["content_hashes"] = content_hashes
+    return result
 
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+import os
+import json
+import hashlib
+import tempfile
+
+# Root directory for per-project crawl manifests and their cached file contents
+DEFAULT_MANIFEST_ROOT = os.getenv("CRAWL_MANIFEST_DIR", os.path.join("cache", "crawl_manifests"))
+
+MANIFEST_VERSION = 1
+
+
+def blob_sha(data):
+    """
+    Compute the git blob SHA-1 of some bytes.
+
+    Using git's object id as the content hash means hashes recorded by the
+    crawler are interchangeable with the blob SHAs found in a git index or tree.
+    """
+    header = f"blob {len(data)}\0".encode("ascii")
+    return hashlib.sha1(header + data).hexdigest()
+
+
+def blob_sha_of_file(f, size, prefix=b"", chunk_size=1024 * 1024):
+    """
+    Compute the git blob SHA-1 of an open binary file without holding its content.
+
+    Args:
+        f: File object positioned right after prefix
+        size (int): Total file size in bytes (from stat)
+        prefix (bytes): Bytes already read from the start of the file
+        chunk_size (int): Read size for the remaining bytes
+    """
+    digest = hashlib.sha1(f"blob {size}\0".encode("ascii"))
+    digest.update(prefix)
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_dir_for(directory, root=None):
+    """
+    Get the manifest directory for a crawled local directory.
+
+    The name combines the directory's base name (for readability) with a hash of
+    its absolute path, so two projects with the same folder name don't collide.
+    """
+    abs_dir = os.path.abspath(directory)
+    digest = hashlib.sha1(abs_dir.encode("utf-8")).hexdigest()[:12]
+    name = os.path.basename(abs_dir.rstrip(os.sep)) or "root"
+    return os.path.join(root or DEFAULT_MANIFEST_ROOT, f"{name}-{digest}")
+
+
+class CrawlManifest:
+    """
+    On-disk record of a previous crawl: (relative path, size, mtime_ns, blob SHA)
+    per file, plus a content-addressed store of the file contents.
+
+    A file whose size and mtime_ns match its manifest entry is considered
+    unchanged and its content is served from the blob store instead of being
+    re-read from the (possibly slow, network-backed) source directory.
+
+    lookup/read_blob/write_blob are safe to call from reader threads; record()
+    and save() are meant to be called from the crawling thread.
+    """
+
+    def __init__(self, manifest_dir):
+        self.manifest_dir = manifest_dir
+        self.manifest_path = os.path.join(manifest_dir, "manifest.json")
+        self.blobs_dir = os.path.join(manifest_dir, "blobs")
+        self.previous = self._load()
+        self.current = {}
+        self.stats = {"reused": 0, "changed": 0, "added": 0, "deleted": 0}
+
+    def _load(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                print(f"Ignoring crawl manifest {self.manifest_path} with unsupported version")
+                return {}
+            return data.get("files", {})
+        except Exception as e:
+            print(f"Warning: Could not read crawl manifest {self.manifest_path}: {e}")
+            return {}
+
+    def _blob_path(self, sha):
+        return os.path.join(self.blobs_dir, sha[:2], sha)
+
+    def lookup(self, relpath, size, mtime_ns):
+        """Return the blob SHA recorded for an unchanged file, or None."""
+        entry = self.previous.get(relpath)
+        if entry and entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+            return entry["sha"]
+        return None
+
+    def read_blob(self, sha):
+        """Read cached content for a blob SHA, or None if it is not in the store."""
+        try:
+            with open(self._blob_path(sha), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def write_blob(self, sha, data):
+        """Store content under its blob SHA (no-op if already stored)."""
+        blob_path = self._blob_path(sha)
+        if os.path.exists(blob_path):
+            return
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        # Write to a temp file first so concurrent readers never see partial blobs
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, blob_path)
+
+    def record(self, relpath, size, mtime_ns, sha, reused):
+        """Record a file seen in this crawl and update the change counters."""
+        self.current[relpath] = {"size": size, "mtime_ns": mtime_ns, "sha": sha}
+        if reused:
+            self.stats["reused"] += 1
+        elif relpath in self.previous:
+            self.stats["changed"] += 1
+        else:
+            self.stats["added"] += 1
+
+    def save(self):
+        """
+        Write the manifest for this crawl and drop blobs it no longer references.
+
+        Returns:
+            dict: Counts of reused, changed, added and deleted files
+        """
+        self.stats["deleted"] = sum(1 for relpath in self.previous if relpath not in self.current)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.manifest_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.current}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+        # Garbage-collect blobs of deleted/changed files
+        referenced = {entry["sha"] for entry in self.current.values()}
+        if os.path.isdir(self.blobs_dir):
+            for prefix in os.listdir(self.blobs_dir):
+                prefix_dir = os.path.join(self.blobs_dir, prefix)
+                for sha in os.listdir(prefix_dir):
+                    if sha not in referenced:
+                        try:
+                            os.remove(os.path.join(prefix_dir, sha))
+                        except OSError:
+                            pass
+        return dict(self.stats)
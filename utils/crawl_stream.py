@@ -0,0 +1,72 @@
+import queue
+import threading
+
+# Default number of crawled files buffered ahead of the consumer
+DEFAULT_PREFETCH = 200
+
+_DONE = object()
+
+
+class _Failure:
+    """Wraps an exception raised by the producer so it can be re-raised by the consumer."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def prefetch(iterable, max_items=DEFAULT_PREFETCH):
+    """
+    Consume an iterable on a background thread, buffering up to max_items ahead.
+
+    Used to overlap crawling (network/disk I/O) with analysis: the producer
+    keeps fetching while the consumer processes earlier records, and blocks
+    once max_items records are waiting. Exceptions raised by the producer are
+    re-raised in the consumer. Closing the returned generator early stops the
+    producer at its next record.
+
+    Args:
+        iterable: Source of records, e.g. iter_local_files(...) or iter_github_files(...)
+        max_items (int): Maximum number of records buffered ahead of the consumer
+
+    Yields:
+        Records from the iterable, in order
+    """
+    buffer = queue.Queue(maxsize=max(1, max_items))
+    stop = threading.Event()
+
+    def put(item):
+        # Poll so the producer notices when the consumer has gone away
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            # Run the source generator's cleanup (e.g. thread pools, temp dirs) on this thread
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    producer = threading.Thread(target=produce, name="crawl-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the parts of the GitHub API the crawler uses.
+
+Serves one repository from a fixture directory (every regular file under it,
+at a single commit of one branch) over HTTP:
+
+    {api_url}/repos/{owner}/{repo}                      metadata (default branch, size)
+    {api_url}/repos/{owner}/{repo}/branches
+    {api_url}/repos/{owner}/{repo}/commits/{ref}        JSON, or the bare SHA with the sha media type
+    {api_url}/repos/{owner}/{repo}/git/trees/{sha}      ?recursive=1 listing
+    {api_url}/repos/{owner}/{repo}/contents/{path}
+    {api_url}/repos/{owner}/{repo}/tarball/{ref}        redirects to a gzipped tar, like codeload
+    {api_url}/orgs/{owner}/repos                        paged (per_page, page, Link header)
+    {api_url}/rate_limit
+    {raw_url}/{owner}/{repo}/{ref}/{path}
+
+API responses carry X-RateLimit-* headers counted per token (a 403 with
+X-RateLimit-Remaining: 0 once a token's quota is used up) and every 200 has
+an ETag honoured by If-None-Match (304s don't use quota). Latency and
+secondary rate limit responses (429, or 403 with Retry-After) can be
+injected, at random or for the next N requests.
+
+Point the crawler at it with the GITHUB_API_URL and GITHUB_RAW_URL
+environment variables (or the module constants of the same name in
+utils.crawl_github_files).
+
+Usage:
+    python utils/fake_github_server.py FIXTURE_DIR --port 8787 --latency-ms 20
+"""
+import io
+import os
+import json
+import time
+import gzip
+import random
+import hashlib
+import tarfile
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote, quote
+
+SHA_MEDIA_TYPE = "application/vnd.github.sha"
+
+
+def git_blob_sha(data):
+    """The SHA git gives a blob with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def load_fixture(fixture_dir):
+    """Read every regular file under fixture_dir into {relative path: bytes}, in sorted order."""
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(fixture_dir):
+        dirnames[:] = sorted(d for d in dirnames if d != ".git")
+        for filename in sorted(filenames):
+            full = os.path.join(dirpath, filename)
+            if os.path.islink(full) or not os.path.isfile(full):
+                continue
+            rel_path = os.path.relpath(full, fixture_dir).replace(os.sep, "/")
+            with open(full, "rb") as f:
+                files[rel_path] = f.read()
+    return files
+
+
+class FakeGitHubServer:
+    """
+    Serve a fixture directory as a GitHub repository on a local port.
+
+    Used as a context manager (or start()/stop()), it runs a threaded HTTP
+    server in the background; api_url and raw_url are its base URLs. counts
+    tallies the requests served by kind ("branches", "tree", "raw", ...,
+    plus "not_modified", "throttled" and "quota_exceeded").
+
+    Args:
+        fixture_dir (str): Directory whose files form the repository
+        owner (str), repo (str), branch (str): Names the repository is served under
+        port (int): Port to listen on (0 picks a free one)
+        latency (float): Seconds added to every request
+        rate_limit (int): API requests allowed per token (and for anonymous requests) per window
+        error_rate (float): Fraction of requests answered with error_status instead, at random
+        error_status (int): 429, or 403 for a secondary rate limit 403
+        retry_after (int): Retry-After seconds sent with injected errors
+        truncate_trees (bool): Mark recursive tree listings as truncated, as GitHub does for
+                               very large repositories
+        seed (int): Seed of the error injection, so runs are repeatable
+        other_repos (list): Metadata dicts of further repositories of the owner, only shown in
+                            its organization listing (name, pushed_at, fork, archived, ...)
+    """
+
+    def __init__(self, fixture_dir, owner="octo", repo="fixture", branch="main", port=0, latency=0.0,
+                 rate_limit=5000, error_rate=0.0, error_status=429, retry_after=1, truncate_trees=False,
+                 seed=0, other_repos=None):
+        self.owner = owner
+        self.repo = repo
+        self.branch = branch
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.truncate_trees = truncate_trees
+        self.pushed_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self.other_repos = other_repos or []
+        self.files = load_fixture(fixture_dir)
+        self.blob_shas = {path: git_blob_sha(data) for path, data in self.files.items()}
+        listing = "".join(f"{path}\0{sha}\n" for path, sha in self.blob_shas.items())
+        self.tree_sha = hashlib.sha1(("tree\n" + listing).encode("utf-8")).hexdigest()
+        self.commit_sha = hashlib.sha1(("commit\n" + self.tree_sha).encode("utf-8")).hexdigest()
+        self.reset_at = int(time.time()) + 3600
+        self.counts = {}
+        self._remaining = {}
+        self._forced_errors = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tarball = None
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self):
+        return self.base_url + "/api"
+
+    @property
+    def raw_url(self):
+        return self.base_url + "/raw"
+
+    @property
+    def repo_url(self):
+        """URL of the repository as the crawler takes it (owner and repo are all it parses)."""
+        return f"{self.base_url}/{self.owner}/{self.repo}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05},
+                                        name="fake-github", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def inject_errors(self, count, status=None, path_prefix=""):
+        """Answer the next count requests whose path starts with path_prefix with a secondary rate limit."""
+        with self._lock:
+            self._forced_errors.append([path_prefix, status or self.error_status, count])
+
+    def request_count(self):
+        """HTTP requests received, of every kind (a tarball is two: the API redirect and the download)."""
+        with self._lock:
+            return sum(self.counts.values())
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts.clear()
+            self._remaining.clear()
+
+    def _count(self, kind):
+        with self._lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def _injected_error(self, path):
+        with self._lock:
+            for forced in self._forced_errors:
+                if forced[2] > 0 and path.startswith(forced[0]):
+                    forced[2] -= 1
+                    return forced[1]
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self.error_status
+        return None
+
+    def _use_quota(self, token):
+        """Count one API request against a token; returns the remaining quota (-1 once exhausted)."""
+        with self._lock:
+            remaining = self._remaining.get(token, self.rate_limit)
+            if remaining <= 0:
+                return -1
+            self._remaining[token] = remaining - 1
+            return remaining - 1
+
+    def _tarball_bytes(self):
+        with self._lock:
+            if self._tarball is None:
+                buffer = io.BytesIO()
+                top = f"{self.owner}-{self.repo}-{self.commit_sha[:7]}"
+                with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+                    for path, data in self.files.items():
+                        info = tarfile.TarInfo(f"{top}/{path}")
+                        info.size = len(data)
+                        info.mtime = 0
+                        archive.addfile(info, io.BytesIO(data))
+                self._tarball = buffer.getvalue()
+            return self._tarball
+
+    def _resolve(self, ref):
+        ref = unquote(ref)
+        return self.commit_sha if ref in (self.branch, self.commit_sha, "HEAD") else None
+
+    def _tree_entries(self, recursive):
+        entries, dirs = [], set()
+        for path, data in self.files.items():
+            parts = path.split("/")
+            for i in range(1, len(parts)):
+                directory = "/".join(parts[:i])
+                if directory not in dirs:
+                    dirs.add(directory)
+                    entries.append({"path": directory, "mode": "040000", "type": "tree",
+                                    "sha": hashlib.sha1(directory.encode("utf-8")).hexdigest()})
+            entries.append({"path": path, "mode": "100644", "type": "blob", "sha": self.blob_shas[path],
+                            "size": len(data)})
+        if not recursive:
+            entries = [entry for entry in entries if "/" not in entry["path"]]
+        return entries
+
+    def _contents(self, path, ref):
+        """Contents API listing of a directory (or one file object), or None if it doesn't exist."""
+        path = path.strip("/")
+        raw_base = f"{self.raw_url}/{self.owner}/{self.repo}/{ref}"
+
+        def item(item_path, kind, size=0):
+            return {
+                "name": item_path.rsplit("/", 1)[-1], "path": item_path, "type": kind, "size": size,
+                "sha": self.blob_shas.get(item_path, ""),
+                "url": f"{self.api_url}/repos/{self.owner}/{self.repo}/contents/{quote(item_path)}?ref={ref}",
+                "download_url": f"{raw_base}/{quote(item_path)}" if kind == "file" else None,
+            }
+
+        if path in self.files:
+            return item(path, "file", len(self.files[path]))
+        prefix = path + "/" if path else ""
+        children = {}
+        for file_path, data in self.files.items():
+            if not file_path.startswith(prefix):
+                continue
+            child, _, rest = file_path[len(prefix):].partition("/")
+            child_path = prefix + child
+            if child_path not in children:
+                children[child_path] = item(child_path, "dir") if rest else item(child_path, "file", len(data))
+        return list(children.values()) if children else None
+
+    def _repo_metadata(self):
+        size_kb = max(sum(len(data) for data in self.files.values()) // 1024, 1)
+        return {"name": self.repo, "full_name": f"{self.owner}/{self.repo}", "html_url": self.repo_url,
+                "default_branch": self.branch, "size": size_kb, "private": False, "fork": False,
+                "archived": False, "pushed_at": self.pushed_at}
+
+    def _org_repos(self, query):
+        """One page of the owner's repository listing, and its Link header."""
+        repos = [self._repo_metadata()] + [
+            {"full_name": f"{self.owner}/{repo['name']}", "html_url": f"{self.base_url}/{self.owner}/{repo['name']}",
+             "default_branch": self.branch, "fork": False, "archived": False, **repo}
+            for repo in self.other_repos
+        ]
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        extra = {}
+        if page * per_page < len(repos):
+            extra["Link"] = (f'<{self.api_url}/orgs/{self.owner}/repos?per_page={per_page}&page={page + 1}>; '
+                             f'rel="next"')
+        return repos[(page - 1) * per_page:page * per_page], extra
+
+    def _route(self, path, query, headers):
+        """Map a request to (kind, status, body, extra headers); body is bytes, str or JSON-able."""
+        repo_prefix = f"/api/repos/{self.owner}/{self.repo}"
+        if path == "/api/rate_limit":
+            return "rate_limit", 200, {"resources": {"core": {"limit": self.rate_limit, "reset": self.reset_at}}}, {}
+        if path.startswith("/raw/"):
+            prefix = f"/raw/{self.owner}/{self.repo}/"
+            ref, _, file_path = path[len(prefix):].partition("/") if path.startswith(prefix) else ("", "", "")
+            file_path = unquote(file_path)
+            if self._resolve(ref) and file_path in self.files:
+                return "raw", 200, self.files[file_path], {"Content-Type": "text/plain; charset=utf-8"}
+            return "raw", 404, "404: Not Found", {}
+        if path == f"/codeload/{self.commit_sha}.tar.gz":
+            return "codeload", 200, self._tarball_bytes(), {"Content-Type": "application/x-gzip"}
+        if path == f"/api/orgs/{self.owner}/repos":
+            page, extra = self._org_repos(query)
+            return "org_repos", 200, page, extra
+        if not path.startswith(repo_prefix):
+            return "other", 404, {"message": "Not Found"}, {}
+
+        rest = path[len(repo_prefix):]
+        if rest in ("", "/"):
+            return "repo", 200, self._repo_metadata(), {}
+        if rest == "/branches":
+            return "branches", 200, [{"name": self.branch, "commit": {"sha": self.commit_sha}}], {}
+        if rest.startswith("/commits/"):
+            sha = self._resolve(rest[len("/commits/"):])
+            if sha is None:
+                return "commit", 404, {"message": "No commit found"}, {}
+            if SHA_MEDIA_TYPE in headers.get("Accept", ""):
+                return "commit", 200, sha, {}
+            return "commit", 200, {"sha": sha, "commit": {"tree": {"sha": self.tree_sha}}}, {}
+        if rest.startswith("/git/trees/"):
+            sha = unquote(rest[len("/git/trees/"):])
+            if sha not in (self.tree_sha, self.commit_sha) and self._resolve(sha) is None:
+                return "tree", 404, {"message": "Not Found"}, {}
+            recursive = query.get("recursive", ["0"])[0] not in ("0", "false", "")
+            return "tree", 200, {"sha": self.tree_sha, "tree": self._tree_entries(recursive),
+                                 "truncated": self.truncate_trees and recursive}, {}
+        if rest == "/contents" or rest.startswith("/contents/"):
+            ref = query.get("ref", [self.branch])[0]
+            contents = self._contents(unquote(rest[len("/contents"):]), ref) if self._resolve(ref) else None
+            if contents is None:
+                return "contents", 404, {"message": "Not Found"}, {}
+            return "contents", 200, contents, {}
+        if rest.startswith("/tarball/"):
+            sha = self._resolve(rest[len("/tarball/"):])
+            if sha is None:
+                return "tarball", 404, {"message": "Not Found"}, {}
+            return "tarball", 302, b"", {"Location": f"{self.base_url}/codeload/{sha}.tar.gz"}
+        return "other", 404, {"message": "Not Found"}, {}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like GitHub
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, headers):
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode("utf-8")
+                    headers.setdefault("Content-Type", "application/json; charset=utf-8")
+                elif isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                parsed = urlparse(self.path)
+                path, query = parsed.path, parse_qs(parsed.query)
+                is_api = path.startswith("/api/")
+                headers = {}
+
+                injected = server._injected_error(path)
+                if injected:
+                    server._count("throttled")
+                    message = "You have exceeded a secondary rate limit. Please wait a few minutes before you try again."
+                    return self._send(injected, {"message": message}, {"Retry-After": str(server.retry_after)})
+
+                if is_api:
+                    token = self.headers.get("Authorization", "").split(" ", 1)[-1] or None
+                    remaining = server._use_quota(token) if path != "/api/rate_limit" else None
+                    headers.update({"X-RateLimit-Limit": str(server.rate_limit),
+                                    "X-RateLimit-Reset": str(server.reset_at)})
+                    if remaining == -1:
+                        server._count("quota_exceeded")
+                        headers["X-RateLimit-Remaining"] = "0"
+                        return self._send(403, {"message": "API rate limit exceeded"}, headers)
+                    if remaining is not None:
+                        headers["X-RateLimit-Remaining"] = str(remaining)
+
+                kind, status, body, extra = server._route(path, query, self.headers)
+                headers.update(extra)
+                if status == 200:
+                    payload = body if isinstance(body, bytes) else (
+                        body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8"))
+                    etag = '"%s"' % hashlib.sha1(payload).hexdigest()
+                    headers["ETag"] = etag
+                    if self.headers.get("If-None-Match") == etag:
+                        server._count("not_modified")
+                        if is_api and "X-RateLimit-Remaining" in headers:
+                            # Conditional requests answered with 304 don't use quota
+                            with server._lock:
+                                server._remaining[token] = server._remaining.get(token, server.rate_limit) + 1
+                            headers["X-RateLimit-Remaining"] = str(int(headers["X-RateLimit-Remaining"]) + 1)
+                        return self._send(304, b"", headers)
+                    if kind == "raw" and "gzip" in self.headers.get("Accept-Encoding", ""):
+                        body = gzip.compress(payload)
+                        headers["Content-Encoding"] = "gzip"
+                server._count(kind)
+                self._send(status, body, headers)
+
+            do_HEAD = do_GET
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixture_dir")
+    parser.add_argument("--owner", default="octo")
+    parser.add_argument("--repo", default="fixture")
+    parser.add_argument("--branch", default="main")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429, choices=[403, 429])
+    parser.add_argument("--truncate-trees", action="store_true")
+    args = parser.parse_args()
+
+    server = FakeGitHubServer(args.fixture_dir, args.owner, args.repo, args.branch, args.port,
+                              latency=args.latency_ms / 1000.0, rate_limit=args.rate_limit,
+                              error_rate=args.error_rate, error_status=args.error_status,
+                              truncate_trees=args.truncate_trees)
+    print(f"Serving {len(server.files)} files of {args.fixture_dir} as {args.owner}/{args.repo}@{args.branch}")
+    print(f"  GITHUB_API_URL={server.api_url} GITHUB_RAW_URL={server.raw_url}")
+    print(f"  repository URL: {server.repo_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import shutil
+import threading
+
+# Predicted-vs-actual record of every GitHub crawl, one JSON object per line (see log_fetch)
+FETCH_STRATEGY_LOG = os.getenv("FETCH_STRATEGY_LOG", os.path.join("logs", "fetch_strategy.jsonl"))
+
+# Cost model behind select_strategy. Rough defaults; tune them from the log's
+# predicted_seconds vs actual_seconds.
+API_LATENCY_SECONDS = float(os.getenv("FETCH_API_LATENCY_SECONDS", "0.25"))  # one raw file request
+RAW_BYTES_PER_SECOND = float(os.getenv("FETCH_RAW_BYTES_PER_SECOND", str(2 * 1024 * 1024)))  # per connection
+TARBALL_SETUP_SECONDS = float(os.getenv("FETCH_TARBALL_SETUP_SECONDS", "1.5"))  # redirect + archive generation
+TARBALL_BYTES_PER_SECOND = float(os.getenv("FETCH_TARBALL_BYTES_PER_SECOND", str(16 * 1024 * 1024)))  # unpacked
+CLONE_SETUP_SECONDS = float(os.getenv("FETCH_CLONE_SETUP_SECONDS", "2.0"))  # git process, negotiation
+CLONE_BYTES_PER_SECOND = float(os.getenv("FETCH_CLONE_BYTES_PER_SECOND", str(8 * 1024 * 1024)))  # packfile
+
+STRATEGIES = ("raw_files", "tarball", "clone")
+
+_log_lock = threading.Lock()
+
+
+def predict_seconds(strategy, profile, download_workers=1):
+    """
+    Predicted time to fetch a crawl's selected files with one strategy, or None if unknown.
+
+    Args:
+        strategy (str): One of STRATEGIES
+        profile (dict): Repository profile (see select_strategy)
+        download_workers (int): Concurrent raw file downloads
+    """
+    selected_files = profile.get("selected_files")
+    selected_bytes = profile.get("selected_bytes") or 0
+    if strategy == "raw_files":
+        if selected_files is None:
+            return None
+        workers = max(download_workers, 1)
+        return selected_files * API_LATENCY_SECONDS / workers + selected_bytes / (RAW_BYTES_PER_SECOND * workers)
+    if strategy == "tarball":
+        # The archive holds every file of the commit, not just the selected ones
+        if profile.get("tree_bytes") is None:
+            return None
+        return TARBALL_SETUP_SECONDS + profile["tree_bytes"] / TARBALL_BYTES_PER_SECOND
+    if strategy == "clone":
+        if profile.get("mirror_exists"):
+            # Only the commits since the last crawl are fetched
+            return CLONE_SETUP_SECONDS
+        if profile.get("size_kb") is None:
+            return None
+        # The reported size is the whole history's pack, which a mirror clone downloads
+        return CLONE_SETUP_SECONDS + profile["size_kb"] * 1024 / CLONE_BYTES_PER_SECOND
+    raise ValueError(f"Unknown fetch strategy: {strategy}")
+
+
+def select_strategy(profile, download_workers=1, allowed=STRATEGIES):
+    """
+    Pick the fastest way to fetch a crawl's selected files.
+
+    Args:
+        profile (dict): What is known about the repository before fetching:
+            size_kb (repository size from its metadata), default_branch,
+            file_count and tree_bytes (all files of the commit), selected_files
+            and selected_bytes (files passing the patterns and size limit),
+            truncated (listing incomplete) and mirror_exists (a clone is cached)
+        download_workers (int): Concurrent raw file downloads
+        allowed (iterable): Strategies the caller can run
+
+    Returns:
+        tuple: (strategy, {strategy: predicted seconds or None}); strategy is None
+               if no allowed strategy has a prediction
+    """
+    allowed = list(allowed)
+    if "clone" in allowed and shutil.which("git") is None:
+        allowed.remove("clone")
+    if profile.get("truncated"):
+        # Without a complete listing the selection is unknown: only a clone can list everything
+        allowed = [strategy for strategy in allowed if strategy == "clone"]
+    predictions = {strategy: predict_seconds(strategy, profile, download_workers) for strategy in allowed}
+    known = {strategy: seconds for strategy, seconds in predictions.items() if seconds is not None}
+    if not known:
+        return None, predictions
+    return min(known, key=known.get), predictions
+
+
+def log_fetch(record):
+    """Append one crawl's strategy, profile, predicted and actual time to FETCH_STRATEGY_LOG."""
+    path = FETCH_STRATEGY_LOG
+    if not path:
+        return
+    record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), **record}
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _log_lock, open(path, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+    except OSError as e:
+        print(f"Could not write the fetch strategy log {path}: {e}")
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from utils.cloud_analyzer import (
+    architecture_mentions, merge_analyzer_results, detect_language_frameworks, check_hardcoded_secrets,
+    check_environment_variables, analyze_service_coupling, analyze_logging_practices, analyze_state_management,
+    analyze_code_modularity, analyze_dependency_management, detect_health_check_endpoints,
+    analyze_testing_coverage, analyze_instrumentation,
+)
+
+# Per-file findings of analyzed commits, shared by every process using the same path
+DEFAULT_FINDINGS_PATH = os.getenv("ANALYSIS_FINDINGS_PATH", os.path.join("cache", "file_findings.sqlite"))
+# Analyses kept per repository; older ones can no longer be the base of an incremental update
+FINDINGS_KEEP_PER_REPO = int(os.getenv("ANALYSIS_FINDINGS_KEEP_PER_REPO", "3"))
+
+# The rule-based analyzers, by the key their result has in a batch result (see merge_analyzer_results)
+ANALYZERS = {
+    "tech_analysis": detect_language_frameworks,
+    "secrets_analysis": check_hardcoded_secrets,
+    "env_vars_analysis": check_environment_variables,
+    "coupling_analysis": analyze_service_coupling,
+    "logging_analysis": analyze_logging_practices,
+    "state_management": analyze_state_management,
+    "modularity_analysis": analyze_code_modularity,
+    "dependency_analysis": analyze_dependency_management,
+    "health_check_analysis": detect_health_check_endpoints,
+    "testing_analysis": analyze_testing_coverage,
+    "instrumentation_analysis": analyze_instrumentation,
+}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _compact(value):
+    """Drop zero, False and empty entries (the merge treats missing keys as such)."""
+    if isinstance(value, dict):
+        kept = {key: _compact(item) for key, item in value.items()}
+        return {key: item for key, item in kept.items() if item not in (0, False, [], {}, None)}
+    return value
+
+
+def scan_file_findings(path, content):
+    """
+    Run every rule-based analyzer on one file.
+
+    Merging the findings of a set of files (merge_analyzer_results) gives the
+    same analyses as running the analyzers on the whole set.
+
+    Args:
+        path (str): File path, as in the analysis
+        content (str): File content
+
+    Returns:
+        dict: Analyzer results of the file, compacted for storage, plus "mentions"
+              (the ARCHITECTURE_CONTENT_PATTERNS its content matches)
+    """
+    files_data = [(path, content)]
+    return stored_findings({key: analyzer(files_data) for key, analyzer in ANALYZERS.items()},
+                           architecture_mentions(files_data))
+
+
+def stored_findings(results, mentions):
+    """
+    One file's findings as scan_file_findings returns them, from results computed elsewhere.
+
+    Args:
+        results (dict): The file's analyzer results, by ANALYZERS key
+        mentions (set): ARCHITECTURE_CONTENT_PATTERNS the file's content matches
+
+    Returns:
+        dict: The results compacted for storage, plus "mentions" if any
+    """
+    findings = _compact(results)
+    if mentions:
+        findings["mentions"] = sorted(mentions)
+    return findings
+
+
+def aggregate_findings(findings_by_path):
+    """
+    Merge per-file findings into the analyses of the whole set of files.
+
+    Returns:
+        dict: As merge_analyzer_results, with tech_analysis["content_mentions"] set
+              for analyze_architecture (the file list is left to the caller)
+    """
+    merged = merge_analyzer_results(findings_by_path.values())
+    merged["tech_analysis"]["content_mentions"] = {
+        mention for findings in findings_by_path.values() for mention in findings.get("mentions", [])
+    }
+    return merged
+
+
+class FindingsStore:
+    """
+    Per-file findings of analyzed commits in SQLite, so a later commit can be
+    analyzed by rescanning only the files that changed (see
+    utils.incremental_analysis).
+
+    Each analysis is stored under its evaluation ID with the repository, commit
+    and settings (patterns, size limit, LLM use) it was made with. Safe to use
+    from several threads and processes, like ResponseCache.
+    """
+
+    def __init__(self, path=DEFAULT_FINDINGS_PATH, keep_per_repo=FINDINGS_KEEP_PER_REPO):
+        self.path = path
+        self.keep_per_repo = keep_per_repo
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                " evaluation_id TEXT PRIMARY KEY, repo_url TEXT, commit_sha TEXT, project_name TEXT,"
+                " settings TEXT, created REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS analyses_repo ON analyses (repo_url, created)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS findings ("
+                " evaluation_id TEXT, path TEXT, findings TEXT, PRIMARY KEY (evaluation_id, path))"
+            )
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def save(self, evaluation_id, repo_url, commit_sha, project_name, settings, findings_by_path):
+        """
+        Store the findings of an analysis, dropping the repository's oldest beyond keep_per_repo.
+
+        Args:
+            evaluation_id (str): ID of the stored evaluation
+            repo_url (str): Repository URL the files were crawled from
+            commit_sha (str): Commit the files were read at
+            project_name (str): Project the evaluation belongs to
+            settings (dict): include_patterns, exclude_patterns, max_file_size and use_llm (no credentials)
+            findings_by_path (dict): path -> findings from scan_file_findings
+        """
+        repo_url = repo_url.rstrip("/")
+        with self._connection() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?)",
+                (evaluation_id, repo_url, commit_sha, project_name, json.dumps(settings), time.time()),
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO findings VALUES (?, ?, ?)",
+                [(evaluation_id, path, json.dumps(findings)) for path, findings in findings_by_path.items()],
+            )
+            stale = [row[0] for row in db.execute(
+                "SELECT evaluation_id FROM analyses WHERE repo_url = ? ORDER BY created DESC LIMIT -1 OFFSET ?",
+                (repo_url, self.keep_per_repo),
+            )]
+            for stale_id in stale:
+                db.execute("DELETE FROM findings WHERE evaluation_id = ?", (stale_id,))
+                db.execute("DELETE FROM analyses WHERE evaluation_id = ?", (stale_id,))
+
+    def latest(self, repo_url, commit_sha=None):
+        """
+        Most recent stored analysis of a repository (at a given commit, if set).
+
+        Returns:
+            dict: evaluation_id, repo_url, commit_sha, project_name and settings, or None
+        """
+        query = "SELECT evaluation_id, repo_url, commit_sha, project_name, settings FROM analyses WHERE repo_url = ?"
+        params = [repo_url.rstrip("/")]
+        if commit_sha:
+            query += " AND commit_sha = ?"
+            params.append(commit_sha)
+        row = self._connection().execute(query + " ORDER BY created DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        evaluation_id, repo_url, commit_sha, project_name, settings = row
+        return {"evaluation_id": evaluation_id, "repo_url": repo_url, "commit_sha": commit_sha,
+                "project_name": project_name, "settings": json.loads(settings)}
+
+    def load(self, evaluation_id):
+        """Findings of a stored analysis as {path: findings}."""
+        cursor = self._connection().execute(
+            "SELECT path, findings FROM findings WHERE evaluation_id = ?", (evaluation_id,)
+        )
+        return {path: json.loads(findings) for path, findings in cursor}
+
+    def stats(self):
+        analyses, files = self._connection().execute(
+            "SELECT (SELECT COUNT(*) FROM analyses), (SELECT COUNT(*) FROM findings)"
+        ).fetchone()
+        return {"analyses": analyses, "files": files}
+
+
+def get_findings_store(path=DEFAULT_FINDINGS_PATH):
+    """Get the process-wide FindingsStore for a path."""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = FindingsStore(path)
+        return _stores[path]
@@ -0,0 +1,158 @@
+import os
+import re
+import fnmatch
+import functools
+
+# Characters that make a glob pattern non-literal for fnmatch
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+# fnmatch.fnmatch normalizes case on case-insensitive platforms (Windows)
+_NORMALIZE_CASE = os.path.normcase("A") != "A"
+
+
+def _is_literal(text):
+    return not _GLOB_CHARS.search(text)
+
+
+class PatternSet:
+    """
+    A list of glob patterns compiled into a single matcher.
+
+    Matching has the same semantics as the crawlers' per-pattern fnmatch loops:
+    a path matches if any pattern matches the full path, the file name (when
+    ``match_basename`` is set) or, for ``**/`` patterns, the path with the
+    leading ``**/`` stripped. Instead of one fnmatch call per variant per
+    pattern, patterns are split into:
+
+    - a suffix table for extension globs such as ``*.py`` / ``**/*.py``
+    - a name table for literal ``**/Dockerfile``-style patterns
+    - one combined regex for the full path and one for the file name
+    """
+
+    def __init__(self, patterns, match_basename=True, literal_affixes=False):
+        self.patterns = tuple(patterns)
+        suffixes = set()
+        prefixes = set()
+        names = set()
+        path_regexes = []
+        name_regexes = []
+
+        for pattern in self.patterns:
+            if _NORMALIZE_CASE:
+                pattern = os.path.normcase(pattern)
+            stripped = pattern[3:] if pattern.startswith("**/") else pattern
+
+            # "*.ext" or "**/*.ext": full path, name and stripped matches all reduce to endswith
+            if stripped.startswith("*.") and "/" not in stripped and _is_literal(stripped[1:]):
+                suffixes.add(stripped[1:])
+                continue
+
+            # "**/Name": either "<anything>/Name" or exactly "Name", i.e. the file name equals Name
+            if pattern.startswith("**/") and "/" not in stripped and _is_literal(stripped):
+                names.add(stripped)
+                continue
+
+            path_regexes.append(fnmatch.translate(pattern))
+            if pattern.startswith("**/"):
+                path_regexes.append(fnmatch.translate(stripped))
+            # A pattern containing "/" can never match a bare file name
+            if match_basename and "/" not in pattern:
+                name_regexes.append(fnmatch.translate(pattern))
+
+            if literal_affixes:
+                # Legacy shortcuts from crawl_local_files: literal extension and directory prefix checks
+                if pattern.startswith("*."):
+                    suffixes.add(pattern[1:])
+                if pattern.endswith("/*"):
+                    prefixes.add(pattern[:-1])
+
+        self._suffixes = tuple(sorted(suffixes))
+        self._prefixes = tuple(sorted(prefixes))
+        self._names = frozenset(names)
+        self._path_re = re.compile("|".join(path_regexes)).match if path_regexes else None
+        self._name_re = re.compile("|".join(name_regexes)).match if name_regexes else None
+
+    def __bool__(self):
+        return bool(self.patterns)
+
+    def __repr__(self):
+        return f"PatternSet({len(self.patterns)} patterns)"
+
+    def matches(self, path, name=None):
+        """
+        Check whether a path matches any pattern in the set.
+
+        Args:
+            path (str): Path to match (usually relative to the crawl root)
+            name (str, optional): File or directory name; derived from path if omitted
+
+        Returns:
+            bool: True if any pattern matches
+        """
+        if name is None:
+            name = os.path.basename(path)
+        if _NORMALIZE_CASE:
+            path = os.path.normcase(path)
+            name = os.path.normcase(name)
+
+        if self._suffixes and name.endswith(self._suffixes):
+            return True
+        if name in self._names:
+            return True
+        if self._prefixes and path.startswith(self._prefixes):
+            return True
+        if self._path_re is not None and self._path_re(path):
+            return True
+        if self._name_re is not None and self._name_re(name):
+            return True
+        return False
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_cached(patterns, match_basename, literal_affixes):
+    return PatternSet(patterns, match_basename=match_basename, literal_affixes=literal_affixes)
+
+
+def compile_patterns(patterns, match_basename=True, literal_affixes=False):
+    """
+    Compile a collection of glob patterns into a cached PatternSet.
+
+    Compiled sets are cached by the (sorted) pattern tuple and options, so
+    repeated crawls with the same include/exclude lists only compile once.
+
+    Args:
+        patterns (str or iterable of str): Glob pattern(s), e.g. {"**/*.py", "**/node_modules/**"}
+        match_basename (bool): Also match patterns against the bare file/directory name
+        literal_affixes (bool): Also apply the literal "*.ext" suffix and "dir/*" prefix
+                                checks used by crawl_local_files for include patterns
+
+    Returns:
+        PatternSet: Matcher for the given patterns
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    key = tuple(sorted(set(patterns or ())))
+    return _compile_cached(key, bool(match_basename), bool(literal_affixes))
+
+
+def compile_subtree_patterns(patterns):
+    """
+    Compile the "<dir>/**" patterns of a list into a matcher for directory paths.
+
+    A directory matching the result can be pruned without descending: every
+    file below it would be matched by the original "<dir>/**" pattern (by full
+    path or **/-stripped path), which a plain directory-path check misses
+    because "**/node_modules/**" does not match "node_modules" itself.
+
+    Args:
+        patterns (str or iterable of str): Exclude pattern(s)
+
+    Returns:
+        PatternSet: Matcher for directory paths (empty if no pattern ends in "/**")
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    return compile_patterns(
+        [pattern[:-3] for pattern in (patterns or ()) if pattern.endswith("/**") and len(pattern) > 3],
+        match_basename=False,
+    )
@@ -0,0 +1,51 @@
+import re
+from utils.cloud_analyzer import IMPORTANT_FILE_PATTERNS
+
+# Files fetched first when a crawl has a budget, highest value first. Each tier is a list of
+# path regexes; the first tier a path matches decides its rank.
+PRIORITY_TIERS = [
+    # Containers, CI pipelines, IaC and dependency manifests: small files that settle most scores
+    [
+        r'(^|/)Dockerfile', r'\.dockerfile$', r'docker-compose', r'(^|/)Containerfile$',
+        r'(^|/)\.github/workflows/', r'\.gitlab-ci\.ya?ml$', r'(^|/)Jenkinsfile$', r'azure-pipelines',
+        r'(^|/)\.circleci/', r'bitbucket-pipelines\.yml$', r'(^|/)\.travis\.yml$',
+        r'\.tf$', r'\.tfvars$', r'terraform', r'cloudformation', r'kubernetes', r'(^|/)k8s/',
+        r'(^|/)helm/', r'(^|/)Chart\.yaml$', r'serverless\.ya?ml$', r'\.bicep$', r'(^|/)Procfile$',
+        r'(^|/)requirements[^/]*\.txt$', r'(^|/)setup\.py$', r'(^|/)Pipfile$', r'(^|/)pyproject\.toml$',
+        r'(^|/)package\.json$', r'(^|/)pom\.xml$', r'(^|/)build\.gradle(\.kts)?$', r'(^|/)go\.mod$',
+        r'(^|/)Cargo\.toml$', r'(^|/)Gemfile$', r'(^|/)composer\.json$', r'\.csproj$',
+    ],
+    # Entry points and configuration (the analyzer's IMPORTANT_FILE_PATTERNS not covered above)
+    IMPORTANT_FILE_PATTERNS,
+    # Application source code
+    [
+        r'\.(py|js|jsx|ts|tsx|java|go|rb|php|cs|rs|kt|kts|scala|swift)$',
+        r'\.(ya?ml|json|toml|ini|properties|env)$', r'\.sh$',
+    ],
+]
+
+# Directories whose files matter less than the same kind of file elsewhere (one tier down)
+LOW_VALUE_DIRS = re.compile(
+    r'(^|/)(tests?|spec|__tests__|docs?|examples?|samples?|vendor|third_party|fixtures|node_modules)/',
+    re.IGNORECASE,
+)
+
+_compiled_tiers = [re.compile("|".join(f"(?:{p})" for p in tier), re.IGNORECASE) for tier in PRIORITY_TIERS]
+
+
+def file_tier(path):
+    """Tier of a path: 0 for the highest-signal files, len(PRIORITY_TIERS) for everything else."""
+    tier = next((i for i, regex in enumerate(_compiled_tiers) if regex.search(path)), len(_compiled_tiers))
+    if LOW_VALUE_DIRS.search(path):
+        tier = min(tier + 1, len(_compiled_tiers))
+    return tier
+
+
+def priority_key(path, size=0):
+    """
+    Sort key putting the files most worth fetching first.
+
+    Orders by tier, then by depth (top-level files describe the project as a
+    whole), then by size (smaller files fit more signal into a budget).
+    """
+    return (file_tier(path), path.count("/"), size, path)
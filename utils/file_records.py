@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+from utils.file_sniffing import decode_text
+
+
+class FileRecord:
+    """
+    A crawled file whose content is read and decoded only when asked for.
+
+    Keeps the path, size and content hash, plus a loader that returns the
+    decoded text (or None if the file can no longer be read/decoded). It
+    behaves like the (path, content) tuples used elsewhere: it unpacks and
+    indexes as a pair, and record[0] gives the path without touching the file.
+
+    Accessing content without load() reads the file each time and keeps
+    nothing. load() caches the text until release(), so a batch can be pinned
+    while several analyzers scan it (see loaded()).
+    """
+
+    __slots__ = ("path", "size", "sha", "_loader", "_content")
+
+    def __init__(self, path, loader, size=None, sha=None):
+        self.path = path
+        self.size = size
+        self.sha = sha
+        self._loader = loader
+        self._content = None
+
+    @property
+    def content(self):
+        if self._content is not None:
+            return self._content
+        return self._loader()
+
+    @property
+    def is_loaded(self):
+        return self._content is not None
+
+    def load(self):
+        """Read and cache the content until release(); returns it."""
+        if self._content is None:
+            self._content = self._loader()
+        return self._content
+
+    def release(self):
+        """Drop the cached content (it is re-read on the next access)."""
+        self._content = None
+
+    def __iter__(self):
+        yield self.path
+        yield self.content
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        if index in (0, -2):
+            return self.path
+        if index in (1, -1):
+            return self.content
+        raise IndexError("FileRecord index out of range")
+
+    def __repr__(self):
+        return f"FileRecord({self.path!r}, size={self.size}, loaded={self.is_loaded})"
+
+
+def text_file_loader(filepath, encoding="utf-8"):
+    """Create a loader reading a file as text with the encoding found when it was sniffed."""
+    def load():
+        try:
+            with open(filepath, "rb") as f:
+                return decode_text(f.read(), encoding)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Warning: Could not load file {filepath}: {e}")
+            return None
+    return load
+
+
+def file_path(item):
+    """Path of a FileRecord or (path, content) tuple, without loading content."""
+    return item[0]
+
+
+@contextmanager
+def loaded(files):
+    """
+    Keep the content of the FileRecords in files loaded inside the block.
+
+    Plain (path, content) tuples are left alone. Contents are released on exit.
+    """
+    records = [item for item in files if isinstance(item, FileRecord)]
+    for record in records:
+        record.load()
+    try:
+        yield files
+    finally:
+        for record in records:
+            record.release()
@@ -0,0 +1,81 @@
+import codecs
+
+# Number of leading bytes inspected to classify a file before reading all of it
+SNIFF_BYTES = 8192
+
+# Byte order marks, longest first (the UTF-32 LE BOM starts with the UTF-16 LE BOM)
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# Skip reasons reported in crawl stats
+SKIP_BINARY = "binary"
+SKIP_NON_UTF8 = "non_utf8"
+SKIP_DECODE_ERROR = "decode_error"
+SKIP_READ_ERROR = "read_error"
+SKIP_TOO_LARGE = "too_large"
+
+
+def sniff_encoding(prefix):
+    """
+    Classify a file from its first bytes.
+
+    Args:
+        prefix (bytes): Leading bytes of the file (up to SNIFF_BYTES)
+
+    Returns:
+        tuple: (encoding, skip_reason). encoding is the codec to decode the file with
+               ("utf-8", or the BOM's codec for UTF-8-BOM/UTF-16/UTF-32 files); if the
+               file should not be read, encoding is None and skip_reason says why.
+    """
+    # A BOM wins over the NUL check: UTF-16/32 text is full of NUL bytes
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding, None
+
+    if b"\0" in prefix:
+        return None, SKIP_BINARY
+
+    # Incremental decode so a multi-byte character cut off at the end of the prefix is not an error
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return None, SKIP_NON_UTF8
+    return "utf-8", None
+
+
+def decode_text(data, encoding="utf-8"):
+    """Decode bytes the way open(..., "r", encoding=encoding) would (universal newlines)."""
+    text = data.decode(encoding)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def read_sniffed(filepath):
+    """
+    Read a file's bytes only if its prefix looks like text.
+
+    Binary and non-UTF-8 files are rejected after reading SNIFF_BYTES instead
+    of the whole file.
+
+    Args:
+        filepath (str): Path of the file to read
+
+    Returns:
+        tuple: (data, encoding, skip_reason) - data and encoding are None when skipped
+    """
+    try:
+        with open(filepath, "rb") as f:
+            prefix = f.read(SNIFF_BYTES)
+            encoding, skip_reason = sniff_encoding(prefix)
+            if skip_reason:
+                return None, None, skip_reason
+            return prefix + f.read(), encoding, None
+    except OSError as e:
+        print(f"Warning: Could not read file {filepath}: {e}")
+        return None, None, SKIP_READ_ERROR
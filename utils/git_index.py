@@ -0,0 +1,94 @@
+import os
+import git
+
+# Index entry modes that do not correspond to a regular file's content
+_SYMLINK_MODE = "120000"
+_GITLINK_MODE = "160000"  # submodule
+
+
+class GitFileEntry:
+    """
+    Minimal os.DirEntry stand-in for a file listed from the git index.
+
+    Provides the attributes the local crawler uses (name, path, stat()) plus
+    sha: the file's blob SHA from the index when the working tree copy is
+    unchanged, else None (modified, untracked or symlinked files).
+    """
+
+    __slots__ = ("name", "path", "sha", "_stat")
+
+    def __init__(self, path, sha=None):
+        self.name = os.path.basename(path)
+        self.path = path
+        self.sha = sha
+        self._stat = None
+
+    def stat(self):
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    def __repr__(self):
+        return f"<GitFileEntry {self.name!r}>"
+
+
+def is_git_work_tree(directory):
+    """Check whether a directory is inside a git working tree."""
+    try:
+        return git.Git(directory).rev_parse("--is-inside-work-tree").strip() == "true"
+    except (git.GitCommandError, git.GitCommandNotFound, OSError):
+        return False
+
+
+def _walk_order_key(relpath):
+    # Same order as a sorted top-down walk: a directory's files before its subdirectories
+    parts = relpath.split("/")
+    return [(1, part) for part in parts[:-1]] + [(0, parts[-1])]
+
+
+def list_git_files(directory):
+    """
+    List the files of a git working tree from its index instead of walking it.
+
+    Tracked files come from `git ls-files --stage`, untracked files from
+    `git ls-files --others --exclude-standard`, so every .gitignore (nested ones
+    included), .git/info/exclude and the global excludes file apply, and ignored
+    build output is never visited. Paths are relative to directory, which may
+    be a subdirectory of the repository.
+
+    Args:
+        directory (str): Directory inside a git working tree
+
+    Returns:
+        tuple: ([(relpath, GitFileEntry), ...] in sorted walk order, counts) where
+               counts has tracked, untracked and modified file counts. relpath uses
+               os.sep; GitFileEntry.sha is the index blob SHA for unmodified files.
+    """
+    g = git.Git(directory)
+    staged = g.ls_files("-z", "--stage", "--cached")
+    modified = set(filter(None, g.ls_files("-z", "--modified").split("\0")))
+    deleted = set(filter(None, g.ls_files("-z", "--deleted").split("\0")))
+    untracked = [path for path in g.ls_files("-z", "--others", "--exclude-standard").split("\0") if path]
+
+    files = {}
+    for record in staged.split("\0"):
+        if not record:
+            continue
+        # "<mode> <sha> <stage>\t<path>"; unmerged paths appear once per stage
+        info, path = record.split("\t", 1)
+        mode, sha, _ = info.split(" ")
+        if mode == _GITLINK_MODE or path in deleted:
+            continue
+        if mode == _SYMLINK_MODE or path in modified:
+            sha = None
+        files[path] = sha
+
+    counts = {"tracked": len(files), "untracked": len(untracked), "modified": len(modified - deleted)}
+    for path in untracked:
+        files.setdefault(path, None)
+
+    entries = []
+    for path in sorted(files, key=_walk_order_key):
+        relpath = path.replace("/", os.sep)
+        entries.append((relpath, GitFileEntry(os.path.join(directory, relpath), files[path])))
+    return entries, counts
@@ -0,0 +1,335 @@
+import os
+import re
+import base64
+import time
+import shutil
+import hashlib
+import tempfile
+from contextlib import contextmanager
+import git
+
+try:
+    import fcntl
+except ImportError:  # Windows: mirrors are not locked against other processes
+    fcntl = None
+
+# Root directory of the bare mirrors kept between crawls of clone-based (SSH) repositories
+DEFAULT_MIRROR_ROOT = os.getenv("GIT_MIRROR_DIR", os.path.join("cache", "git_mirrors"))
+# Total disk space the mirrors may use before the least recently used ones are removed
+DEFAULT_MIRROR_QUOTA_BYTES = int(float(os.getenv("GIT_MIRROR_QUOTA_MB", "4096")) * 1024 * 1024)
+
+# Tree entry modes that are not regular file content
+_SYMLINK_MODE = "120000"
+_GITLINK_MODE = "160000"  # submodule
+
+_LAST_USED_FILE = "cloudview-last-used"
+
+# Refs a full mirror keeps up to date
+_MIRROR_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+
+# Blobs requested per fetch when filling in a filtered mirror
+_FETCH_BATCH = 500
+
+
+def mirror_dir_for(repo_url, root=None, filtered=False):
+    """
+    Get the mirror directory for a repository URL.
+
+    The name combines the repository name (for readability) with a hash of the
+    URL, so forks with the same name don't collide. Filtered mirrors (see
+    MirrorCache.open) are kept apart from full ones.
+    """
+    digest = hashlib.sha1(repo_url.encode("utf-8")).hexdigest()[:12]
+    # git@host:owner/name.git, https://host/owner/name.git, /path/to/name/.git -> name
+    base = re.sub(r"(/\.git|\.git)?/*$", "", repo_url)
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", base.rsplit("/", 1)[-1].rsplit(":", 1)[-1])
+    suffix = "-filtered" if filtered else ""
+    return os.path.join(root or DEFAULT_MIRROR_ROOT, f"{name or 'repo'}-{digest}{suffix}.git")
+
+
+def git_auth_env(token, host="github.com"):
+    """
+    Environment variables making git authenticate to an HTTPS host with a token.
+
+    The token is passed as an extra header through git's environment config, so it
+    never appears in a URL, a mirror's config or an error message.
+    """
+    if not token:
+        return {}
+    credentials = base64.b64encode(f"x-access-token:{token}".encode("utf-8")).decode("ascii")
+    return {
+        "GIT_TERMINAL_PROMPT": "0",
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": f"http.https://{host}/.extraheader",
+        "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+    }
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+@contextmanager
+def _locked(path, blocking=True):
+    """
+    Hold a lock file next to a mirror; yields False if blocking is False and it is busy.
+
+    A mirror is never evicted or re-fetched while it is locked. Evicting a mirror
+    removes its lock file too, so a lock taken on a file that has been removed
+    meanwhile is let go and taken again on the current one.
+    """
+    if fcntl is None:
+        yield True
+        return
+    lock_path = path + ".lock"
+    while True:
+        lock_file = open(lock_path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            yield False
+            return
+        try:
+            current = os.stat(lock_path).st_ino == os.fstat(lock_file.fileno()).st_ino
+        except FileNotFoundError:
+            current = False
+        if current:
+            break
+        lock_file.close()  # Closing releases the lock
+    with lock_file:
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _remove_lock_file(path):
+    """Remove a mirror's lock file; only while holding the lock (see _locked)."""
+    try:
+        os.remove(path + ".lock")
+    except FileNotFoundError:
+        pass
+
+
+class Mirror:
+    """
+    Read access to a bare mirror: file listings from `git ls-tree` and contents
+    straight from the object database through one `git cat-file --batch`
+    process, without checking out a working tree.
+
+    In a filtered mirror blobs are missing until fetch_blobs() asks the remote
+    for them, and listings carry no sizes (reading a size would fetch the blob).
+    """
+
+    def __init__(self, path, filtered=False, env=None):
+        self.path = path
+        self.filtered = filtered
+        self.repo = git.Repo(path)
+        if env:
+            # Lazy blob fetches talk to the remote too
+            self.repo.git.update_environment(**env)
+
+    def resolve(self, ref="HEAD"):
+        """Commit SHA of a ref (HEAD is the remote's default branch)."""
+        return self.repo.git.rev_parse("--verify", f"{ref}^{{commit}}").strip()
+
+    def list_files(self, commit):
+        """
+        List the regular files of a commit.
+
+        Returns:
+            list: (path, blob_sha, size) in tree order; symlinks and submodules are left out.
+                  size is None in filtered mirrors (see blob_size).
+        """
+        args = ["-r", "-z", commit] if self.filtered else ["-r", "-z", "--long", commit]
+        files = []
+        for record in self.repo.git.ls_tree(*args).split("\0"):
+            if not record:
+                continue
+            # "<mode> <type> <sha>[ <size>]\t<path>"
+            info, path = record.split("\t", 1)
+            mode, kind, sha = info.split()[:3]
+            if kind != "blob" or mode in (_SYMLINK_MODE, _GITLINK_MODE):
+                continue
+            files.append((path, sha, None if self.filtered else int(info.split()[3])))
+        return files
+
+    def fetch_blobs(self, commit, shas):
+        """
+        Fetch the given blobs of a filtered mirror that are not present yet.
+
+        Blobs are requested by id in batches (like git's own lazy fetch, but one
+        round trip per batch instead of per blob). Returns the number fetched.
+        """
+        if not self.filtered:
+            return 0
+        # "?<sha>" lines are objects of the commit the mirror doesn't have (listed without fetching)
+        listing = self.repo.git.rev_list("--objects", "--missing=print", commit)
+        missing = {line[1:] for line in listing.splitlines() if line.startswith("?")}
+        wanted = [sha for sha in dict.fromkeys(shas) if sha in missing]
+        for i in range(0, len(wanted), _FETCH_BATCH):
+            self.repo.git(c="fetch.negotiationAlgorithm=noop").fetch(
+                "origin", "--no-tags", "--no-write-fetch-head", "--recurse-submodules=no",
+                "--filter=blob:none", *wanted[i:i + _FETCH_BATCH],
+            )
+        return len(wanted)
+
+    def blob_size(self, sha):
+        """Size of a blob in bytes (without reading its content)."""
+        return self.repo.git.get_object_header(sha)[2]
+
+    def read_blob(self, sha):
+        """Raw bytes of a blob."""
+        return self.repo.git.get_object_data(sha)[3]
+
+    def close(self):
+        self.repo.close()
+
+
+class MirrorCache:
+    """
+    Bare mirrors of cloned repositories, kept on disk between crawls.
+
+    The first crawl of a URL clones a bare mirror (no working tree); later
+    crawls only fetch the objects added since. Mirrors are evicted least
+    recently used first once their total size exceeds quota_bytes. Lock files
+    keep concurrent jobs (threads or processes) from fetching the same mirror
+    twice at once or evicting a mirror that is being read.
+    """
+
+    def __init__(self, root=DEFAULT_MIRROR_ROOT, quota_bytes=DEFAULT_MIRROR_QUOTA_BYTES):
+        self.root = root
+        self.quota_bytes = quota_bytes
+
+    def _sync(self, repo_url, path, filtered=False, env=None):
+        """Clone or fetch a mirror; returns "cloned" or "fetched"."""
+        if os.path.isdir(path):
+            repo = git.Repo(path)
+            if env:
+                repo.git.update_environment(**env)
+            if filtered:
+                # Only the default branch tip, without blobs; bare clones have no fetch refspec
+                head_ref = repo.git.symbolic_ref("HEAD")
+                repo.git.fetch("--depth", "1", "--filter=blob:none", "--no-tags", "origin", f"+HEAD:{head_ref}")
+            else:
+                # Branches and tags only: other refs (GitHub's refs/pull/* in particular) can
+                # outnumber them by far on popular repositories
+                repo.git.fetch("--prune", "--force", "origin", *_MIRROR_REFSPECS)
+            return "fetched"
+        # Clone next to the final location, then rename, so an interrupted clone leaves no mirror
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=".clone-", dir=self.root)
+        try:
+            if filtered:
+                git.Repo.clone_from(repo_url, tmp_path, env=env, bare=True, depth=1, filter="blob:none",
+                                    single_branch=True, no_tags=True)
+            else:
+                # A bare clone copies branches and tags only (a --mirror clone copies every ref)
+                git.Repo.clone_from(repo_url, tmp_path, env=env, bare=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        return "cloned"
+
+    @contextmanager
+    def open(self, repo_url, stats=None, filtered=False, env=None):
+        """
+        Bring a repository's mirror up to date and yield a Mirror to read from it.
+
+        Args:
+            repo_url (str): URL to clone/fetch (any URL git understands, e.g. SSH)
+            stats (dict, optional): Filled with the mirror path, the action taken
+                                    ("cloned" or "fetched") and its duration
+            filtered (bool): Keep a shallow (depth 1), blob-less clone of the default
+                             branch instead of a full mirror; the blobs the crawl
+                             needs are fetched with Mirror.fetch_blobs
+            env (dict, optional): Extra environment for git commands talking to the
+                                  remote, e.g. git_auth_env(token) for private repositories
+
+        Raises:
+            git.GitCommandError: If the clone or fetch fails
+        """
+        path = mirror_dir_for(repo_url, self.root, filtered)
+        os.makedirs(self.root, exist_ok=True)
+        start = time.time()
+        # The exclusive lock is held until the mirror has been read: flock can't turn it into a
+        # shared one atomically, and in between another job's evict() could remove the mirror.
+        # Jobs crawling the same repository at once therefore read it one after the other.
+        with _locked(path):
+            action = self._sync(repo_url, path, filtered, env)
+            # The mtime of this file orders mirrors for eviction
+            with open(os.path.join(path, _LAST_USED_FILE), "w") as f:
+                f.write(repo_url)
+            if stats is not None:
+                stats.update({"path": path, "action": action, "seconds": round(time.time() - start, 2),
+                              "filtered": filtered})
+            print(f"Mirror of {repo_url} {action} in {time.time() - start:.1f}s")
+
+            self.evict(keep=path)
+            mirror = Mirror(path, filtered, env)
+            try:
+                yield mirror
+            finally:
+                mirror.close()
+
+    def mirrors(self):
+        """Existing mirrors as (last_used, path, size_bytes), least recently used first."""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not name.endswith(".git") or not os.path.isdir(path):
+                continue
+            try:
+                last_used = os.path.getmtime(os.path.join(path, _LAST_USED_FILE))
+            except OSError:
+                last_used = 0.0
+            found.append((last_used, path, _dir_size(path)))
+        return sorted(found)
+
+    def evict(self, keep=None):
+        """Remove least recently used mirrors until the rest fit in the quota; returns removed paths."""
+        mirrors = self.mirrors()
+        total = sum(size for _, _, size in mirrors)
+        removed = []
+        for _, path, size in mirrors:
+            if total <= self.quota_bytes:
+                break
+            if path == keep:
+                continue
+            with _locked(path, blocking=False) as acquired:
+                if not acquired:
+                    continue  # Being read or fetched by another job
+                shutil.rmtree(path, ignore_errors=True)
+                _remove_lock_file(path)
+            print(f"Evicted git mirror {path} ({size} bytes)")
+            total -= size
+            removed.append(path)
+        self._remove_stale_locks()
+        return removed
+
+    def _remove_stale_locks(self):
+        """Remove lock files left without a mirror (e.g. by failed clones)."""
+        for name in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            path = os.path.join(self.root, name[:-len(".lock")])
+            if not name.endswith(".lock") or os.path.isdir(path):
+                continue
+            with _locked(path, blocking=False) as acquired:
+                # The mirror may have been cloned while the lock was being taken
+                if acquired and not os.path.isdir(path):
+                    _remove_lock_file(path)
+
+
+def get_mirror_cache():
+    """Mirror cache at the configured root and quota."""
+    return MirrorCache()
@@ -0,0 +1,150 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+import utils.crawl_github_files as crawl_github
+from utils.github_rate_limit import TokenPool, pool_tokens
+from utils.http_cache import cache_key, get_response_cache
+from utils.http_session import http_get
+
+# Repositories requested per page of an organization listing (GitHub's maximum)
+ORG_PAGE_SIZE = 100
+
+_NEXT_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+def api_get(token_pool, url, params=None, accept="application/vnd.github.v3+json", max_retries=5):
+    """
+    GET an API URL on the pool token with the most quota left, revalidating cached responses
+
+    Listings of a rescanned organization mostly come back 304 and cost no quota.
+    Also used for commit comparisons (see utils.incremental_analysis).
+    """
+    headers = {"Accept": accept, "User-Agent": "CloudView-GitHub-Crawler/1.0"}
+    if token_pool.primary.token:
+        headers["Authorization"] = f"token {token_pool.primary.token}"
+    response_cache = get_response_cache()
+    key = cache_key(url, params, headers)
+    cached, validators = response_cache.get(key)
+    if cached is not None:
+        headers.update(response_cache.conditional_headers(validators))
+
+    for retry in range(max_retries):
+        with token_pool.lease() as lease:
+            request_headers = headers
+            if lease.token != token_pool.primary.token:
+                request_headers = {**headers, "Authorization": f"token {lease.token}"}
+            response = http_get(url, headers=request_headers, params=params)
+            lease.headers = response.headers
+        if response.status_code == 304 and cached is not None:
+            response_cache.hit(key, revalidated=True)
+            return cached
+        if response.status_code == 200:
+            response_cache.miss()
+            response_cache.put(key, response)
+            return response
+        if response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0":
+            # The pool now knows this token is exhausted; the retry goes elsewhere or waits
+            continue
+        if response.status_code == 429 or (response.status_code == 403 and "Retry-After" in response.headers):
+            retry_after = response.headers.get("Retry-After", "")
+            wait_time = int(retry_after) if retry_after.isdigit() else 2 ** retry
+            print(f"GitHub secondary rate limit while listing, waiting {wait_time}s (retry {retry+1}/{max_retries})")
+            time.sleep(wait_time)
+            continue
+        return response
+    return response
+
+
+def list_org_repositories(org, token=None, page_size=ORG_PAGE_SIZE):
+    """
+    Page through the repositories of a GitHub organization (or user account).
+
+    Args:
+        org (str): Organization or user login
+        token (str or list, optional): GitHub token(s); defaults like the crawler's (see pool_tokens).
+                                       Private repositories are listed when the token can see them.
+        page_size (int): Repositories per request
+
+    Yields:
+        dict: Repository as returned by the API (full_name, html_url, default_branch,
+              pushed_at, archived, fork, size, ...)
+
+    Raises:
+        ValueError: If the account doesn't exist or can't be listed
+    """
+    token_pool = TokenPool(pool_tokens(token))
+    url = f"{crawl_github.GITHUB_API_URL}/orgs/{quote(org)}/repos"
+    params = {"type": "all", "per_page": page_size}
+    response = api_get(token_pool, url, params)
+    if response.status_code == 404:
+        # Not an organization: list a user's repositories instead
+        url = f"{crawl_github.GITHUB_API_URL}/users/{quote(org)}/repos"
+        params = {"type": "owner", "per_page": page_size}
+        response = api_get(token_pool, url, params)
+
+    while True:
+        if response.status_code != 200:
+            raise ValueError(f"Could not list the repositories of {org}: HTTP {response.status_code}")
+        yield from response.json()
+        # Later pages are named by the Link header, with the query already in them
+        match = _NEXT_LINK.search(response.headers.get("Link", ""))
+        if not match:
+            break
+        response = api_get(token_pool, match.group(1))
+
+
+def default_branch_shas(repos, token=None, workers=8):
+    """
+    Resolve the head commit of each repository's default branch.
+
+    One request per repository with the sha media type (a 40-character body),
+    made concurrently.
+
+    Args:
+        repos (list): Repositories from list_org_repositories
+        token (str or list, optional): GitHub token(s)
+        workers (int): Concurrent requests
+
+    Returns:
+        dict: full_name -> commit SHA, or None for empty repositories and failed lookups
+    """
+    token_pool = TokenPool(pool_tokens(token))
+
+    def resolve(repo):
+        branch = repo.get("default_branch")
+        if not branch:
+            return None
+        response = api_get(
+            token_pool,
+            f"{crawl_github.GITHUB_API_URL}/repos/{repo['full_name']}/commits/{quote(branch, safe='')}",
+            accept="application/vnd.github.sha",
+        )
+        # An empty repository answers 409
+        return response.text.strip() if response.status_code == 200 else None
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        shas = list(executor.map(resolve, repos))
+    return {repo["full_name"]: sha for repo, sha in zip(repos, shas)}
+
+
+def prioritize_repositories(repos, include_forks=False, include_archived=False, limit=None):
+    """
+    Order repositories for scanning, most recently pushed first.
+
+    Args:
+        repos (iterable): Repositories from list_org_repositories
+        include_forks (bool): Keep forks (usually someone else's code)
+        include_archived (bool): Keep archived (read-only) repositories
+        limit (int, optional): Keep only the first limit repositories of the order
+
+    Returns:
+        list: Repositories to scan, in order
+    """
+    selected = [
+        repo for repo in repos
+        if (include_forks or not repo.get("fork")) and (include_archived or not repo.get("archived"))
+    ]
+    # ISO 8601 timestamps sort chronologically as strings; never-pushed repositories go last
+    selected.sort(key=lambda repo: repo.get("pushed_at") or "", reverse=True)
+    return selected[:limit] if limit is not None else selected
@@ -0,0 +1,199 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+# Requests left untouched in each token's quota (for token checks and other tools)
+RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "10"))
+
+# Start spacing requests out once less than this fraction of a token's quota is left
+PACE_BELOW_FRACTION = 0.25
+
+# Longest single sleep while waiting for a quota reset, so waiting threads re-check
+# the pool (another job may have added quota, or a reset may have been observed)
+_MAX_WAIT_STEP = 5.0
+
+_states = {}
+_states_lock = threading.Lock()
+# Guards the quota fields of every TokenState (pools of concurrent crawls share states)
+_quota_lock = threading.Lock()
+
+
+class TokenState:
+    """
+    Rate limit state of one token (None for unauthenticated requests), as last
+    reported by GitHub's X-RateLimit-* headers. Shared by every crawl in the
+    process using the token.
+    """
+
+    def __init__(self, token):
+        self.token = token
+        self.limit = None
+        self.remaining = None
+        self.reset = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.next_slot = 0.0
+
+    def available(self, now):
+        """Requests this token can still make in the current window (None if unknown)."""
+        if self.remaining is None or now >= self.reset:
+            # Not observed yet, or the window has reset since
+            return None if self.limit is None else self.limit - self.in_flight
+        return self.remaining - self.in_flight
+
+    def update(self, headers):
+        """Record the quota reported by a response's X-RateLimit-* headers, if any."""
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        reset = float(headers.get("X-RateLimit-Reset", 0))
+        remaining = int(remaining)
+        if reset > self.reset or self.remaining is None:
+            self.reset, self.remaining = reset, remaining
+        elif reset == self.reset:
+            # Responses of one window can arrive out of order: the lowest count is the latest
+            self.remaining = min(self.remaining, remaining)
+        self.limit = int(headers.get("X-RateLimit-Limit", self.limit or remaining))
+
+    def label(self):
+        if not self.token:
+            return "anonymous"
+        return f"...{self.token[-4:]}"
+
+
+def _state_for(token):
+    with _states_lock:
+        if token not in _states:
+            _states[token] = TokenState(token)
+        return _states[token]
+
+
+def pool_tokens(token=None):
+    """
+    Tokens to crawl with: the given token(s), else GITHUB_TOKENS (comma-separated), else GITHUB_TOKEN.
+
+    Returns:
+        list: Tokens, or [None] for unauthenticated requests
+    """
+    if token:
+        tokens = [token] if isinstance(token, str) else list(token)
+    else:
+        tokens = [t.strip() for t in os.environ.get("GITHUB_TOKENS", "").split(",") if t.strip()]
+        if not tokens and os.environ.get("GITHUB_TOKEN"):
+            tokens = [os.environ["GITHUB_TOKEN"]]
+    return list(dict.fromkeys(tokens)) or [None]
+
+
+def rate_limit_stats():
+    """Quota left on every token used in this process (by any crawl)."""
+    with _states_lock:
+        tokens = list(_states)
+    return TokenPool(tokens).stats()["tokens"] if tokens else []
+
+
+class TokenPool:
+    """
+    Schedule GitHub API requests over one or more tokens.
+
+    Each API request leases the token with the most quota left, as read from
+    the X-RateLimit-Remaining/Reset headers of earlier responses (counting
+    requests still in flight). Once a token drops below PACE_BELOW_FRACTION
+    of its limit, its requests are spaced so that the rest of the quota lasts
+    until the reset instead of running out; when every token is down to
+    RATE_LIMIT_RESERVE requests, lease() waits for the earliest reset.
+
+    Token state is process-wide, so concurrent crawls sharing a token also
+    share its budget. All tokens of a pool are expected to have access to the
+    repositories being crawled.
+    """
+
+    def __init__(self, tokens):
+        self.states = [_state_for(token) for token in tokens]
+        self.primary = self.states[0]
+        self.waited_seconds = 0.0
+
+    def _choose(self, now):
+        """Pick (state, wait) for the next API request, reserving a slot on the chosen token."""
+        unknown = [state for state in self.states if state.available(now) is None]
+        if unknown:
+            state = min(unknown, key=lambda s: s.in_flight)
+            state.in_flight += 1
+            return state, 0.0
+
+        state = max(self.states, key=lambda s: s.available(now))
+        left = state.available(now)
+        if left <= RATE_LIMIT_RESERVE:
+            # Every token is down to its reserve: wait for the earliest reset
+            return None, min(s.reset for s in self.states) - now
+
+        wait = 0.0
+        if left < state.limit * PACE_BELOW_FRACTION:
+            # Spread what is left of the quota over the rest of the window
+            interval = max(state.reset - now, 0) / max(left - RATE_LIMIT_RESERVE, 1)
+            slot = max(now, state.next_slot)
+            state.next_slot = slot + interval
+            wait = slot - now
+        state.in_flight += 1
+        return state, wait
+
+    def acquire(self):
+        """Reserve a token for one API request, sleeping while pacing or out of quota."""
+        while True:
+            with _quota_lock:
+                state, wait = self._choose(time.time())
+                if state is None:
+                    wait = max(min(wait, _MAX_WAIT_STEP), 0.1)
+                self.waited_seconds += max(wait, 0)
+            if state is not None:
+                if wait > 0:
+                    time.sleep(wait)
+                return state
+            print(f"GitHub rate limit nearly exhausted on all {len(self.states)} token(s), waiting {wait:.1f}s")
+            time.sleep(wait)
+
+    def release(self, state, response_headers=None):
+        with _quota_lock:
+            state.in_flight -= 1
+            state.requests += 1
+            if response_headers is not None:
+                state.update(response_headers)
+
+    @contextmanager
+    def lease(self):
+        """
+        Lease a token for one API request; the block yields the token and sets
+        lease.headers to the response headers so the quota can be updated.
+        """
+        state = self.acquire()
+        lease = _Lease(state.token)
+        try:
+            yield lease
+        finally:
+            self.release(state, lease.headers)
+
+    def stats(self):
+        """Quota left per token (tokens are shown by their last 4 characters only)."""
+        now = time.time()
+        with _quota_lock:
+            return {
+                "tokens": [
+                    {
+                        "token": state.label(),
+                        "limit": state.limit,
+                        "remaining": state.remaining if state.remaining is not None and now < state.reset else state.limit,
+                        "reset": state.reset or None,
+                        "requests": state.requests,  # by every crawl in this process
+                    }
+                    for state in self.states
+                ],
+                "waited_seconds": round(self.waited_seconds, 1),
+            }
+
+
+class _Lease:
+    __slots__ = ("token", "headers")
+
+    def __init__(self, token):
+        self.token = token
+        self.headers = None
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from requests.structures import CaseInsensitiveDict
+
+# On-disk cache of GitHub API/raw responses, shared by every process using the same path
+DEFAULT_CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", os.path.join("cache", "github_http.sqlite"))
+DEFAULT_CACHE_MAX_BYTES = int(float(os.getenv("GITHUB_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+# Cache hits whose LRU position is written in one transaction, at most this many or this long after the first
+LAST_USED_FLUSH_HITS = 100
+LAST_USED_FLUSH_SECONDS = 5.0
+# Stores between exact size checks (the running total only counts this process's stores)
+SIZE_RECHECK_PUTS = 100
+
+# Response headers kept with a cached body (the rest describe the original transfer)
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class CachedResponse:
+    """
+    A cached 200 response, with the parts of requests.Response the crawler uses.
+
+    from_cache tells callers it was not downloaded in this request (served
+    as-is or after a 304 revalidation).
+    """
+
+    def __init__(self, url, content, headers, encoding=None):
+        self.url = url
+        self.status_code = 200
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers)
+        self.encoding = encoding
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def cache_key(url, params=None, headers=None):
+    """
+    Key a request by URL, query params and the headers that change the response.
+
+    The Authorization header is included as a hash, so a response fetched with
+    one token (e.g. from a private repository) is never served to another.
+    """
+    headers = headers or {}
+    auth = headers.get("Authorization")
+    parts = {
+        "url": url,
+        "params": sorted((params or {}).items()),
+        "accept": headers.get("Accept"),
+        "auth": hashlib.sha256(auth.encode("utf-8")).hexdigest()[:16] if auth else None,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent cache of GitHub responses in SQLite, with conditional revalidation.
+
+    Each entry holds the body and the ETag/Last-Modified validators of a 200
+    response. Callers send the validators back (conditional_headers) and, on a
+    304, keep using the cached body: 304s don't count against GitHub's rate
+    limit. Entries are evicted least recently used first once the stored bodies
+    exceed max_bytes.
+
+    The size of the stored bodies is kept as a running total, summed again from
+    the table only when it passes max_bytes or every SIZE_RECHECK_PUTS stores
+    (other processes store too). Hits refresh the LRU position of their entry in
+    batches (see flush), so neither puts nor hits cost a scan or a commit each.
+
+    Safe to use from several threads (one connection per thread) and several
+    processes (WAL journal, so readers don't block the writer).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._counts_lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "revalidated": 0, "stored": 0, "evicted": 0}
+        # key -> last_used of hits not written yet, and when the oldest of them happened
+        self._pending_used = {}
+        self._pending_since = None
+        # Estimated size of the stored bodies (None until summed), and stores since it was summed
+        self._size = None
+        self._puts_since_sum = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, url TEXT, body BLOB, headers TEXT, encoding TEXT,"
+                " etag TEXT, last_modified TEXT, size INTEGER, last_used REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def _count(self, name, n=1):
+        with self._counts_lock:
+            self.counts[name] += n
+
+    def get(self, key):
+        """Get (CachedResponse, validators) for a key, or (None, {}) if it isn't cached."""
+        row = self._connection().execute(
+            "SELECT url, body, headers, encoding, etag, last_modified FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None, {}
+        url, body, headers, encoding, etag, last_modified = row
+        validators = {"etag": etag, "last_modified": last_modified}
+        return CachedResponse(url, body, json.loads(headers), encoding), validators
+
+    def conditional_headers(self, validators):
+        """If-None-Match / If-Modified-Since headers revalidating a cached entry."""
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def hit(self, key, revalidated=False):
+        """Record that a cached entry was used (revalidated: after a 304), refreshing its LRU position."""
+        self._count("revalidated" if revalidated else "hits")
+        now = time.time()
+        with self._counts_lock:
+            self._pending_used[key] = now
+            if self._pending_since is None:
+                self._pending_since = now
+            due = len(self._pending_used) >= LAST_USED_FLUSH_HITS or now - self._pending_since >= LAST_USED_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write the LRU positions of recent hits in one transaction (called once per crawl)."""
+        with self._counts_lock:
+            pending, self._pending_used, self._pending_since = self._pending_used, {}, None
+        if pending:
+            with self._connection() as db:
+                db.executemany("UPDATE responses SET last_used = ? WHERE key = ?",
+                               [(last_used, key) for key, last_used in pending.items()])
+
+    def miss(self):
+        """Record a request whose body had to be downloaded (not cached, or changed)."""
+        self._count("misses")
+
+    def put(self, key, response):
+        """Store a 200 response with its validators, then evict down to max_bytes."""
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        headers = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        with self._connection() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, body, json.dumps(headers), response.encoding,
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"), len(body), time.time()),
+            )
+        self._count("stored")
+        with self._counts_lock:
+            # A replaced entry's old size is still counted: the total only errs high
+            self._size = None if self._size is None else self._size + len(body)
+            self._puts_since_sum += 1
+            due = self._size is None or self._size > self.max_bytes or self._puts_since_sum >= SIZE_RECHECK_PUTS
+        if due:
+            self._evict()
+
+    def _evict(self):
+        # Entries hit since the last flush must not be evicted as if unused
+        self.flush()
+        with self._connection() as db:
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            with self._counts_lock:
+                self._size, self._puts_since_sum = total, 0
+            if total <= self.max_bytes:
+                return
+            evicted = 0
+            for key, size in db.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        with self._counts_lock:
+            self._size = total
+        self._count("evicted", evicted)
+
+    def stats(self):
+        """Counters of this process plus the current size of the shared cache."""
+        self.flush()
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return {**counts, "entries": entries, "size_bytes": size, "max_bytes": self.max_bytes}
+
+
+def get_response_cache(path=DEFAULT_CACHE_PATH):
+    """Get the process-wide ResponseCache for a path."""
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResponseCache(path)
+        return _caches[path]
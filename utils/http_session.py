@@ -0,0 +1,125 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds for requests that don't pass their own
+DEFAULT_TIMEOUT = (10, 60)
+
+# Number of hosts whose connection pools are kept, and connections kept open per host.
+# Concurrent crawls and downloads beyond POOL_MAXSIZE per host still work, but the
+# extra connections are closed after use instead of being kept alive.
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "8"))
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with a default timeout and connection reuse accounting.
+
+    urllib3 counts, per host pool, the requests sent and the connections it had
+    to open; every other request reused a kept-alive connection (no TCP/TLS
+    handshake). Counts of pools evicted from the pool manager are kept so the
+    totals stay cumulative.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        self._counts_lock = threading.Lock()
+        self._retired = {}
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        dispose = self.poolmanager.pools.dispose_func
+
+        def retire(pool):
+            self._add_counts(self._retired, pool)
+            # urllib3 1.x closes evicted pools through dispose_func; 2.x has none
+            if dispose is not None:
+                dispose(pool)
+            else:
+                pool.close()
+
+        self.poolmanager.pools.dispose_func = retire
+
+    def _add_counts(self, counts, pool):
+        with self._counts_lock:
+            host_counts = counts.setdefault(pool.host, {"requests": 0, "new_connections": 0})
+            host_counts["requests"] += pool.num_requests
+            host_counts["new_connections"] += pool.num_connections
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=timeout or self.timeout, **kwargs)
+
+    def connection_counts(self):
+        """{host: {"requests", "new_connections"}} since the adapter was created"""
+        with self._counts_lock:
+            counts = {host: dict(c) for host, c in self._retired.items()}
+        for key in list(self.poolmanager.pools.keys()):
+            pool = self.poolmanager.pools.get(key)
+            if pool is not None:
+                self._add_counts(counts, pool)
+        return counts
+
+
+def get_session():
+    """
+    Get the process-wide HTTP session used for GitHub traffic.
+
+    Connections are kept alive and pooled per host, so repeated requests to
+    api.github.com / raw.githubusercontent.com / codeload.github.com skip the
+    TLS handshake. The session is shared by all threads: urllib3's pools are
+    thread-safe, and callers pass their headers per request rather than
+    changing session state.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = PooledHTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                # Compressed JSON listings and raw files (urllib3 decompresses transparently)
+                session.headers["Accept-Encoding"] = "gzip, deflate"
+                _session = session
+    return _session
+
+
+def http_get(url, **kwargs):
+    """requests.get through the shared pooled session (same arguments and return value)"""
+    return get_session().get(url, **kwargs)
+
+
+def connection_stats():
+    """
+    Connection reuse of the shared session.
+
+    Returns:
+        dict: requests, new_connections and reused_connections in total and per host
+    """
+    hosts = {}
+    if _session is not None:
+        adapters = {id(a): a for a in _session.adapters.values() if isinstance(a, PooledHTTPAdapter)}
+        for adapter in adapters.values():
+            for host, counts in adapter.connection_counts().items():
+                host_counts = hosts.setdefault(host, {"requests": 0, "new_connections": 0})
+                host_counts["requests"] += counts["requests"]
+                host_counts["new_connections"] += counts["new_connections"]
+    for counts in hosts.values():
+        counts["reused_connections"] = max(counts["requests"] - counts["new_connections"], 0)
+    total = {
+        key: sum(counts[key] for counts in hosts.values())
+        for key in ("requests", "new_connections", "reused_connections")
+    }
+    return {**total, "hosts": hosts}
+
+
+def connection_stats_delta(before, after=None):
+    """Difference between two connection_stats() snapshots (after defaults to now)"""
+    after = after or connection_stats()
+    return {key: after[key] - before[key] for key in ("requests", "new_connections", "reused_connections")}
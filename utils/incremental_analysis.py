@@ -0,0 +1,220 @@
+import os
+import hmac
+import hashlib
+from urllib.parse import urlparse, quote
+import utils.crawl_github_files as crawl_github
+from utils.crawl_github_files import crawl_github_files
+from utils.github_org import api_get
+from utils.github_rate_limit import TokenPool, pool_tokens
+from utils.cloud_analyzer import (
+    analyze_architecture, calculate_cloud_readiness_scores, generate_recommendations,
+    blend_scores, readiness_level_for, llm_recommendations,
+)
+from utils.file_findings import aggregate_findings, scan_file_findings
+
+# Files a push may touch and still be analyzed incrementally; larger pushes get a full analysis
+INCREMENTAL_MAX_FILES = int(os.getenv("INCREMENTAL_MAX_FILES", "300"))
+# Push payloads list at most 20 commits; longer pushes are diffed with the compare API instead
+PUSH_PAYLOAD_MAX_COMMITS = 20
+# The compare API lists at most 300 changed files
+COMPARE_MAX_FILES = 300
+
+
+def webhook_signature(secret, body):
+    """The X-Hub-Signature-256 header GitHub sends with a webhook body, for a secret."""
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def github_repository(repo_url):
+    """
+    (owner, repo) of a whole-repository GitHub URL, or None.
+
+    Only analyses of whole repositories read over the API are updated
+    incrementally: SSH and .git clone URLs and /tree/<ref>/<path> URLs give None.
+    """
+    parsed = urlparse(repo_url or "")
+    parts = parsed.path.strip("/").split("/")
+    if parsed.scheme not in ("http", "https") or len(parts) != 2 or not all(parts) or parts[1].endswith(".git"):
+        return None
+    return parts[0], parts[1]
+
+
+def push_changes(payload):
+    """
+    Files a push changed, from the commits listed in its webhook payload.
+
+    Args:
+        payload (dict): Body of a GitHub push event
+
+    Returns:
+        dict: "changed" (added or modified) and "removed" paths between the payload's
+              before and after commits, or None when the payload can't tell: forced
+              pushes (commits may have been dropped) and pushes of more commits than
+              a payload lists
+    """
+    commits = payload.get("commits") or []
+    if payload.get("forced") or not commits or len(commits) >= PUSH_PAYLOAD_MAX_COMMITS:
+        return None
+    changed, removed = set(), set()
+    # Commits are listed oldest first, so a path's last change wins
+    for commit in commits:
+        for path in commit.get("added", []) + commit.get("modified", []):
+            changed.add(path)
+            removed.discard(path)
+        for path in commit.get("removed", []):
+            removed.add(path)
+            changed.discard(path)
+    return {"changed": changed, "removed": removed}
+
+
+def compare_changes(repo_url, base_sha, head_sha, token=None):
+    """
+    Files changed between two commits of a repository, from the compare API.
+
+    Args:
+        repo_url (str): Whole-repository GitHub URL
+        base_sha (str): Commit the changes start from
+        head_sha (str): Commit the changes lead to
+        token (str or list, optional): GitHub token(s); defaults like the crawler's (see pool_tokens)
+
+    Returns:
+        dict: "changed" and "removed" paths (a rename removes the old path), or None
+              when head_sha doesn't descend from base_sha (the diff would start at
+              their merge base), the comparison lists too many files, or it fails
+    """
+    owner, repo = github_repository(repo_url)
+    url = f"{crawl_github.GITHUB_API_URL}/repos/{owner}/{repo}/compare/{quote(base_sha)}...{quote(head_sha)}"
+    response = api_get(TokenPool(pool_tokens(token)), url)
+    if response.status_code != 200:
+        print(f"Could not compare {base_sha[:7]}...{head_sha[:7]} of {owner}/{repo}: HTTP {response.status_code}")
+        return None
+    comparison = response.json()
+    files = comparison.get("files", [])
+    if comparison.get("status") not in ("ahead", "identical") or len(files) >= COMPARE_MAX_FILES:
+        return None
+    changed, removed = set(), set()
+    for item in files:
+        if item["status"] == "removed":
+            removed.add(item["filename"])
+            continue
+        changed.add(item["filename"])
+        if item["status"] == "renamed" and item.get("previous_filename"):
+            removed.add(item["previous_filename"])
+    return {"changed": changed, "removed": removed}
+
+
+def apply_changes(repo_url, commit_sha, findings, changes, settings, token=None):
+    """
+    Bring the per-file findings of an analysis to a later commit, rescanning only changed files.
+
+    Changed files are fetched at commit_sha with the analysis' patterns and size
+    limit; those that no longer pass them leave the findings, as they would be
+    left out of a full crawl.
+
+    Args:
+        repo_url (str): Whole-repository GitHub URL the findings were crawled from
+        commit_sha (str): Commit to update the findings to
+        findings (dict): path -> findings of the analysis (see utils.file_findings); not modified
+        changes (dict): "changed" and "removed" paths, from push_changes or compare_changes
+        settings (dict): include_patterns, exclude_patterns and max_file_size of the analysis
+        token (str or list, optional): GitHub token(s)
+
+    Returns:
+        tuple: (findings at commit_sha, crawl stats of the re-fetch)
+
+    Raises:
+        ValueError: If a changed file could not be fetched
+    """
+    updated = dict(findings)
+    for path in changes["changed"] | changes["removed"]:
+        updated.pop(path, None)
+    if not changes["changed"]:
+        return updated, {}
+
+    result = crawl_github_files(
+        f"{repo_url.rstrip('/')}/tree/{commit_sha}",
+        token=token,
+        max_file_size=settings["max_file_size"],
+        use_relative_paths=True,
+        include_patterns=settings["include_patterns"],
+        exclude_patterns=settings["exclude_patterns"],
+        # One raw download per changed file, never the whole tarball
+        use_tarball=False,
+        resume=False,
+        only_paths=changes["changed"],
+    )
+    stats = result["stats"]
+    coverage = stats.get("coverage", {})
+    if stats.get("error") or coverage.get("files_fetched", 0) < coverage.get("files_selected", 0):
+        raise ValueError(f"Could not fetch the changed files at {commit_sha}: "
+                         f"{stats.get('error') or coverage.get('unfetched')}")
+    for path, content in result["files"].items():
+        updated[path] = scan_file_findings(path, content)
+    return updated, stats
+
+
+def rebuild_report(previous_report, findings, use_llm, incremental=None):
+    """
+    Recompute a cloud readiness report from per-file findings.
+
+    Aggregates, architecture, scores, readiness level and recommendations are
+    computed as CloudReadinessAnalysis does. The LLM analysis of the previous
+    report is kept and blended in again when use_llm is set (it is not rerun,
+    so it still describes the previous commit).
+
+    Args:
+        previous_report (dict): Report of the analysis the findings were updated from
+        findings (dict): path -> findings, e.g. from apply_changes
+        use_llm (bool): Whether the analysis used the LLM
+        incremental (dict, optional): Stored in the report under "incremental"
+
+    Returns:
+        dict: The report
+    """
+    # Keep the previous file order (the per-file lists of the report follow it); added files go last
+    previous_files = previous_report.get("technology_stack", {}).get("files", [])
+    paths = [path for path in previous_files if path in findings]
+    paths += sorted(set(findings) - set(paths))
+    merged = aggregate_findings({path: findings[path] for path in paths})
+    tech_analysis = merged["tech_analysis"]
+    tech_analysis["files"] = [(path, None) for path in paths]
+    architecture = analyze_architecture(tech_analysis)
+    tech_analysis["files"] = paths
+    del tech_analysis["content_mentions"]
+
+    analyses = (
+        merged["env_vars_analysis"], merged["coupling_analysis"], merged["logging_analysis"],
+        merged["state_management"], merged["modularity_analysis"], merged["dependency_analysis"],
+        merged["health_check_analysis"], merged["testing_analysis"], merged["instrumentation_analysis"],
+    )
+    scores = calculate_cloud_readiness_scores(tech_analysis, merged["secrets_analysis"], architecture, *analyses)
+    llm_analysis = previous_report.get("llm_analysis") if use_llm else None
+    if llm_analysis:
+        scores = blend_scores(scores, llm_analysis.get("factors", {}))
+    recommendations = generate_recommendations(tech_analysis, merged["secrets_analysis"], architecture, scores, *analyses)
+    if llm_analysis:
+        recommendations.extend(llm_recommendations(llm_analysis))
+
+    report = {
+        'technology_stack': tech_analysis,
+        'architecture': architecture,
+        'secrets': merged["secrets_analysis"],
+        'environment_variables': merged["env_vars_analysis"],
+        'service_coupling': merged["coupling_analysis"],
+        'logging_practices': merged["logging_analysis"],
+        'state_management': merged["state_management"],
+        'code_modularity': merged["modularity_analysis"],
+        'dependency_management': merged["dependency_analysis"],
+        'health_checks': merged["health_check_analysis"],
+        'testing_coverage': merged["testing_analysis"],
+        'instrumentation': merged["instrumentation_analysis"],
+        'scores': scores,
+        'overall_score': scores['overall'],
+        'readiness_level': readiness_level_for(scores['overall']),
+        'recommendations': recommendations,
+    }
+    if llm_analysis:
+        report['llm_analysis'] = llm_analysis
+    if incremental:
+        report['incremental'] = incremental
+    return report
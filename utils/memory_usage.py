@@ -0,0 +1,89 @@
+import os
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Seconds between RSS samples taken by PeakMemoryTracker
+DEFAULT_SAMPLE_INTERVAL = 0.05
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss():
+    """
+    Get the current resident set size of this process in bytes.
+
+    Reads /proc/self/statm where available; elsewhere falls back to the
+    process's peak RSS from getrusage (or 0 if that is unavailable too).
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakMemoryTracker:
+    """
+    Record the peak RSS of the process while a block of code runs.
+
+    A daemon thread samples the RSS every interval seconds. The peak is
+    process-wide, so jobs running concurrently in the same process are
+    included in each other's figures.
+
+    Usage:
+        with PeakMemoryTracker() as tracker:
+            flow.run(shared)
+        tracker.summary()
+    """
+
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def start(self):
+        self.baseline = self.peak = current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="memory-tracker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.peak = max(self.peak, current_rss())
+        return self.summary()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def summary(self):
+        """Baseline and peak RSS in MB, and the growth between them."""
+        mb = 1024 * 1024
+        return {
+            "baseline_rss_mb": round(self.baseline / mb, 1),
+            "peak_rss_mb": round(self.peak / mb, 1),
+            "peak_growth_mb": round((self.peak - self.baseline) / mb, 1),
+        }
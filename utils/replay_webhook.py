@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Replay recorded GitHub webhook deliveries against the backend's /webhook/github.
+
+Each file holds one delivery: either the bare event payload, or a delivery as
+GitHub's "Recent Deliveries" API returns it ({"request": {"headers": ...,
+"payload": ...}}, or just {"headers": ..., "payload": ...}), whose
+X-GitHub-Event header names the event. Deliveries are re-signed with the
+webhook secret, so recorded ones work with any secret the backend uses.
+
+Together with utils/fake_github_server.py (set GITHUB_API_URL and
+GITHUB_RAW_URL for the backend, and --repo-url to its repository URL) pushes
+can be re-analyzed entirely offline.
+
+Usage:
+    python utils/replay_webhook.py push.json [more.json ...] --wait
+    python utils/replay_webhook.py push.json --url http://localhost:8000/webhook/github --secret s3cret
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.http_session import get_session
+from utils.incremental_analysis import webhook_signature
+
+DEFAULT_WEBHOOK_URL = "http://localhost:8000/webhook/github"
+
+
+def load_delivery(path):
+    """Read a recorded delivery; returns (event, payload), event None when the file doesn't name it."""
+    with open(path, encoding="utf-8") as f:
+        delivery = json.load(f)
+    delivery = delivery.get("request", delivery)
+    if "payload" not in delivery:
+        return None, delivery
+    headers = {name.lower(): value for name, value in (delivery.get("headers") or {}).items()}
+    return headers.get("x-github-event"), delivery["payload"]
+
+
+def replay(payload, url=DEFAULT_WEBHOOK_URL, event="push", secret=None):
+    """
+    POST one webhook delivery the way GitHub sends it.
+
+    Args:
+        payload (dict): Event payload
+        url (str): Webhook endpoint
+        event (str): X-GitHub-Event of the delivery
+        secret (str, optional): Webhook secret to sign the body with
+
+    Returns:
+        requests.Response: The endpoint's response
+    """
+    body = json.dumps(payload).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": "GitHub-Hookshot/replay",
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": str(uuid.uuid4()),
+    }
+    if secret:
+        headers["X-Hub-Signature-256"] = webhook_signature(secret, body)
+    return get_session().post(url, data=body, headers=headers, timeout=30)
+
+
+def wait_for_job(status_url, poll_interval=1.0, timeout=600):
+    """Poll a job's status URL until it completes or fails; returns its last status."""
+    deadline = time.time() + timeout
+    while True:
+        status = get_session().get(status_url, timeout=30).json()
+        if status.get("status") in ("completed", "failed") or time.time() > deadline:
+            return status
+        time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("deliveries", nargs="+", help="Recorded payload or delivery JSON files, replayed in order")
+    parser.add_argument("--url", default=DEFAULT_WEBHOOK_URL)
+    parser.add_argument("--secret", default=os.getenv("GITHUB_WEBHOOK_SECRET"),
+                        help="Webhook secret (default: $GITHUB_WEBHOOK_SECRET)")
+    parser.add_argument("--event", help="X-GitHub-Event to send (default: the recorded one, else push)")
+    parser.add_argument("--repo-url", help="Replace the payloads' repository URL (e.g. a fake GitHub's)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds between deliveries")
+    parser.add_argument("--wait", action="store_true", help="Wait for each analysis job before the next delivery")
+    args = parser.parse_args()
+
+    status_base = args.url.split("/webhook/", 1)[0] + "/status/"
+    for i, path in enumerate(args.deliveries):
+        if i and args.delay:
+            time.sleep(args.delay)
+        recorded_event, payload = load_delivery(path)
+        if args.repo_url:
+            payload.setdefault("repository", {})["html_url"] = args.repo_url
+        response = replay(payload, args.url, args.event or recorded_event or "push", args.secret)
+        print(f"{path}: HTTP {response.status_code} {response.text}")
+        if args.wait and response.status_code == 200 and response.json().get("job_id"):
+            status = wait_for_job(status_base + response.json()["job_id"])
+            print(f"  job {status.get('id')}: {status.get('status')}, evaluation {status.get('evaluation_id')}"
+                  f"{', updated from ' + status['incremental_from'] if status.get('incremental_from') else ''}"
+                  f"{', error: ' + status['error'] if status.get('error') else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import re
+from urllib.parse import urlparse
+import git
+from utils.git_index import is_git_work_tree
+from utils.git_mirror import git_auth_env
+from utils.github_rate_limit import pool_tokens
+
+_SHA_RE = re.compile(r"^[0-9a-f]{40}$")
+
+# Seconds before a `git ls-remote` against an unreachable host is abandoned
+LS_REMOTE_TIMEOUT = 30
+
+
+def _ls_remote(url, *refs, env=None):
+    """Map ref name -> commit SHA (annotated tags peeled) from `git ls-remote`."""
+    output = git.Git().ls_remote(url, *refs, env={"GIT_TERMINAL_PROMPT": "0", **(env or {})},
+                                 kill_after_timeout=LS_REMOTE_TIMEOUT)
+    refs_by_name = {}
+    for line in output.splitlines():
+        sha, name = line.split("\t", 1)
+        if name.endswith("^{}"):
+            # Peeled tag: the commit the annotated tag points to
+            refs_by_name[name[:-3]] = sha
+        else:
+            refs_by_name.setdefault(name, sha)
+    return refs_by_name
+
+
+def _github_revision(repo_url, token=None):
+    parsed = urlparse(repo_url)
+    path_parts = parsed.path.strip("/").split("/")
+    if len(path_parts) < 2:
+        return None
+    owner, repo = path_parts[0], path_parts[1]
+    # The token goes through git's environment (see git_auth_env), never the URL or command line
+    remote = f"https://{parsed.netloc}/{owner}/{repo}.git"
+    env = git_auth_env(token, parsed.netloc)
+
+    if len(path_parts) < 4 or path_parts[2] != "tree":
+        return _ls_remote(remote, "HEAD", env=env).get("HEAD")
+
+    # /tree/<ref>/<path>: the ref may itself contain slashes, so take the longest
+    # branch or tag name the rest of the path starts with
+    rest = "/".join(path_parts[3:])
+    refs = _ls_remote(remote, "--heads", "--tags", env=env)
+    best = None
+    for name, sha in refs.items():
+        short = name.split("/", 2)[-1]  # refs/heads/x or refs/tags/x -> x
+        if (rest == short or rest.startswith(short + "/")) and (best is None or len(short) > len(best[0])):
+            best = (short, sha)
+    if best:
+        return best[1]
+    return path_parts[3] if _SHA_RE.match(path_parts[3]) else None
+
+
+def _local_revision(local_dir):
+    if not is_git_work_tree(local_dir):
+        return None
+    g = git.Git(local_dir)
+    # Uncommitted or untracked changes are not captured by the commit
+    if g.status("--porcelain", "--untracked-files=normal", "--", ".").strip():
+        return None
+    return g.rev_parse("HEAD").strip()
+
+
+def resolve_revision(repo_url=None, local_dir=None, token=None):
+    """
+    Resolve what a crawl would read to a commit SHA, without crawling.
+
+    GitHub URLs and clone URLs are resolved with one `git ls-remote` (no API
+    quota is used): the ref named in a /tree/<ref>/... URL, otherwise the
+    default branch. A local directory resolves to its HEAD when it is a clean
+    git working tree.
+
+    Args:
+        repo_url (str, optional): GitHub or clone (SSH) URL
+        local_dir (str, optional): Local directory, used when repo_url is not given
+        token (str, optional): GitHub token for private repositories (defaults like the crawler's)
+
+    Returns:
+        str: Commit SHA, or None if the content can't be pinned to a commit
+             (unreachable remote, unknown ref, dirty or non-git directory)
+    """
+    try:
+        if repo_url:
+            if repo_url.startswith("git@") or repo_url.endswith(".git"):
+                return _ls_remote(repo_url, "HEAD").get("HEAD")
+            token = pool_tokens(token)[0]
+            return _github_revision(repo_url, token)
+        if local_dir and os.path.isdir(local_dir):
+            return _local_revision(local_dir)
+    except (git.GitCommandError, git.GitCommandNotFound, OSError, ValueError) as e:
+        print(f"Could not resolve the commit of {repo_url or local_dir}: {e}")
+    return None